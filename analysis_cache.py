@@ -0,0 +1,190 @@
+"""
+Persistent, content-addressed cache of LLM news analyses.
+
+An analysis is keyed by the SHA-256 of the normalized article text, the
+prompt version and the model, so the same article pasted by two users (or
+scraped twice with different whitespace) costs one LLM call. Entries live
+in a SQLite file shared by every process, expire after a maximum age and
+are evicted least recently used first once the cache exceeds its size
+budget. Hit/miss counts and the tokens saved are stored alongside.
+
+Usage:
+    python analysis_cache.py          # show cache statistics
+    python analysis_cache.py --clear  # remove every cached analysis
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from utils.cache import cached_resource
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.getenv("STOCKIE_ANALYSIS_CACHE", os.path.join(ROOT_DIR, "data", "analysis_cache.sqlite"))
+MAX_CACHE_BYTES = int(os.getenv("STOCKIE_ANALYSIS_CACHE_MB", "64")) * 1024 * 1024
+MAX_AGE_DAYS = int(os.getenv("STOCKIE_ANALYSIS_CACHE_DAYS", "30"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_last_used ON analyses (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def normalize_text(text):
+    """Unicode-normalize and collapse whitespace so trivial differences hash alike"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def content_key(text, prompt_version, model):
+    """SHA-256 key of the normalized text, prompt version and model"""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, normalize_text(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """SQLite store of analyses with age and size based eviction"""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES, max_age_days=MAX_AGE_DAYS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _bump(self, name, amount=1):
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def get(self, text, prompt_version, model, now=None):
+        """
+        Return the cached analysis for ``text`` or None
+
+        Args:
+            text (str): Article text
+            prompt_version (str): Version of the prompt template
+            model (str): Model name
+
+        Returns:
+            dict: Cached analysis, or None on a miss
+        """
+        now = now or time.time()
+        key = content_key(text, prompt_version, model)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, tokens, created_at FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[2] > self.max_age:
+                self._conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._bump('misses')
+                return None
+            self._conn.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (now, key))
+            self._bump('hits')
+            self._bump('tokens_saved', row[1])
+        return json.loads(row[0])
+
+    def put(self, text, prompt_version, model, result, tokens=0, now=None):
+        """Store an analysis and evict expired or least recently used entries"""
+        now = now or time.time()
+        payload = json.dumps(result, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses "
+                "(key, model, prompt_version, result, tokens, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (content_key(text, prompt_version, model), model, prompt_version, payload,
+                 tokens or 0, len(payload), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        evicted = self._conn.execute("DELETE FROM analyses WHERE created_at < ?", (now - self.max_age,)).rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM analyses").fetchone()[0]
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            keys, freed = [], 0
+            for key, size in self._conn.execute("SELECT key, size FROM analyses ORDER BY last_used"):
+                keys.append(key)
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany("DELETE FROM analyses WHERE key = ?", [(key,) for key in keys])
+            evicted += len(keys)
+        if evicted:
+            self._bump('evictions', evicted)
+
+    def stats(self):
+        """Return hit/miss counters, tokens saved and current size"""
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analyses").fetchone()
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'tokens_saved': counters.get('tokens_saved', 0),
+            'evictions': counters.get('evictions', 0),
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+        }
+
+    def clear(self):
+        """Remove every cached analysis and reset the counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM analyses")
+            self._conn.execute("DELETE FROM counters")
+
+
+@cached_resource
+def get_analysis_cache():
+    """Return the process-wide analysis cache"""
+    return AnalysisCache()
+
+
+if __name__ == "__main__":
+    import sys
+
+    cache = get_analysis_cache()
+    if "--clear" in sys.argv:
+        cache.clear()
+        print("🧹 Cleared news analysis cache")
+    stats = cache.stats()
+    print(f"📦 {stats['entries']} cached analyses, {stats['bytes'] / 1024:.1f} KiB "
+          f"of {stats['max_bytes'] / 1024 / 1024:.0f} MiB")
+    print(f"🎯 {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%}), "
+          f"{stats['tokens_saved']} tokens saved")
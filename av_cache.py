@@ -0,0 +1,197 @@
+"""
+Persistent cache of raw Alpha Vantage responses.
+
+Responses are stored gzip-compressed on disk, keyed by (function, symbol,
+outputsize). A daily series stays fresh until the first market close after
+it was fetched, so repeated imports of the same symbol within a session
+cost no API calls. A cached ``full`` response also serves ``compact``
+requests. The cache is bounded in size and evicts least recently used
+entries first.
+
+Usage:
+    python av_cache.py          # show cache statistics
+    python av_cache.py --clear  # remove every cached response
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from utils.market_calendar import EASTERN, next_close, now_eastern
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.getenv("STOCKIE_AV_CACHE", os.path.join(ROOT_DIR, "data", "av_cache"))
+MAX_CACHE_BYTES = int(os.getenv("STOCKIE_AV_CACHE_MB", "200")) * 1024 * 1024
+
+# Number of data points Alpha Vantage returns for outputsize=compact
+COMPACT_POINTS = 100
+
+_SAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def is_fresh(fetched_at, now=None):
+    """Return True until the first session close after ``fetched_at``"""
+    return (now or now_eastern()) < next_close(fetched_at)
+
+
+def slice_compact(payload):
+    """Reduce a full TIME_SERIES_DAILY payload to the latest ``COMPACT_POINTS`` bars"""
+    series = payload.get("Time Series (Daily)", {})
+    latest = sorted(series, reverse=True)[:COMPACT_POINTS]
+    sliced = dict(payload)
+    sliced["Time Series (Daily)"] = {day: series[day] for day in latest}
+    return sliced
+
+
+class ResponseCache:
+    """Size-bounded, gzip-compressed on-disk store of API responses"""
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, function, symbol, outputsize):
+        name = "_".join(_SAFE.sub("-", part) for part in (function.upper(), symbol.upper(), outputsize))
+        return os.path.join(self.root, f"{name}.json.gz")
+
+    def _load(self, path):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, function, symbol, outputsize="compact", now=None):
+        """
+        Return a fresh cached payload or None
+
+        Args:
+            function (str): Alpha Vantage function, e.g. 'TIME_SERIES_DAILY'
+            symbol (str): Stock symbol
+            outputsize (str): 'compact' or 'full'
+            now (datetime, optional): Aware datetime used for the freshness check
+
+        Returns:
+            dict: Decoded response, or None on a miss
+        """
+        sizes = [outputsize] + (["full"] if outputsize == "compact" else [])
+        for size in sizes:
+            path = self._path(function, symbol, size)
+            entry = self._load(path) if os.path.exists(path) else None
+            if entry is None:
+                continue
+            if not is_fresh(datetime.fromisoformat(entry['fetched_at']), now):
+                continue
+            try:
+                os.utime(path)  # mark as recently used for eviction
+            except OSError:
+                pass
+            with self._lock:
+                self.hits += 1
+            payload = entry['payload']
+            return slice_compact(payload) if size != outputsize else payload
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, function, symbol, outputsize, payload, fetched_at=None):
+        """Store a successful response and evict old entries if over budget"""
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(function, symbol, outputsize)
+        entry = {'fetched_at': (fetched_at or now_eastern()).astimezone(EASTERN).isoformat(), 'payload': payload}
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as file:
+            json.dump(entry, file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for name in os.listdir(self.root):
+            if name.endswith(".json.gz"):
+                path = os.path.join(self.root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        """Return hit/miss counters and current disk usage"""
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+            }
+
+    def discard(self, function, symbol):
+        """Drop every cached response for ``symbol``, e.g. one fetched before the day's bar was published"""
+        for outputsize in ("compact", "full"):
+            try:
+                os.remove(self._path(function, symbol, outputsize))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every cached response"""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide Alpha Vantage response cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+if __name__ == "__main__":
+    import sys
+
+    cache = get_response_cache()
+    if "--clear" in sys.argv:
+        cache.clear()
+        print("🧹 Cleared Alpha Vantage response cache")
+    stats = cache.stats()
+    print(f"📦 {stats['entries']} cached responses, {stats['bytes'] / 1024:.1f} KiB "
+          f"of {stats['max_bytes'] / 1024 / 1024:.0f} MiB")
@@ -0,0 +1,108 @@
+"""
+Benchmark: near-duplicate detection of syndicated news articles
+
+Indexes a set of synthetic wire stories, then looks up syndicated copies
+(new headline and intro, outlet boilerplate, a dropped paragraph and a few
+reworded words) and unrelated stories. Reports how many copies the exact
+content hash and the MinHash index catch, false matches on unrelated
+stories, and the index and lookup times.
+
+Usage:
+    python benchmarks/dedup_bench.py [--stories 2000] [--copies 500]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add parent directory to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from analysis_cache import content_key
+from news_dedup import DuplicateIndex, similarity, minhash
+
+ANALYSIS = {"summary": ["point"], "positive_industries": ["A"], "negative_industries": ["B"]}
+
+
+def make_vocabulary(rng, size=5000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+
+def make_story(rng, vocabulary):
+    paragraphs = []
+    for _ in range(rng.randint(6, 12)):
+        sentences = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(10, 25))).capitalize() + "."
+                     for _ in range(rng.randint(3, 5))]
+        paragraphs.append(" ".join(sentences))
+    return paragraphs
+
+
+def syndicate(rng, vocabulary, paragraphs, reword=0.03):
+    """A republished copy: outlet intro and footer, one paragraph dropped, a few words changed"""
+    copy = list(paragraphs)
+    if len(copy) > 6:
+        copy.pop(rng.randrange(1, len(copy)))
+    words = " ".join(copy).split()
+    for i in rng.sample(range(len(words)), int(len(words) * reword)):
+        words[i] = rng.choice(vocabulary)
+    intro = f"({rng.choice(['Reuters', 'AP', 'Bloomberg'])}) - " + " ".join(rng.choice(vocabulary) for _ in range(15))
+    footer = "Reporting by " + " ".join(rng.choice(vocabulary) for _ in range(8)) + ". All rights reserved."
+    return f"{intro} {' '.join(words)} {footer}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate news detection")
+    parser.add_argument("--stories", type=int, default=2000)
+    parser.add_argument("--copies", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    vocabulary = make_vocabulary(rng)
+    stories = [make_story(rng, vocabulary) for _ in range(args.stories)]
+    originals = [" ".join(paragraphs) for paragraphs in stories]
+
+    index = DuplicateIndex(os.path.join(tempfile.mkdtemp(), "news_dedup.sqlite"))
+    exact_keys = set()
+    start = time.perf_counter()
+    for i, text in enumerate(originals):
+        index.add(text, "v1", "model", ANALYSIS, url=f"https://wire.example/{i}")
+        exact_keys.add(content_key(text, "v1", "model"))
+    add_ms = (time.perf_counter() - start) * 1000 / len(originals)
+
+    picked = rng.sample(range(len(stories)), min(args.copies, len(stories)))
+    copies = [(i, syndicate(rng, vocabulary, stories[i])) for i in picked]
+    unrelated = [" ".join(make_story(rng, vocabulary)) for _ in range(args.copies)]
+
+    exact_hits = sum(content_key(text, "v1", "model") in exact_keys for _, text in copies)
+    found, correct, lookup_ms, scores = 0, 0, [], []
+    for i, text in copies:
+        start = time.perf_counter()
+        match = index.find(text, "v1", "model")
+        lookup_ms.append((time.perf_counter() - start) * 1000)
+        scores.append(similarity(minhash(text), minhash(originals[i])))
+        if match:
+            found += 1
+            correct += match['url'] == f"https://wire.example/{i}"
+    false_matches = 0
+    for text in unrelated:
+        start = time.perf_counter()
+        false_matches += index.find(text, "v1", "model") is not None
+        lookup_ms.append((time.perf_counter() - start) * 1000)
+
+    print(f"Indexed {len(originals)} stories ({add_ms:.2f} ms each)")
+    print(f"Syndicated copies: {len(copies)} (estimated Jaccard to original: median "
+          f"{statistics.median(scores):.2f}, min {min(scores):.2f})")
+    print(f"  exact content hash: {exact_hits:>4} caught ({exact_hits / len(copies):.0%})")
+    print(f"  near-duplicate:     {found:>4} caught ({found / len(copies):.0%}), {correct} cite the right original")
+    print(f"Unrelated stories: {len(unrelated)}, false matches: {false_matches}")
+    print(f"Lookup: median {statistics.median(lookup_ms):.2f} ms, max {max(lookup_ms):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
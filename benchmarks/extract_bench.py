@@ -0,0 +1,98 @@
+"""
+Benchmark: article text extraction over saved HTML pages
+
+Compares the previous BeautifulSoup path (full ``html.parser`` tree,
+``get_text()``, split/strip clean-up, then truncation) with the extractor
+chain in ``news_extract`` on every ``*.html`` file in the fixture
+directory. Pages are fed from memory in download-sized chunks, so the
+numbers measure parsing only; "read" shows how much of each page the
+chain needed before it stopped.
+
+Usage:
+    python benchmarks/extract_bench.py [--fixtures DIR] [--runs 10]
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+# Add parent directory to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from news_extract import MAX_CONTENT_LENGTH, ExtractionError, extract_article, extraction_stats
+
+DEFAULT_FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures", "html")
+
+
+def legacy_bs4_text(html):
+    """The original scrape_webpage_bs4 clean-up, kept for comparison"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = ' '.join(chunk for chunk in chunks if chunk)
+    return text[:MAX_CONTENT_LENGTH]
+
+
+def timed(fn, runs):
+    result = fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML article extraction")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.html")))
+    if not paths:
+        print(f"No fixtures in {args.fixtures}; run benchmarks/make_html_fixtures.py first")
+        return
+
+    print(f"{'Page':<28} {'size':>8} {'bs4 ms':>8} {'chain ms':>9} {'speed-up':>9} {'read':>8} {'chars':>6}  extractor")
+    legacy_total = chain_total = 0.0
+    for path in paths:
+        with open(path, "rb") as file:
+            html = file.read()
+
+        _, legacy_ms = timed(lambda: legacy_bs4_text(html), args.runs)
+
+        def run_chain():
+            try:
+                return extract_article(path, html=html)
+            except ExtractionError:
+                return None
+        result, chain_ms = timed(run_chain, args.runs)
+
+        legacy_total += legacy_ms
+        chain_total += chain_ms
+        name = os.path.basename(path)
+        if result is None:
+            print(f"{name:<28} {len(html) / 1024:6.0f}KB {legacy_ms:8.2f} {chain_ms:9.2f} "
+                  f"{legacy_ms / chain_ms:8.1f}x {'-':>8} {0:>6}  (no article)")
+        else:
+            print(f"{name:<28} {len(html) / 1024:6.0f}KB {legacy_ms:8.2f} {chain_ms:9.2f} "
+                  f"{legacy_ms / chain_ms:8.1f}x {result['bytes_read'] / 1024:6.0f}KB "
+                  f"{len(result['text']):>6}  {result['extractor']}")
+
+    print(f"\nTotal: bs4 {legacy_total:.1f} ms, chain {chain_total:.1f} ms ({legacy_total / chain_total:.1f}x)")
+    print("\nExtractor        attempts  success  avg ms")
+    for name, stats in extraction_stats().items():
+        print(f"{name:<16} {stats['attempts']:>8} {stats['success_rate']:>8.0%} {stats['avg_ms']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
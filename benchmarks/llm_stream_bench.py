@@ -0,0 +1,85 @@
+"""
+Benchmark: perceived latency of a news analysis, blocking vs streaming
+
+Runs against the local mock in ``mock_servers/openai_server.py`` so no API
+key or network is needed. For the blocking call the user sees nothing until
+the full response has been generated; with streaming the first summary
+bullet can be rendered after a few tokens.
+
+Usage:
+    python benchmarks/llm_stream_bench.py [--runs 5] [--first-token-ms 400] [--token-ms 25]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add parent directory to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+LEAD = ("Apple is expanding iPhone production in India for US-bound models as it moves "
+        "manufacturing away from China ahead of new tariffs.")
+
+
+def make_article(rng, vocabulary, sentences=20):
+    """A distinct article per call, so neither cache nor near-duplicate index can answer it"""
+    body = " ".join(" ".join(rng.choice(vocabulary) for _ in range(rng.randint(10, 20))).capitalize() + "."
+                    for _ in range(sentences))
+    return f"{LEAD} {body}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark blocking vs streaming news analysis")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-token-ms", type=float, default=400)
+    parser.add_argument("--token-ms", type=float, default=25)
+    args = parser.parse_args()
+
+    from mock_servers.openai_server import start_server
+    server = start_server(0, args.first_token_ms, args.token_ms)
+
+    # Throwaway analysis cache and duplicate index and no in-memory cache, so
+    # every run calls the model and nothing leaks into the real data/ files
+    scratch = tempfile.mkdtemp(prefix="stockie-bench-")
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OpenAI_key", "mock-key")
+    os.environ["STOCKIE_ANALYSIS_CACHE"] = os.path.join(scratch, "analysis_cache.sqlite")
+    os.environ["STOCKIE_NEWS_DEDUP"] = os.path.join(scratch, "news_dedup.sqlite")
+
+    from openAI_news import stream_analysis, summarize_and_assess_industries
+    from utils.cache import configure_cache
+    configure_cache(enabled=False)
+
+    rng = random.Random(3)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(3000)]
+
+    blocking, first_bullet, streaming_total = [], [], []
+    for run in range(args.runs):
+        start = time.perf_counter()
+        summarize_and_assess_industries(make_article(rng, vocabulary))
+        blocking.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        first = None
+        for partial in stream_analysis(make_article(rng, vocabulary)):
+            if first is None and partial.get("summary"):
+                first = time.perf_counter() - start
+        first_bullet.append(first)
+        streaming_total.append(time.perf_counter() - start)
+
+    median_ms = lambda values: statistics.median(values) * 1000
+    print(f"Blocking: result visible after          {median_ms(blocking):8.1f} ms")
+    print(f"Streaming: first summary bullet after   {median_ms(first_bullet):8.1f} ms")
+    print(f"Streaming: complete analysis after      {median_ms(streaming_total):8.1f} ms")
+    print(f"\nPerceived latency reduced {statistics.median(blocking) / statistics.median(first_bullet):.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Generate the synthetic news pages in ``benchmarks/fixtures/html``
+
+The pages mimic the structure of real news sites: large inline scripts and
+styles in the head, navigation, an article body, related-link sidebars,
+comments and a footer. Each layout exercises a different path of the
+extractor chain in ``news_extract``. Real pages saved from a browser can be
+dropped into the same directory and are picked up by the benchmark.
+
+Usage:
+    python benchmarks/make_html_fixtures.py
+"""
+
+import os
+import random
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+
+WORDS = ("market shares investors company quarter revenue growth supply chain tariffs production "
+         "analysts expect demand prices semiconductor factory india china exports earnings guidance "
+         "consumer retail energy oil rates federal reserve inflation outlook billion percent rose fell "
+         "according statement executives plans expansion capacity workers costs margins").split()
+
+
+def sentence(rng, n=None):
+    words = [rng.choice(WORDS) for _ in range(n or rng.randint(12, 28))]
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng):
+    return " ".join(sentence(rng) for _ in range(rng.randint(3, 6)))
+
+
+def head(rng, script_kb):
+    script = "var cfg = {};\n" + "".join(
+        f"window.__data{i} = {{id: {i}, tag: '{rng.choice(WORDS)}', n: {rng.random():.6f}}};\n"
+        for i in range(script_kb * 1024 // 60)
+    )
+    style = "".join(f".c{i} {{ margin: {i % 9}px; color: #{i % 4096:03x}; }}\n" for i in range(400))
+    return (f"<head><meta charset='utf-8'><title>{sentence(rng, 8)}</title>"
+            f"<style>{style}</style><script>{script}</script></head>")
+
+
+def chrome_top(rng):
+    links = "".join(f"<li><a href='/s/{w}'>{w.title()}</a></li>" for w in rng.sample(WORDS, 12))
+    return (f"<header><div class='logo'>Daily Markets</div><nav><ul>{links}</ul></nav>"
+            f"<p>Subscribe for unlimited access to breaking market news and analysis today.</p></header>")
+
+
+def chrome_bottom(rng):
+    related = "".join(f"<li><a href='/r/{i}'>{sentence(rng, 10)}</a></li>" for i in range(8))
+    comments = "".join(f"<div class='comment'><p>{sentence(rng)}</p></div>" for _ in range(6))
+    return (f"<aside><h3>Related stories</h3><ul>{related}</ul></aside>"
+            f"<section class='comments'>{comments}</section>"
+            f"<footer><p>© 2024 Daily Markets. All rights reserved. Terms of use and privacy policy apply.</p></footer>")
+
+
+def article_page(rng, paragraphs=14, script_kb=120):
+    body = "".join(f"<p>{paragraph(rng)}</p>" for _ in range(paragraphs))
+    return (f"<!DOCTYPE html><html>{head(rng, script_kb)}<body>{chrome_top(rng)}"
+            f"<main><article><h1>{sentence(rng, 10)}</h1><div class='byline'>By Staff</div>{body}</article></main>"
+            f"{chrome_bottom(rng)}<script>{'trackEvent(1);' * 2000}</script></body></html>")
+
+
+def div_text_page(rng):
+    """Article text in <div>/<br> only, so the paragraph extractor finds nothing"""
+    body = "<br><br>".join(paragraph(rng) for _ in range(10))
+    return (f"<!DOCTYPE html><html>{head(rng, 40)}<body>{chrome_top(rng)}"
+            f"<div id='story'><div class='headline'>{sentence(rng, 10)}</div><div class='text'>{body}</div></div>"
+            f"{chrome_bottom(rng)}</body></html>")
+
+
+def short_page(rng):
+    """Paywall teaser: too little text for any extractor"""
+    return (f"<!DOCTYPE html><html>{head(rng, 20)}<body>{chrome_top(rng)}"
+            f"<article><h1>{sentence(rng, 10)}</h1><p>{sentence(rng)}</p>"
+            f"<div class='paywall'>Subscribe to continue reading</div></article></body></html>")
+
+
+LAYOUTS = {
+    "article_standard.html": lambda rng: article_page(rng, script_kb=80),
+    "article_long.html": lambda rng: article_page(rng, paragraphs=60, script_kb=60),
+    "article_script_heavy.html": lambda rng: article_page(rng, paragraphs=10, script_kb=250),
+    "article_div_text.html": div_text_page,
+    "paywall_teaser.html": short_page,
+}
+
+
+def main():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, build in LAYOUTS.items():
+        html = build(random.Random(name))
+        with open(os.path.join(FIXTURE_DIR, name), "w", encoding="utf-8") as file:
+            file.write(html)
+        print(f"📝 {name}: {len(html.encode('utf-8')) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
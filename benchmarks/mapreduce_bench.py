@@ -0,0 +1,84 @@
+"""
+Benchmark: analysis latency vs article length, single prompt vs map-reduce
+
+Runs against ``mock_servers/openai_server.py`` with a prompt-processing
+delay per 1,000 prompt tokens, so one huge prompt gets slower with length
+the way a real model does. The map-reduce path should stay close to one
+chunk call plus the reduce call at every length.
+
+Usage:
+    python benchmarks/mapreduce_bench.py [--prefill-ms-per-1k 150] [--token-ms 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add parent directory to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+LENGTHS = [8000, 25000, 50000, 100000]
+
+WORDS = ("company shares market supply tariffs production revenue analysts growth prices demand "
+         "factory exports investors quarter outlook costs energy rates consumers").split()
+
+
+def make_vocabulary(rng, size=3000):
+    # A small vocabulary makes every random article a near-duplicate of the others
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return WORDS + ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+
+def make_article(chars, rng, vocabulary):
+    sentences = []
+    while sum(len(s) + 1 for s in sentences) < chars:
+        sentences.append(" ".join(rng.choice(vocabulary) for _ in range(rng.randint(10, 25))).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark map-reduce analysis of long articles")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=5)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=150)
+    args = parser.parse_args()
+
+    from mock_servers.openai_server import start_server
+    server = start_server(0, args.first_token_ms, args.token_ms, args.prefill_ms_per_1k)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OpenAI_key", "mock-key")
+    # Throwaway analysis cache and duplicate index: every length must reach the model
+    scratch = tempfile.mkdtemp(prefix="stockie-bench-")
+    os.environ["STOCKIE_ANALYSIS_CACHE"] = os.path.join(scratch, "analysis_cache.sqlite")
+    os.environ["STOCKIE_NEWS_DEDUP"] = os.path.join(scratch, "news_dedup.sqlite")
+
+    from openAI_news import _complete_json, build_analysis_prompt, summarize_and_assess_industries
+    from news_mapreduce import count_tokens, needs_map_reduce, plan_chunks
+    from utils.cache import configure_cache
+    configure_cache(enabled=False)
+
+    rng = random.Random(7)
+    vocabulary = make_vocabulary(rng)
+    print(f"{'chars':>8} {'tokens':>7} {'chunks':>6} {'single ms':>10} {'map-reduce ms':>14}")
+    for chars in LENGTHS:
+        article = make_article(chars, rng, vocabulary)
+
+        start = time.perf_counter()
+        _complete_json(build_analysis_prompt(article))
+        single_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        summarize_and_assess_industries(article)
+        analysis_ms = (time.perf_counter() - start) * 1000
+
+        chunks = len(plan_chunks(article)) if needs_map_reduce(article) else 1
+        print(f"{chars:>8} {count_tokens(article):>7} {chunks:>6} {single_ms:>10.0f} {analysis_ms:>14.0f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: Alpha Vantage TIME_SERIES_DAILY payload -> DataFrame
+
+Compares the previous ``DataFrame.from_dict`` path (string columns, then a
+sort) with the typed parser in ``import_stock.time_series_to_frame``. The
+payload is rebuilt from a bundled ``*_daily.csv`` file so no API call is
+needed.
+
+Usage:
+    python benchmarks/parse_bench.py [--csv amd_daily.csv] [--runs 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from import_stock import time_series_to_frame
+
+
+def load_payload(csv_path):
+    """Rebuild a TIME_SERIES_DAILY JSON payload from a saved CSV"""
+    from mock_servers.alpha_vantage_server import load_csv_series
+    return {"Meta Data": {}, "Time Series (Daily)": load_csv_series(csv_path)}
+
+
+def legacy_time_series_to_frame(data, symbol):
+    """The original from_dict implementation, kept for comparison"""
+    time_series = data.get("Time Series (Daily)", {})
+    if not time_series:
+        raise ValueError(f"No data found for symbol: {symbol}")
+    df = pd.DataFrame.from_dict(time_series, orient="index")
+    df.reset_index(inplace=True)
+    df.rename(columns={"index": "date"}, inplace=True)
+    df['date'] = pd.to_datetime(df['date'])
+    df.sort_values('date', ascending=False, inplace=True)
+    return df
+
+
+def bench(label, fn, payload, runs):
+    fn(payload, "BENCH")  # warm up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        df = fn(payload, "BENCH")
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    memory_kb = df.memory_usage(deep=True).sum() / 1024
+    print(f"{label:<22} median {timings[len(timings) // 2] * 1000:8.2f} ms   "
+          f"min {timings[0] * 1000:8.2f} ms   frame {memory_kb:9.1f} KiB")
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Alpha Vantage payload parsing")
+    parser.add_argument("--csv", default=os.path.join(ROOT, "amd_daily.csv"))
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = load_payload(args.csv)
+    print(f"Payload: {len(payload['Time Series (Daily)'])} daily bars from {os.path.basename(args.csv)}\n")
+
+    legacy = bench("from_dict (legacy)", legacy_time_series_to_frame, payload, args.runs)
+    typed = bench("typed float64", time_series_to_frame, payload, args.runs)
+    bench("typed float32", lambda d, s: time_series_to_frame(d, s, np.float32), payload, args.runs)
+    print(f"\nSpeed-up (float64): {legacy / typed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
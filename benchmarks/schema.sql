@@ -0,0 +1,21 @@
+-- Minimal schema for running benchmarks/run_suite.py against a local Postgres
+-- (BENCH_DB_URL). Mirrors the columns the app reads and writes in Supabase.
+CREATE TABLE IF NOT EXISTS "Company_ticker_all" (
+    cik BIGINT NOT NULL,
+    name TEXT,
+    ticker TEXT NOT NULL,
+    exchange TEXT
+);
+
+CREATE TABLE IF NOT EXISTS stock_data (
+    ticker TEXT NOT NULL,
+    date DATE NOT NULL,
+    exchange TEXT,
+    name TEXT,
+    open NUMERIC,
+    high NUMERIC,
+    low NUMERIC,
+    close NUMERIC,
+    volume BIGINT,
+    PRIMARY KEY (ticker, date)
+);
@@ -0,0 +1,112 @@
+"""
+Benchmark: cold import time of the app modules and time-to-first-render of
+each Streamlit page
+
+Every measurement runs in a fresh interpreter so nothing is already in
+``sys.modules``. Pages are rendered headless with ``streamlit.testing``;
+the time covers interpreter start, imports and one full script run.
+
+Usage:
+    python benchmarks/startup_bench.py [--runs 5] [--placeholder-env]
+
+``--placeholder-env`` fills missing credentials with dummy values so pages
+get past their environment check; calls that need a real backend then fail
+fast and are shown as errors by the page, as they would be in production.
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "supabase_connect",
+    "get_ticker",
+    "openAI_news",
+    "import_stock",
+    "stock_queries",
+    "update_stock_table",
+]
+
+ENV_VARS = ["supabaseURL", "supabaseKey", "supabaseServiceKey", "ALPHA_VANTAGE_API_KEY", "OpenAI_key",
+            "SUPABASE_DB_URL", "SUPABASE_DB_URL1"]
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+RENDER_SNIPPET = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({page!r}, default_timeout=60).run()
+elapsed = time.perf_counter() - start
+print(elapsed, len(app.exception), len(app.error))
+"""
+
+
+def run_snippet(code, env):
+    """Run ``code`` in a fresh interpreter and return its last stdout line"""
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return result.stdout.strip().splitlines()[-1]
+
+
+def bench_imports(runs, env):
+    print(f"{'Module':<22} {'median':>10} {'min':>10}")
+    for module in MODULES:
+        try:
+            timings = [float(run_snippet(IMPORT_SNIPPET.format(root=ROOT, module=module), env)) for _ in range(runs)]
+        except RuntimeError as e:
+            print(f"{module:<22} failed: {e}")
+            continue
+        print(f"{module:<22} {statistics.median(timings) * 1000:8.1f} ms {min(timings) * 1000:8.1f} ms")
+
+
+def bench_pages(runs, env):
+    print(f"\n{'Page':<22} {'median':>10} {'min':>10}   notes")
+    for page in sorted(glob.glob(os.path.join(ROOT, "pages", "*.py"))):
+        name = os.path.basename(page)
+        timings, notes = [], ""
+        try:
+            for _ in range(runs):
+                elapsed, exceptions, errors = run_snippet(RENDER_SNIPPET.format(page=page), env).split()
+                timings.append(float(elapsed))
+            if int(exceptions) or int(errors):
+                notes = f"{exceptions} exception(s), {errors} error message(s)"
+        except RuntimeError as e:
+            print(f"{name:<22} failed: {e}")
+            continue
+        print(f"{name:<22} {statistics.median(timings) * 1000:8.1f} ms {min(timings) * 1000:8.1f} ms   {notes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold imports and page time-to-first-render")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--placeholder-env", action="store_true",
+                        help="Set missing credentials to dummy values")
+    parser.add_argument("--skip-pages", action="store_true")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.placeholder_env:
+        for var in ENV_VARS:
+            env.setdefault(var, "placeholder")
+
+    bench_imports(args.runs, env)
+    if not args.skip_pages:
+        bench_pages(args.runs, env)
+
+
+if __name__ == "__main__":
+    main()
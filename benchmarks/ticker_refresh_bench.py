@@ -0,0 +1,85 @@
+"""
+Benchmark: daily refresh of the company ticker master list
+
+Simulates yesterday's table by perturbing today's
+``company_tickers_exchange.json`` (a few renamed, listed and delisted
+companies), then compares the old path (``json.load`` into a DataFrame, a
+full rewrite of every row) with the stream parse and row diff in
+``refresh_ticker_master``. Only Python-side work is timed; the row counts
+show how much the database would have to write.
+
+Usage:
+    python benchmarks/ticker_refresh_bench.py [--changes 20] [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add parent directory to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from refresh_ticker_master import JSON_PATH, collect_rows, diff_rows, iter_ticker_records, read_file_chunks, row_hash
+
+
+def legacy_load(path):
+    """The create_ticker_file path: whole document in memory, then a DataFrame"""
+    import pandas as pd
+    with open(path, "r") as file:
+        data = json.load(file)
+    return pd.DataFrame(data.get('data', []), columns=data.get('fields', []))
+
+
+def yesterday_hashes(rows, changes, rng):
+    """Table state a day earlier: some rows renamed, some not yet listed, some since delisted"""
+    current = {key: row_hash(row[1], row[3]) for key, row in rows.items()}
+    keys = rng.sample(list(current), changes * 2)
+    for key in keys[:changes]:
+        current[key] = row_hash(rows[key][1] + " OLD NAME", rows[key][3])
+    for key in keys[changes:]:
+        del current[key]
+    for i in range(changes // 2):
+        current[(9000000 + i, f"GONE{i}")] = row_hash("Delisted Corp", "NYSE")
+    return current
+
+
+def timed(fn, runs):
+    result = fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ticker master refresh")
+    parser.add_argument("--file", default=JSON_PATH)
+    parser.add_argument("--changes", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    frame, legacy_ms = timed(lambda: legacy_load(args.file), args.runs)
+    rows = collect_rows(iter_ticker_records(read_file_chunks(args.file)))
+    current = yesterday_hashes(rows, args.changes, random.Random(3))
+
+    def refresh():
+        return diff_rows(current, collect_rows(iter_ticker_records(read_file_chunks(args.file))))
+    diff, refresh_ms = timed(refresh, args.runs)
+    written = len(diff['insert']) + len(diff['update']) + len(diff['delete'])
+
+    print(f"{'Path':<28} {'ms':>8} {'rows written':>13}")
+    print(f"{'json.load + DataFrame':<28} {legacy_ms:8.1f} {len(frame):>13}")
+    print(f"{'stream parse + diff':<28} {refresh_ms:8.1f} {written:>13}")
+    print(f"\nDiff: {len(diff['insert'])} new, {len(diff['update'])} changed, "
+          f"{len(diff['delete'])} delisted, {diff['unchanged']} unchanged")
+
+
+if __name__ == "__main__":
+    main()
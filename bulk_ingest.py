@@ -0,0 +1,277 @@
+"""
+Bulk ingestion of daily prices for a universe of tickers.
+
+Fetch, parse and database writes are pipelined across bounded worker pools:
+fetch workers call Alpha Vantage (paced by the shared rate limiter in the
+batch lane) and parse the response, and as each ticker completes its rows
+are handed to a smaller pool of DB writers, which append them to the local
+price store once the database has them. A summary of rows/sec, per-stage
+latency and failures is printed at the end.
+
+Usage:
+    python bulk_ingest.py --symbols AAPL MSFT NVDA
+    python bulk_ingest.py --tickers-file tickers.txt
+    python bulk_ingest.py --exchange Nasdaq --limit 500
+    python bulk_ingest.py --exchange NYSE --incremental
+    python bulk_ingest.py --exchange Nasdaq --metrics-port 9108
+"""
+
+import argparse
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from import_stock import request_daily_series, time_series_to_frame, save_stock_data
+from indicators import refresh_indicator_state
+from price_store import get_price_store
+from update_stock_table import prepare_stock_frame, copy_stock_frame, plan_refresh
+from utils.metrics import serve_metrics
+from utils.rate_limiter import get_rate_limiter, PRIORITY_BATCH
+
+TICKER_CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "company_tickers_exchange.csv")
+
+
+class IngestStats:
+    """Thread-safe collector for per-stage timings, row counts and failures"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}
+        self.failures = []
+        self.rows_inserted = 0
+        self.tickers_done = 0
+        self.started = time.perf_counter()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.timings.setdefault(stage, []).append(seconds)
+
+    def fail(self, ticker, stage, error):
+        with self._lock:
+            self.failures.append((ticker, stage, str(error)))
+
+    def done(self, rows):
+        with self._lock:
+            self.rows_inserted += rows
+            self.tickers_done += 1
+
+    def report(self):
+        """Print a summary of the run"""
+        elapsed = time.perf_counter() - self.started
+        print("\n📊 Ingestion summary")
+        print(f"   Tickers loaded: {self.tickers_done}")
+        print(f"   Rows inserted:  {self.rows_inserted}")
+        print(f"   Wall time:      {elapsed:.1f}s")
+        print(f"   Throughput:     {self.rows_inserted / elapsed if elapsed else 0:.1f} rows/sec")
+
+        print("\n⏱️ Stage latency (ms)")
+        print(f"   {'stage':<8} {'count':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}")
+        for stage, values in self.timings.items():
+            ordered = sorted(values)
+            ms = [v * 1000 for v in ordered]
+            p50 = ms[len(ms) // 2]
+            p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+            print(f"   {stage:<8} {len(ms):>6} {sum(ms) / len(ms):>9.1f} {p50:>9.1f} {p95:>9.1f} {ms[-1]:>9.1f}")
+
+        if self.failures:
+            print(f"\n❌ Failures ({len(self.failures)})")
+            for ticker, stage, error in self.failures:
+                print(f"   {ticker} [{stage}]: {error}")
+
+
+def load_company_lookup(csv_file_path=TICKER_CSV_PATH):
+    """
+    Map ticker -> {ticker, name, exchange} from company_tickers_exchange.csv
+
+    Args:
+        csv_file_path (str): Path to the ticker master CSV
+
+    Returns:
+        dict: Company details keyed by upper-case ticker
+    """
+    with open(csv_file_path, newline='') as file:
+        return {
+            row['ticker'].upper(): {'ticker': row['ticker'].upper(), 'name': row['name'], 'exchange': row['exchange']}
+            for row in csv.DictReader(file)
+            if row['ticker']
+        }
+
+
+def load_universe(symbols=None, tickers_file=None, exchange=None, limit=None):
+    """
+    Resolve the tickers to ingest
+
+    Args:
+        symbols (list, optional): Explicit tickers, e.g. a watchlist
+        tickers_file (str, optional): File with one ticker per line
+        exchange (str, optional): Take every ticker listed on this exchange
+        limit (int, optional): Cap on the number of tickers
+
+    Returns:
+        tuple: (companies, unknown) where companies is a list of dicts and
+        unknown lists tickers missing from the master file
+    """
+    lookup = load_company_lookup()
+
+    wanted = list(symbols or [])
+    if tickers_file:
+        with open(tickers_file) as file:
+            wanted.extend(line.strip() for line in file if line.strip() and not line.startswith("#"))
+    if exchange:
+        wanted.extend(t for t, c in lookup.items() if (c['exchange'] or "").lower() == exchange.lower())
+
+    companies, unknown, seen = [], [], set()
+    for ticker in (t.upper() for t in wanted):
+        if ticker in seen:
+            continue
+        seen.add(ticker)
+        if ticker in lookup:
+            companies.append(lookup[ticker])
+        else:
+            unknown.append(ticker)
+    if limit:
+        companies = companies[:limit]
+    return companies, unknown
+
+
+def _fetch_and_parse(company, output_size, stats, archive_csv=False):
+    ticker = company['ticker']
+    output_size = company.get('output_size', output_size)
+    start = time.perf_counter()
+    try:
+        data = request_daily_series(ticker, output_size, PRIORITY_BATCH)
+    except Exception as e:
+        stats.fail(ticker, "fetch", e)
+        return None
+    stats.record("fetch", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    try:
+        df = time_series_to_frame(data, ticker)
+        frame = prepare_stock_frame(df, ticker, company['name'], company['exchange'])
+    except Exception as e:
+        stats.fail(ticker, "parse", e)
+        return None
+    stats.record("parse", time.perf_counter() - start)
+
+    if archive_csv:
+        save_stock_data(ticker, df)
+    return df, frame
+
+
+def _write(company, df, frame, stats):
+    ticker = company['ticker']
+    start = time.perf_counter()
+    try:
+        inserted = copy_stock_frame(frame)
+    except Exception as e:
+        stats.fail(ticker, "write", e)
+        return
+    stats.record("write", time.perf_counter() - start)
+    stats.done(inserted)
+    print(f"✅ {ticker}: {inserted} new rows")
+
+    # Only after the database has the rows, so the local store and the
+    # indicator state never run ahead of what --incremental plans from
+    start = time.perf_counter()
+    try:
+        get_price_store().append(ticker, df)
+        refresh_indicator_state(ticker)
+    except Exception as e:
+        stats.fail(ticker, "store", e)
+    else:
+        stats.record("store", time.perf_counter() - start)
+
+
+def ingest(companies, output_size="compact", fetch_workers=4, write_workers=2, archive_csv=False):
+    """
+    Fetch and load daily prices for ``companies`` through a worker pipeline
+
+    Args:
+        companies (list): Dicts with ``ticker``, ``name`` and ``exchange``;
+            an ``output_size`` key overrides the default per ticker
+        output_size (str): 'compact' or 'full'
+        fetch_workers (int): Concurrent Alpha Vantage requests
+        write_workers (int): Concurrent database writers
+        archive_csv (bool): Also write ``<ticker>_daily.csv`` for each ticker
+
+    Returns:
+        IngestStats: Timings, row counts and failures for the run
+    """
+    stats = IngestStats()
+    with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="fetch") as fetch_pool, \
+            ThreadPoolExecutor(max_workers=write_workers, thread_name_prefix="write") as write_pool:
+        fetches = {fetch_pool.submit(_fetch_and_parse, c, output_size, stats, archive_csv): c for c in companies}
+        writes = []
+        for future in as_completed(fetches):
+            parsed = future.result()
+            if parsed is not None:
+                writes.append(write_pool.submit(_write, fetches[future], *parsed, stats))
+        for future in writes:
+            future.result()
+    return stats
+
+
+def apply_refresh_plan(companies, now=None):
+    """
+    Attach the incremental output size to each company and drop current ones
+
+    Args:
+        companies (list): Dicts with ``ticker``, ``name`` and ``exchange``
+        now (datetime, optional): Aware datetime used to find the last session
+
+    Returns:
+        tuple: (companies to fetch, number skipped as up to date)
+    """
+    plan = plan_refresh([c['ticker'] for c in companies], now)
+    pending = [dict(c, output_size=plan[c['ticker']]) for c in companies if plan[c['ticker']]]
+    return pending, len(companies) - len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load daily prices into stock_data")
+    parser.add_argument("--symbols", nargs="+", help="Explicit tickers (e.g. a watchlist)")
+    parser.add_argument("--tickers-file", help="File with one ticker per line")
+    parser.add_argument("--exchange", help="Ingest every ticker on this exchange (e.g. Nasdaq, NYSE)")
+    parser.add_argument("--limit", type=int, help="Maximum number of tickers")
+    parser.add_argument("--output-size", choices=["compact", "full"], default="compact")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip up-to-date tickers and pick compact/full per ticker from the stored history")
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--write-workers", type=int, default=2)
+    parser.add_argument("--archive-csv", action="store_true", help="Also write <ticker>_daily.csv files")
+    parser.add_argument("--calls-per-minute", type=int, help="Alpha Vantage tier limit (5, 75, 300 or 600), shared by every process")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while running")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Interface for --metrics-port (default: local only)")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port, args.metrics_host)
+        print(f"📈 Metrics on http://{args.metrics_host}:{args.metrics_port}/metrics")
+
+    if args.calls_per_minute:
+        get_rate_limiter().set_rate(args.calls_per_minute)
+
+    if not (args.symbols or args.tickers_file or args.exchange):
+        parser.error("provide --symbols, --tickers-file or --exchange")
+
+    companies, unknown = load_universe(args.symbols, args.tickers_file, args.exchange, args.limit)
+    for ticker in unknown:
+        print(f"⚠️ Skipping unknown ticker: {ticker}")
+
+    if args.incremental:
+        companies, skipped = apply_refresh_plan(companies)
+        full = sum(1 for c in companies if c['output_size'] == "full")
+        print(f"📅 {skipped} tickers up to date, {len(companies) - full} compact, {full} full")
+        print(f"🚀 Ingesting {len(companies)} tickers (incremental)")
+    else:
+        print(f"🚀 Ingesting {len(companies)} tickers ({args.output_size})")
+
+    stats = ingest(companies, args.output_size, args.fetch_workers, args.write_workers, args.archive_csv)
+    stats.report()
+
+
+if __name__ == "__main__":
+    main()
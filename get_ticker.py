@@ -1,18 +1,16 @@
-from supabase_connect import supabase, supabase_admin, supabase_anon
-from import_stock import fetch_stock_data, save_stock_data
-import os
-from difflib import SequenceMatcher
-
-print("SUPABASE_URL:", os.getenv("supabaseURL"))
-print("ANON_KEY starts with:", os.getenv("supabaseKey")[:10])
+from supabase_connect import get_supabase_anon
+from ticker_index import get_index
+from utils.cache import cached_data
+from utils.metrics import timed
 
+@timed()
 def get_ticker(company_name):
     ticker = []
     search_name = "%" + company_name + "%"
     print(f"🔍 Searching for company: {company_name}")
     
     try:
-        value = supabase_anon.table("Company_ticker_all").select("*").eq("name", company_name).execute()
+        value = get_supabase_anon().table("Company_ticker_all").select("*").eq("name", company_name).execute()
         
         if not value.data:
             print(f"❌ No company found with exact name: {company_name}")
@@ -33,25 +31,22 @@ def get_ticker(company_name):
 
 
 
-def similarity(a, b):
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
-   
+@cached_data("ticker_search")
+def _search_index(company_name, n, index_loaded_at):
+    return get_index().search(company_name, n)
+
+@timed()
+def search_companies(company_name, n=5):
+    """Top ``n`` index matches, cached until the index is rebuilt"""
+    return _search_index(company_name, n, get_index().loaded_at)
 
+@timed()
 def get_ticker_fuzzy(company_name):
     ticker = []
     n=5
-    search_name = "%" + company_name + "%"
-     # Fuzzy search using case-insensitive partial match
-    value = supabase_anon.table("Company_ticker_all").select("*").ilike("name", search_name).execute()
-
-    # Sort results by string similarity
-    sorted_matches = sorted(
-            value.data,
-            key=lambda row: similarity(company_name, row["name"]),
-            reverse=True)
-    
+    # Fuzzy search against the in-memory ticker index (name, ticker and CIK)
     # change the value of n to get the number of top matches
-    top_matches = sorted_matches[:n]
+    top_matches = search_companies(company_name, n)
 
     for row in top_matches:
         ticker.append([row['cik'], row['ticker'], row['exchange'], row['name']])
@@ -61,34 +56,21 @@ def get_ticker_fuzzy(company_name):
 
 
 
+@timed()
 def get_ticker_fuzzy_streamlit(company_name):
     """
     Fuzzy search for company tickers
-    Returns top 5 matches based on similarity
+    Returns top 5 matches from the in-memory ticker index
     """
     if len(company_name) < 3:
         return []
     
     ticker = []
     n = 5
-    search_name = "%" + company_name + "%"
     
     try:
-        # Fuzzy search using case-insensitive partial match
-        value = supabase_anon.table("Company_ticker_all").select("*").ilike("name", search_name).execute()
-        
-        if not value.data:
-            return []
-        
-        # Sort results by string similarity
-        sorted_matches = sorted(
-            value.data,
-            key=lambda row: similarity(company_name, row["name"]),
-            reverse=True
-        )
-        
-        # Get top n matches
-        top_matches = sorted_matches[:n]
+        # Get top n matches by name, ticker or CIK
+        top_matches = search_companies(company_name, n)
         
         for row in top_matches:
             ticker.append({
@@ -1,60 +1,155 @@
+import re
 import requests
+import numpy as np
 import pandas as pd
 import os
 from dotenv import load_dotenv
+from utils.rate_limiter import get_rate_limiter, PRIORITY_INTERACTIVE
+from av_cache import get_response_cache
+from utils.metrics import increment, span, timed
+
+# Retries after a throttle response ("Note"/"Information" instead of data)
+MAX_THROTTLE_RETRIES = 3
+
+# Set ALPHA_VANTAGE_BASE_URL to use another endpoint, e.g. the offline mock
+# in mock_servers/alpha_vantage_server.py
+DEFAULT_BASE_URL = "https://www.alphavantage.co"
+
+# Throttle messages worth retrying (per-minute/per-second limits). Daily quota
+# and premium-only messages also arrive as "Note"/"Information" but will not
+# clear by waiting, so they fail immediately.
+_RETRYABLE_THROTTLE = re.compile(r"per minute|per second|spreading out|call frequency", re.IGNORECASE)
+_PREMIUM = re.compile(r"premium (feature|endpoint)", re.IGNORECASE)
+_DAILY_QUOTA = re.compile(r"per day|daily", re.IGNORECASE)
+
+# Alpha Vantage field names and their normalized column names
+PRICE_FIELDS = ("1. open", "2. high", "3. low", "4. close")
+PRICE_COLUMNS = ("open", "high", "low", "close")
+VOLUME_FIELD = "5. volume"
 
 # Load environment variables from .env file
 load_dotenv()
 
-def fetch_stock_data(symbol, output_size='compact'):
+@timed()
+def fetch_stock_data(symbol, output_size='compact', priority=PRIORITY_INTERACTIVE):
     """
     Fetch daily stock data for a given symbol from Alpha Vantage API
     
     Args:
         symbol (str): Stock symbol (e.g., 'IBM', 'AAPL', 'MSFT')
         output_size (str): 'compact' for last 100 data points, 'full' for full history
+        priority (int): Rate limiter lane, PRIORITY_INTERACTIVE or PRIORITY_BATCH
     
     Returns:
         pandas.DataFrame: DataFrame with daily stock data
     """
+    data = request_daily_series(symbol, output_size, priority)
+    return time_series_to_frame(data, symbol)
+
+def request_daily_series(symbol, output_size='compact', priority=PRIORITY_INTERACTIVE):
+    """
+    Call the Alpha Vantage TIME_SERIES_DAILY endpoint
+    
+    Fresh responses are served from the on-disk response cache. Otherwise
+    every call waits for a token from the shared rate limiter, and throttle
+    responses pause the limiter with exponential backoff and are retried.
+    
+    Args:
+        symbol (str): Stock symbol
+        output_size (str): 'compact' or 'full'
+        priority (int): Rate limiter lane, PRIORITY_INTERACTIVE or PRIORITY_BATCH
+    
+    Returns:
+        dict: Decoded JSON response
+    """
     # Get API key from environment variable
     api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
     
     if not api_key:
         raise ValueError("API key not found. Please set ALPHA_VANTAGE_API_KEY in your .env file")
     
-    url = f'https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol={symbol}&apikey={api_key}&outputsize={output_size}'
-    r = requests.get(url)
-    data = r.json()
+    cache = get_response_cache()
+    cached = cache.get("TIME_SERIES_DAILY", symbol, output_size)
+    if cached is not None:
+        increment("alpha_vantage_requests", source="cache")
+        return cached
     
-    # Check for API errors
-    if 'Error Message' in data:
-        raise ValueError(f"API Error: {data['Error Message']}")
+    base_url = os.getenv('ALPHA_VANTAGE_BASE_URL') or DEFAULT_BASE_URL
+    url = f'{base_url.rstrip("/")}/query?function=TIME_SERIES_DAILY&symbol={symbol}&apikey={api_key}&outputsize={output_size}'
+    limiter = get_rate_limiter()
     
-    if 'Note' in data:
-        print(f"API Note: {data['Note']}")
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        limiter.acquire(priority)
+        with span("alpha_vantage_http"):
+            r = requests.get(url, timeout=30)
+            data = r.json()
+        increment("alpha_vantage_requests", source="api")
+        
+        # Check for API errors
+        if 'Error Message' in data:
+            raise ValueError(f"API Error: {data['Error Message']}")
+        
+        throttle = data.get('Note') or data.get('Information')
+        if throttle and "Time Series (Daily)" not in data:
+            if _PREMIUM.search(throttle):
+                raise ValueError(f"Alpha Vantage premium feature required (outputsize={output_size}): {throttle}")
+            if not _RETRYABLE_THROTTLE.search(throttle):
+                if _DAILY_QUOTA.search(throttle):
+                    raise ValueError(f"Alpha Vantage daily request quota exhausted: {throttle}")
+                raise ValueError(f"API refused the request: {throttle}")
+            if attempt == MAX_THROTTLE_RETRIES:
+                raise ValueError(f"API throttled: {throttle}")
+            delay = min(60.0, limiter.interval * 2 ** attempt)
+            print(f"API Note: {throttle} (retrying in {delay:.0f}s)")
+            limiter.backoff(delay)
+            continue
+        
+        cache.put("TIME_SERIES_DAILY", symbol, output_size, data)
+        return data
+
+@timed("parse_time_series")
+def time_series_to_frame(data, symbol, price_dtype=np.float64):
+    """
+    Convert a TIME_SERIES_DAILY response into a typed DataFrame
+    
+    The columns are built directly as numpy arrays: datetime64 dates, float
+    prices and int64 volume, with the "1. open" style names normalized to
+    open/high/low/close/volume.
     
+    Args:
+        data (dict): Decoded JSON response
+        symbol (str): Stock symbol, used in error messages
+        price_dtype: numpy dtype for prices (np.float64 or np.float32)
+    
+    Returns:
+        pandas.DataFrame: DataFrame with daily stock data, newest first
+    """
     # Extract the daily time series
     time_series = data.get("Time Series (Daily)", {})
     
     if not time_series:
         raise ValueError(f"No data found for symbol: {symbol}")
     
-    # Convert to DataFrame
-    df = pd.DataFrame.from_dict(time_series, orient="index")
-    
-    # Make the date a column instead of the index
-    df.reset_index(inplace=True)
-    df.rename(columns={"index": "date"}, inplace=True)
-    
-    # Convert date column to datetime
-    df['date'] = pd.to_datetime(df['date'])
+    n = len(time_series)
+    bars = time_series.values()
+    dates = np.array(list(time_series), dtype="datetime64[D]")
+    prices = np.array(
+        [bar[field] for bar in bars for field in PRICE_FIELDS], dtype=np.float64
+    ).reshape(n, len(PRICE_FIELDS)).astype(price_dtype, copy=False)
+    volume = np.fromiter((int(bar[VOLUME_FIELD]) for bar in bars), dtype=np.int64, count=n)
     
-    # Sort by date (newest first)
-    df.sort_values('date', ascending=False, inplace=True)
+    # Alpha Vantage returns newest first; only sort if it did not
+    if n > 1 and not (dates[:-1] >= dates[1:]).all():
+        order = np.argsort(dates, kind="stable")[::-1]
+        dates, prices, volume = dates[order], prices[order], volume[order]
     
-    return df
+    columns = {'date': dates.astype("datetime64[ns]")}
+    columns.update((column, prices[:, i]) for i, column in enumerate(PRICE_COLUMNS))
+    columns['volume'] = volume
+    increment("rows_parsed", n)
+    return pd.DataFrame(columns)
 
+@timed()
 def save_stock_data(symbol, df, filename=None):
     """
     Save stock data to CSV file
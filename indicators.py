@@ -0,0 +1,418 @@
+"""
+Technical indicators over OHLCV data.
+
+The functions below are fully vectorized and accept either a Series (one
+ticker) or a wide DataFrame with one column per ticker (a batch), so a
+whole watchlist is computed in one call.
+
+``IndicatorState`` holds the running state of every indicator for one
+ticker. It is seeded once from history and then advanced one bar at a time
+in O(1), which is what the ingestion path uses when a new day is appended
+to the local price store. The Dashboard reads the saved states for its
+table of latest daily values.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from price_store import get_price_store
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.getenv("STOCKIE_INDICATOR_STATE", os.path.join(ROOT_DIR, "data", "indicators"))
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def sma(close, window=20):
+    """Simple moving average"""
+    return close.rolling(window).mean()
+
+
+def ema(close, span=20):
+    """Exponential moving average (recursive form, ``adjust=False``)"""
+    return close.ewm(span=span, adjust=False).mean()
+
+
+def rsi(close, period=14):
+    """Relative Strength Index with Wilder smoothing"""
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """
+    Moving Average Convergence Divergence
+
+    Returns:
+        tuple: (macd line, signal line, histogram)
+    """
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = line.ewm(span=signal, adjust=False).mean()
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close, window=20, num_std=2.0):
+    """
+    Bollinger Bands (population standard deviation)
+
+    Returns:
+        tuple: (middle, upper, lower)
+    """
+    middle = close.rolling(window).mean()
+    std = close.rolling(window).std(ddof=0)
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def true_range(high, low, close):
+    """True range; the first bar falls back to high - low"""
+    prev_close = close.shift(1)
+    ranges = [high - low, (high - prev_close).abs(), (low - prev_close).abs()]
+    if isinstance(close, pd.DataFrame):
+        return pd.concat(ranges).groupby(level=0).max()
+    return pd.concat(ranges, axis=1).max(axis=1)
+
+
+def atr(high, low, close, period=14):
+    """Average True Range with Wilder smoothing"""
+    return true_range(high, low, close).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+
+
+def volatility(close, window=20, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """Annualized rolling standard deviation of log returns"""
+    return np.log(close / close.shift(1)).rolling(window).std() * math.sqrt(periods_per_year)
+
+
+def compute_indicators(df):
+    """
+    Every indicator for one ticker
+
+    Args:
+        df (pandas.DataFrame): Bars with high/low/close in ascending date order
+
+    Returns:
+        pandas.DataFrame: One column per indicator, aligned with ``df``
+    """
+    close = df['close']
+    macd_line, signal_line, histogram = macd(close)
+    middle, upper, lower = bollinger(close)
+    return pd.DataFrame({
+        'sma_20': sma(close, 20),
+        'ema_20': ema(close, 20),
+        'rsi_14': rsi(close),
+        'macd': macd_line,
+        'macd_signal': signal_line,
+        'macd_hist': histogram,
+        'bb_middle': middle,
+        'bb_upper': upper,
+        'bb_lower': lower,
+        'atr_14': atr(df['high'], df['low'], close),
+        'volatility_20': volatility(close),
+    }, index=df.index)
+
+
+# Dashboard column for each indicator value
+DISPLAY_COLUMNS = {
+    'close': 'Close',
+    'sma_20': 'SMA 20',
+    'ema_20': 'EMA 20',
+    'rsi_14': 'RSI 14',
+    'macd': 'MACD',
+    'macd_signal': 'MACD Signal',
+    'bb_upper': 'BB Upper',
+    'bb_lower': 'BB Lower',
+    'atr_14': 'ATR 14',
+    'volatility_20': 'Volatility 20',
+}
+
+
+def latest_indicators(history):
+    """
+    Latest value of each indicator for a batch of tickers
+
+    Args:
+        history (pandas.DataFrame): Long frame with ticker/date/high/low/close
+            of daily bars; weekly or monthly bars give different indicators
+
+    Returns:
+        pandas.DataFrame: One row per ticker, one column per indicator
+    """
+    wide = history.pivot_table(index='date', columns='ticker', values=['high', 'low', 'close']).sort_index()
+    close, high, low = wide['close'], wide['high'], wide['low']
+    macd_line, signal_line, _ = macd(close)
+    middle, upper, lower = bollinger(close)
+    columns = {
+        'close': close,
+        'sma_20': sma(close, 20),
+        'ema_20': ema(close, 20),
+        'rsi_14': rsi(close),
+        'macd': macd_line,
+        'macd_signal': signal_line,
+        'bb_upper': upper,
+        'bb_lower': lower,
+        'atr_14': atr(high, low, close),
+        'volatility_20': volatility(close),
+    }
+    # Take each ticker's last available value (tickers may end on different dates)
+    latest = pd.DataFrame({DISPLAY_COLUMNS[name]: frame.ffill().iloc[-1] for name, frame in columns.items()})
+    latest.insert(0, 'As of', pd.to_datetime(close.apply(pd.Series.last_valid_index)).dt.date)
+    latest.index.name = 'Stock'
+    return latest.round(2).reset_index()
+
+
+class _RollingWindow:
+    """Fixed-size window with running sum and sum of squares"""
+
+    def __init__(self, size, values=(), total=None, total_sq=None):
+        self.values = deque(values, maxlen=size)
+        self.total = sum(self.values) if total is None else total
+        self.total_sq = sum(v * v for v in self.values) if total_sq is None else total_sq
+
+    def push(self, value):
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+    @property
+    def full(self):
+        return len(self.values) == self.values.maxlen
+
+    def mean(self):
+        return self.total / len(self.values)
+
+    def variance(self, ddof=0):
+        n = len(self.values)
+        return max(self.total_sq - self.total * self.total / n, 0.0) / (n - ddof)
+
+
+class IndicatorState:
+    """
+    Running state of every indicator for one ticker
+
+    Uses the same parameters as ``compute_indicators`` and the same
+    recursions, so ``update`` continues a series exactly where the
+    vectorized computation left off.
+    """
+
+    WINDOW = 20
+    PERIOD = 14
+    FAST, SLOW, SIGNAL = 12, 26, 9
+
+    def __init__(self):
+        self.last_date = None
+        self.bars = 0
+        self.prev_close = None
+        self.ema_20 = None
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_signal = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.atr = None
+        self.closes = _RollingWindow(self.WINDOW)
+        self.log_returns = _RollingWindow(self.WINDOW)
+
+    @staticmethod
+    def _ema_step(previous, value, alpha):
+        return value if previous is None else alpha * value + (1 - alpha) * previous
+
+    def update(self, date, high, low, close):
+        """
+        Advance every indicator by one bar in O(1)
+
+        Args:
+            date: Bar date (must be after ``last_date``)
+            high (float): Bar high
+            low (float): Bar low
+            close (float): Bar close
+
+        Returns:
+            dict: Latest indicator values
+        """
+        date = pd.Timestamp(date)
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Bar {date.date()} is not after {self.last_date.date()}")
+
+        ema_alpha = lambda span: 2 / (span + 1)
+        wilder = 1 / self.PERIOD
+
+        self.ema_20 = self._ema_step(self.ema_20, close, ema_alpha(self.WINDOW))
+        self.ema_fast = self._ema_step(self.ema_fast, close, ema_alpha(self.FAST))
+        self.ema_slow = self._ema_step(self.ema_slow, close, ema_alpha(self.SLOW))
+        self.macd_signal = self._ema_step(self.macd_signal, self.ema_fast - self.ema_slow, ema_alpha(self.SIGNAL))
+
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+            change = close - self.prev_close
+            self.avg_gain = self._ema_step(self.avg_gain, max(change, 0.0), wilder)
+            self.avg_loss = self._ema_step(self.avg_loss, max(-change, 0.0), wilder)
+            self.log_returns.push(math.log(close / self.prev_close))
+        self.atr = self._ema_step(self.atr, tr, wilder)
+
+        self.closes.push(close)
+        self.prev_close = close
+        self.last_date = date
+        self.bars += 1
+        return self.values()
+
+    def values(self):
+        """Return the current indicator values (None until warmed up)"""
+        macd_line = self.ema_fast - self.ema_slow if self.ema_fast is not None else None
+        middle = std = None
+        if self.closes.full:
+            middle = self.closes.mean()
+            std = math.sqrt(self.closes.variance())
+        rsi_value = None
+        if self.bars > self.PERIOD and self.avg_loss is not None:
+            rsi_value = 100.0 if self.avg_loss == 0 else 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        return {
+            'sma_20': middle,
+            'ema_20': self.ema_20,
+            'rsi_14': rsi_value,
+            'macd': macd_line,
+            'macd_signal': self.macd_signal,
+            'macd_hist': macd_line - self.macd_signal if macd_line is not None else None,
+            'bb_middle': middle,
+            'bb_upper': middle + 2 * std if middle is not None else None,
+            'bb_lower': middle - 2 * std if middle is not None else None,
+            'atr_14': self.atr if self.bars >= self.PERIOD else None,
+            'volatility_20': (math.sqrt(self.log_returns.variance(ddof=1)) * math.sqrt(TRADING_DAYS_PER_YEAR)
+                              if self.log_returns.full else None),
+        }
+
+    @classmethod
+    def from_history(cls, df):
+        """
+        Seed the state from a full history
+
+        Args:
+            df (pandas.DataFrame): Bars with date/high/low/close, any order
+
+        Returns:
+            IndicatorState: State positioned after the last bar
+        """
+        state = cls()
+        df = df.sort_values('date')
+        for row in df[['date', 'high', 'low', 'close']].itertuples(index=False):
+            state.update(row.date, float(row.high), float(row.low), float(row.close))
+        return state
+
+    def to_dict(self):
+        data = {k: v for k, v in self.__dict__.items() if k not in ('closes', 'log_returns', 'last_date')}
+        data['last_date'] = self.last_date.isoformat() if self.last_date is not None else None
+        for name in ('closes', 'log_returns'):
+            window = getattr(self, name)
+            data[name] = {'values': list(window.values), 'total': window.total, 'total_sq': window.total_sq}
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        for key, value in data.items():
+            if key not in ('closes', 'log_returns', 'last_date'):
+                setattr(state, key, value)
+        state.last_date = pd.Timestamp(data['last_date']) if data['last_date'] else None
+        state.closes = _RollingWindow(cls.WINDOW, **data['closes'])
+        state.log_returns = _RollingWindow(cls.WINDOW, **data['log_returns'])
+        return state
+
+
+def _state_path(ticker):
+    return os.path.join(STATE_DIR, f"{ticker.upper()}.json")
+
+
+def load_indicator_state(ticker):
+    """Return the saved state for ``ticker`` or None"""
+    try:
+        with open(_state_path(ticker)) as file:
+            return IndicatorState.from_dict(json.load(file))
+    except FileNotFoundError:
+        return None
+
+
+def _refreshed_state(ticker, store):
+    """Load the saved state of ``ticker``, catch it up with the store and save it if it changed"""
+    state = load_indicator_state(ticker)
+    if state is not None and store.rows_through(ticker, state.last_date) != state.bars:
+        state = None
+    if state is None:
+        history = store.read(ticker, ['high', 'low', 'close'])
+        if history.empty:
+            return None
+        state = IndicatorState.from_history(history)
+    else:
+        start = state.last_date + pd.Timedelta(days=1)
+        bars = store.read(ticker, ['high', 'low', 'close'], start=start)
+        if bars.empty:
+            return state
+        for row in bars.itertuples(index=False):
+            state.update(row.date, float(row.high), float(row.low), float(row.close))
+
+    os.makedirs(STATE_DIR, exist_ok=True)
+    # The pages and the import processes may save the same ticker at once
+    tmp_path = f"{_state_path(ticker)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(state.to_dict(), file)
+    os.replace(tmp_path, _state_path(ticker))
+    return state
+
+
+def refresh_indicator_state(ticker, store=None):
+    """
+    Bring the saved indicator state up to date with the local price store
+
+    The first call seeds the state from the full stored history. Later calls
+    read only the bars appended since the state's last date and apply each
+    in O(1). If older bars were merged into the store since (a backfill),
+    the state is seeded again.
+
+    Args:
+        ticker (str): Stock symbol
+        store (PriceStore, optional): Defaults to the shared store
+
+    Returns:
+        dict: Latest indicator values, or None if nothing is stored
+    """
+    state = _refreshed_state(ticker, store or get_price_store())
+    return state.values() if state is not None else None
+
+
+def stored_indicators(tickers, store=None):
+    """
+    Latest daily indicator values from the saved per-ticker states
+
+    Each state is first caught up with the local price store, which applies
+    only the bars added since it was saved.
+
+    Args:
+        tickers (list): Stock symbols
+        store (PriceStore, optional): Defaults to the shared store
+
+    Returns:
+        pandas.DataFrame: One row per ticker with stored bars: ``Stock``,
+        ``As of`` and one column per indicator, like ``latest_indicators``
+    """
+    store = store or get_price_store()
+    rows = []
+    for ticker in tickers:
+        state = _refreshed_state(ticker.upper(), store)
+        if state is None:
+            continue
+        values = dict(state.values(), close=state.prev_close)
+        row = {'Stock': ticker.upper(), 'As of': state.last_date.date()}
+        row.update((DISPLAY_COLUMNS[name], values[name]) for name in DISPLAY_COLUMNS)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=['Stock', 'As of', *DISPLAY_COLUMNS.values()]).round(2)
@@ -0,0 +1,435 @@
+"""
+Background import jobs for the Streamlit pages.
+
+Importing a ticker (API call, parse, local price store, database insert)
+takes seconds to minutes, most of it waiting on the Alpha Vantage rate
+limit, so the pages submit an import job instead of running it in the
+script thread. Jobs are rows in a SQLite file and a small pool of worker
+threads works through them, recording the current stage and progress that
+the page polls.
+
+A ticker has at most one queued and one running job: importing it again,
+from the same or another session, returns the job already under way. The
+exception is a full-history request while a smaller import of the ticker is
+running, which queues a full import to run after it. Workers lease the
+jobs they run, so after a crash unfinished jobs are picked up again once
+their lease expires; jobs of a worker process that has exited on this host
+are requeued at once when workers start.
+
+Usage:
+    python job_queue.py                  # show recent jobs
+    python job_queue.py --work           # run a worker pool until interrupted
+    python job_queue.py --submit AAPL    # queue an import
+    python job_queue.py --clear          # remove finished jobs
+"""
+
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from import_stock import request_daily_series, time_series_to_frame
+from indicators import refresh_indicator_state
+from price_store import get_price_store
+from update_stock_table import copy_stock_frame, plan_refresh, prepare_stock_frame
+from utils.cache import cached_resource
+from utils.metrics import increment, timed
+from utils.rate_limiter import PRIORITY_INTERACTIVE
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+QUEUE_PATH = os.getenv("STOCKIE_JOB_QUEUE", os.path.join(ROOT_DIR, "data", "jobs.sqlite"))
+WORKERS = int(os.getenv("STOCKIE_IMPORT_WORKERS", "2"))
+
+ACTIVE = ("queued", "running")
+# A running job whose worker died is handed out again after this long
+LEASE_SECONDS = 15 * 60
+# Finished jobs are kept this long for the status display
+KEEP_SECONDS = 7 * 86400
+# Idle workers look for new jobs this often (submissions also wake them)
+POLL_SECONDS = 2
+# Longest pause of a worker after the queue file could not be read or written
+ERROR_BACKOFF_SECONDS = 60
+
+# Progress reported when each stage starts
+STAGES = {
+    'plan': 0.05,
+    'fetch': 0.1,
+    'parse': 0.6,
+    'write': 0.7,
+    'store': 0.9,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    name TEXT,
+    exchange TEXT,
+    output_size TEXT,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    rows INTEGER,
+    message TEXT,
+    requests INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_until REAL NOT NULL DEFAULT 0,
+    worker TEXT
+);
+DROP INDEX IF EXISTS jobs_active_ticker;
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_queued_ticker ON jobs (ticker) WHERE status = 'queued';
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_running_ticker ON jobs (ticker) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+_COLUMNS = ("id", "ticker", "name", "exchange", "output_size", "status", "stage", "progress", "rows",
+            "message", "requests", "created_at", "started_at", "finished_at")
+
+
+class JobQueue:
+    """Persisted import jobs with a per-process pool of worker threads"""
+
+    def __init__(self, path=QUEUE_PATH, workers=WORKERS):
+        self.path = path
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        # Recorded on claimed jobs, so a restart can tell whose process died
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "worker" not in columns:
+            # Queue files created before claims recorded their worker
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN worker TEXT")
+
+    def _row(self, row):
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def submit(self, ticker, name=None, exchange=None, output_size=None, now=None):
+        """
+        Queue an import of ``ticker`` unless one is already queued or running
+
+        A queued job absorbs the request (widened to 'full' if asked). A
+        running job absorbs it too, unless this asks for 'full' and the
+        running job is not: then a full import is queued behind it, so the
+        backfill is not lost to an "already up to date" result.
+
+        Args:
+            ticker (str): Stock symbol
+            name (str, optional): Company name stored with the rows
+            exchange (str, optional): Listing exchange stored with the rows
+            output_size (str, optional): 'compact' or 'full'; by default the
+                worker picks it from the stored history (``plan_refresh``)
+            now (float, optional): Unix time of the submission
+
+        Returns:
+            int: Id of the new job or of the one already under way
+        """
+        now = now or time.time()
+        ticker = ticker.upper()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                active = {status: (job_id, size) for job_id, size, status in self._conn.execute(
+                    "SELECT id, output_size, status FROM jobs WHERE ticker = ? AND status IN (?, ?)",
+                    (ticker,) + ACTIVE,
+                )}
+                row = None
+                if 'queued' in active:
+                    row = active['queued'] + ('queued',)
+                elif 'running' in active and (output_size != "full" or active['running'][1] == "full"):
+                    row = active['running'] + ('running',)
+                if row is None:
+                    job_id = self._conn.execute(
+                        "INSERT INTO jobs (ticker, name, exchange, output_size, status, created_at) "
+                        "VALUES (?, ?, ?, ?, 'queued', ?)",
+                        (ticker, name, exchange, output_size, now),
+                    ).lastrowid
+                    self._conn.execute(
+                        "DELETE FROM jobs WHERE status NOT IN (?, ?) AND finished_at < ?",
+                        ACTIVE + (now - KEEP_SECONDS,),
+                    )
+                else:
+                    job_id, queued_size, status = row
+                    # A queued compact import is widened if someone asks for the full history
+                    upgrade = status == "queued" and output_size == "full" and queued_size != "full"
+                    self._conn.execute(
+                        "UPDATE jobs SET requests = requests + 1, output_size = CASE WHEN ? THEN 'full' "
+                        "ELSE output_size END WHERE id = ?",
+                        (upgrade, job_id),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        increment("import_jobs", outcome="submitted" if row is None else "coalesced")
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        """Return a job as a dict, or None"""
+        with self._lock:
+            return self._row(self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone())
+
+    def jobs(self, job_ids=None, limit=50):
+        """Return the given jobs, or the most recent ones, newest first"""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM jobs"
+        params = ()
+        if job_ids is not None:
+            job_ids = list(job_ids)
+            if not job_ids:
+                return []
+            query += f" WHERE id IN ({', '.join('?' * len(job_ids))})"
+            params = tuple(job_ids)
+        query += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            return [self._row(row) for row in self._conn.execute(query, params + (limit,)).fetchall()]
+
+    def claim(self, now=None):
+        """
+        Lease the oldest queued job whose ticker has nothing running, or a
+        running one whose lease expired
+
+        Returns:
+            dict: The claimed job, or None if there is nothing to do
+        """
+        now = now or time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    # A queued job waits while another job of its ticker is running
+                    "SELECT id FROM jobs WHERE (status = 'queued' AND ticker NOT IN "
+                    "(SELECT ticker FROM jobs WHERE status = 'running')) "
+                    "OR (status = 'running' AND lease_until <= ?) ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', stage = NULL, progress = 0, started_at = ?, "
+                        "lease_until = ?, worker = ? WHERE id = ?",
+                        (now, now + LEASE_SECONDS, self.worker_id, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row[0]) if row else None
+
+    def update(self, job_id, stage, progress=None, message=None):
+        """Record the stage a running job has reached and renew its lease"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ?, message = ?, lease_until = ? WHERE id = ?",
+                (stage, STAGES.get(stage, 0) if progress is None else progress, message,
+                 time.time() + LEASE_SECONDS, job_id),
+            )
+
+    def finish(self, job_id, rows=None, error=None, message=None):
+        """Mark a job done (``rows`` inserted) or failed (``error``)"""
+        status = "failed" if error is not None else "done"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END, "
+                "rows = ?, message = ?, finished_at = ?, lease_until = 0 WHERE id = ?",
+                (status, status, rows, str(error)[:500] if error is not None else message, time.time(), job_id),
+            )
+        increment("import_jobs", outcome=status)
+
+    def stats(self):
+        """Count jobs per status"""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+
+    def clear(self):
+        """Remove every finished job"""
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE status NOT IN (?, ?)", ACTIVE)
+
+    def recover(self):
+        """
+        Requeue running jobs whose worker process on this host has exited
+
+        Without this a job interrupted by an app restart would show as
+        running until its lease expired. A job whose ticker already has a
+        queued follow-up keeps its status and only loses its lease, so the
+        next claim picks it up.
+
+        Returns:
+            int: Number of jobs handed back
+        """
+        host = socket.gethostname()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                dead = []
+                for job_id, worker in self._conn.execute(
+                    "SELECT id, worker FROM jobs WHERE status = 'running' AND lease_until > 0"
+                ).fetchall():
+                    worker_host, _, pid = (worker or "").rpartition(":")
+                    if worker_host == host and pid.isdigit() and not _process_alive(int(pid)):
+                        dead.append(job_id)
+                for job_id in dead:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = CASE WHEN EXISTS (SELECT 1 FROM jobs AS q "
+                        "WHERE q.ticker = jobs.ticker AND q.status = 'queued') THEN 'running' ELSE 'queued' END, "
+                        "stage = NULL, progress = 0, lease_until = 0, worker = NULL WHERE id = ?",
+                        (job_id,),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(dead)
+
+    def start(self):
+        """Requeue the jobs of dead workers and start the worker threads once per process; returns self"""
+        with self._lock:
+            starting = not self._threads
+        if starting and self.workers:
+            recovered = self.recover()
+            if recovered:
+                print(f"♻️ Requeued {recovered} import jobs of a stopped worker")
+        with self._lock:
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f"import-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+        return self
+
+    def _work(self):
+        errors = 0
+        while True:
+            try:
+                job = self.claim()
+                if job is None:
+                    self._wake.wait(POLL_SECONDS)
+                    self._wake.clear()
+                    continue
+                try:
+                    rows, message = run_import(job, self.update)
+                except Exception as e:
+                    print(f"❌ Import of {job['ticker']} failed: {e}")
+                    self.finish(job['id'], error=e)
+                else:
+                    self.finish(job['id'], rows, message=message)
+                errors = 0
+            except Exception as e:
+                # Queue file locked or unwritable: keep the worker alive and try
+                # again; an unfinished job is handed out again when its lease expires
+                errors += 1
+                delay = min(ERROR_BACKOFF_SECONDS, POLL_SECONDS * 2 ** (errors - 1))
+                print(f"❌ Import worker error, retrying in {delay}s: {e}")
+                time.sleep(delay)
+
+
+def _process_alive(pid):
+    """Return True if a process with ``pid`` exists on this host"""
+    if os.name == "nt":
+        # os.kill would terminate it; leave such jobs to the lease
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by another user
+        return True
+    return True
+
+
+@timed()
+def run_import(job, update):
+    """
+    Import one ticker, reporting each stage through ``update(job_id, stage)``
+
+    Returns:
+        tuple: (rows inserted, message)
+    """
+    job_id, ticker = job['id'], job['ticker']
+    output_size = job['output_size']
+    if output_size is None:
+        update(job_id, "plan")
+        output_size = plan_refresh([ticker])[ticker]
+        if output_size is None:
+            return 0, "Already up to date"
+
+    update(job_id, "fetch", message=f"Waiting for Alpha Vantage ({output_size})")
+    data = request_daily_series(ticker, output_size, PRIORITY_INTERACTIVE)
+
+    update(job_id, "parse")
+    df = time_series_to_frame(data, ticker)
+    frame = prepare_stock_frame(df, ticker, job['name'], job['exchange'])
+
+    update(job_id, "write", message=f"Inserting {len(frame)} rows")
+    rows = copy_stock_frame(frame)
+
+    # Only once the database has the rows, so the local store never runs ahead of it
+    update(job_id, "store")
+    try:
+        get_price_store().append(ticker, df)
+        refresh_indicator_state(ticker)
+    except Exception as e:
+        # The local store is a read cache; the database insert still counts
+        print(f"⚠️ Price store update failed for {ticker}: {e}")
+    return rows, f"Inserted {rows} new rows ({output_size})"
+
+
+@cached_resource
+def get_job_queue():
+    """Return the process-wide job queue with its workers running"""
+    return JobQueue().start()
+
+
+def submit_import(ticker, name=None, exchange=None, output_size=None):
+    """Queue an import of ``ticker`` in the background and return the job id"""
+    return get_job_queue().submit(ticker, name, exchange, output_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Background import jobs")
+    parser.add_argument("--work", action="store_true", help="Run a worker pool until interrupted")
+    parser.add_argument("--submit", nargs="+", metavar="TICKER", help="Queue imports")
+    parser.add_argument("--output-size", choices=["compact", "full"], help="Default: from the stored history")
+    parser.add_argument("--clear", action="store_true", help="Remove finished jobs")
+    args = parser.parse_args()
+
+    queue = JobQueue()
+    if args.clear:
+        queue.clear()
+        print("🧹 Removed finished jobs")
+    for ticker in args.submit or ():
+        print(f"📥 {ticker.upper()}: job {queue.submit(ticker, output_size=args.output_size)}")
+    if args.work:
+        queue.start()
+        print(f"👷 {queue.workers} import workers on {queue.path} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("👋 Workers stopped; unfinished jobs resume when their lease expires")
+        return
+
+    stats = queue.stats()
+    print(f"📋 {stats['queued']} queued, {stats['running']} running, {stats['done']} done, {stats['failed']} failed")
+    for job in queue.jobs(limit=20):
+        detail = job['message'] or job['stage'] or ""
+        print(f"   #{job['id']:<5} {job['ticker']:<8} {job['status']:<8} {job['progress']:>4.0%}  {detail}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Local mock API servers for offline testing and benchmarks
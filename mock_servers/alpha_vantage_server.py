@@ -0,0 +1,191 @@
+"""
+Local stand-in for the Alpha Vantage TIME_SERIES_DAILY API
+
+Answers ``GET /query?function=TIME_SERIES_DAILY&symbol=...`` by replaying
+the bundled ``<symbol>_daily.csv`` files as the JSON Alpha Vantage returns
+(newest first, ``compact`` = latest 100 bars). Symbols without a CSV get a
+deterministic synthetic random walk, so ingestion of many tickers can be
+benchmarked. A response delay and a throttle "Note" every N requests are
+configurable to exercise the retry path.
+
+Usage:
+    python mock_servers/alpha_vantage_server.py [--port 8766] [--latency-ms 0] [--throttle-every 0]
+
+Then point the app at it:
+    ALPHA_VANTAGE_BASE_URL=http://127.0.0.1:8766 streamlit run app.py
+"""
+
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPACT_POINTS = 100
+SYNTHETIC_DAYS = 1000
+
+THROTTLE_NOTE = ("Thank you for using Alpha Vantage! Please consider spreading out your free API requests "
+                 "more sparingly (1 request per second). (mock server throttle)")
+
+
+# Alpha Vantage field for each column of a saved CSV; older files use the
+# API's names, files written from a parsed frame use the plain ones
+CSV_FIELDS = {
+    "1. open": "1. open", "2. high": "2. high", "3. low": "3. low", "4. close": "4. close", "5. volume": "5. volume",
+    "open": "1. open", "high": "2. high", "low": "3. low", "close": "4. close", "volume": "5. volume",
+}
+
+
+def load_csv_series(csv_path):
+    """``Time Series (Daily)`` dict from a saved ``*_daily.csv``, newest first"""
+    with open(csv_path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    series = {
+        row['date'][:10]: {CSV_FIELDS[name]: value for name, value in row.items() if name in CSV_FIELDS}
+        for row in rows
+    }
+    return {day: series[day] for day in sorted(series, reverse=True)}
+
+
+def synthetic_series(symbol, days=SYNTHETIC_DAYS):
+    """Deterministic random-walk bars on weekdays ending yesterday, newest first"""
+    rng = random.Random(symbol)
+    price = rng.uniform(20, 400)
+    day = datetime.date.today() - datetime.timedelta(days=1)
+    series = {}
+    while len(series) < days:
+        if day.weekday() < 5:
+            open_ = price * (1 + rng.gauss(0, 0.005))
+            close = open_ * (1 + rng.gauss(0, 0.015))
+            series[day.isoformat()] = {
+                "1. open": f"{open_:.4f}",
+                "2. high": f"{max(open_, close) * (1 + abs(rng.gauss(0, 0.005))):.4f}",
+                "3. low": f"{min(open_, close) * (1 - abs(rng.gauss(0, 0.005))):.4f}",
+                "4. close": f"{close:.4f}",
+                "5. volume": str(rng.randint(100000, 50000000)),
+            }
+            price = open_
+        day -= datetime.timedelta(days=1)
+    return series
+
+
+class AlphaVantageHandler(BaseHTTPRequestHandler):
+    data_dir = ROOT_DIR
+    latency = 0.0
+    # Answer every Nth request with a throttle note instead of data (0 = never)
+    throttle_every = 0
+    requests = None
+    _series = None
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _daily_series(self, symbol):
+        with self._lock:
+            if symbol not in self._series:
+                csv_path = os.path.join(self.data_dir, f"{symbol.lower()}_daily.csv")
+                self._series[symbol] = (load_csv_series(csv_path) if os.path.exists(csv_path)
+                                        else synthetic_series(symbol))
+            return self._series[symbol]
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if self.latency:
+            time.sleep(self.latency)
+        if url.path != "/query":
+            self.send_error(404)
+            return
+        if not params.get("apikey"):
+            self._send_json({"Error Message": "the parameter apikey is invalid or missing."})
+            return
+        if params.get("function") != "TIME_SERIES_DAILY":
+            self._send_json({"Error Message": f"Invalid API call: {params.get('function')} is not mocked."})
+            return
+        symbol = params.get("symbol", "").upper()
+        if not symbol:
+            self._send_json({"Error Message": "Invalid API call. Please retry or visit the documentation."})
+            return
+        if self.throttle_every and next(self.requests) % self.throttle_every == 0:
+            self._send_json({"Note": THROTTLE_NOTE})
+            return
+
+        series = self._daily_series(symbol)
+        output_size = params.get("outputsize", "compact")
+        if output_size == "compact":
+            series = dict(itertools.islice(series.items(), COMPACT_POINTS))
+        self._send_json({
+            "Meta Data": {
+                "1. Information": "Daily Prices (open, high, low, close) and Volumes",
+                "2. Symbol": symbol,
+                "3. Last Refreshed": next(iter(series)),
+                "4. Output Size": "Compact" if output_size == "compact" else "Full size",
+                "5. Time Zone": "US/Eastern",
+            },
+            "Time Series (Daily)": series,
+        })
+
+
+def start_server(port=0, latency_ms=0, throttle_every=0, data_dir=ROOT_DIR):
+    """
+    Start the mock server on a background thread
+
+    Args:
+        port (int): Port to bind on 127.0.0.1 (0 picks a free one)
+        latency_ms (float): Delay before every response
+        throttle_every (int): Answer every Nth request with a throttle note (0 = never)
+        data_dir (str): Directory with the ``<symbol>_daily.csv`` files
+
+    Returns:
+        ThreadingHTTPServer: Running server; its base URL is
+        ``http://127.0.0.1:<server.server_port>``
+    """
+    handler = type("Handler", (AlphaVantageHandler,), {
+        'data_dir': data_dir,
+        'latency': latency_ms / 1000,
+        'throttle_every': throttle_every,
+        'requests': itertools.count(1),
+        '_series': {},
+        '_lock': threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Alpha Vantage TIME_SERIES_DAILY server")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--throttle-every", type=int, default=0)
+    parser.add_argument("--data-dir", default=ROOT_DIR)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency_ms, args.throttle_every, args.data_dir)
+    print(f"🧪 Mock Alpha Vantage API on http://127.0.0.1:{server.server_port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
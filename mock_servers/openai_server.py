@@ -0,0 +1,177 @@
+"""
+Local stand-in for the OpenAI chat completions API
+
+Answers ``POST /v1/chat/completions`` with a canned industry analysis,
+either as one JSON response or, with ``"stream": true``, as server-sent
+events split into small token-sized chunks. Delays before the first token
+and between tokens are configurable, so streaming and time-to-first-token
+can be tested and benchmarked offline.
+
+Usage:
+    python mock_servers/openai_server.py [--port 8765] [--first-token-ms 400] [--token-ms 25]
+                                         [--prefill-ms-per-1k 0]
+
+Then point the app at it:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run app.py
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+CANNED_ANALYSIS = {
+    "summary": [
+        "The company announced a significant expansion of its manufacturing footprint.",
+        "Production of new models will shift toward lower-cost regions over the next year.",
+        "Analysts expect the move to reduce exposure to tariffs and supply disruptions.",
+        "Suppliers in the region are increasing capacity to meet the new demand.",
+    ],
+    "positive_industries": ["Semiconductors", "Logistics & Freight", "Industrial Automation"],
+    "negative_industries": ["Domestic Contract Manufacturing", "Air Cargo"],
+}
+
+
+def _article_excerpt(messages):
+    """First words of the article in the prompt, echoed into the summary"""
+    content = messages[-1].get("content", "") if messages else ""
+    match = re.search(r'"""\s*(.+?)\s*"""', content, re.S)
+    words = (match.group(1) if match else content).split()[:12]
+    return " ".join(words)
+
+
+def build_content(messages):
+    analysis = json.loads(json.dumps(CANNED_ANALYSIS))
+    excerpt = _article_excerpt(messages)
+    if excerpt:
+        analysis["summary"][0] = f"Article: {excerpt}..."
+    return json.dumps(analysis, indent=2)
+
+
+def split_tokens(text):
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    first_token_delay = 0.4
+    token_delay = 0.025
+    # Extra time to first token per 1,000 prompt tokens (prompt processing)
+    prefill_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        model = request.get("model", "mock-model")
+        tokens = split_tokens(build_content(request.get("messages", [])))
+        prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // CHARS_PER_TOKEN
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        first_token_delay = self.first_token_delay + self.prefill_delay * prompt_tokens / 1000
+
+        if request.get("stream"):
+            self._stream(completion_id, model, tokens, usage, first_token_delay,
+                         (request.get("stream_options") or {}).get("include_usage", False))
+            return
+
+        time.sleep(first_token_delay + self.token_delay * len(tokens))
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                         "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id, model, tokens, usage, first_token_delay, include_usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def event(choices, **extra):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": choices, **extra}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        time.sleep(first_token_delay)
+        event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_delay)
+            event([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if include_usage:
+            event([], usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_server(port=0, first_token_ms=400, token_ms=25, prefill_ms_per_1k=0):
+    """
+    Start the mock server on a background thread
+
+    Args:
+        port (int): Port to bind on 127.0.0.1 (0 picks a free one)
+        first_token_ms (float): Delay before the first token
+        token_ms (float): Delay between tokens
+        prefill_ms_per_1k (float): Extra first-token delay per 1,000 prompt tokens
+
+    Returns:
+        ThreadingHTTPServer: Running server; its base URL is
+        ``http://127.0.0.1:<server.server_port>/v1``
+    """
+    handler = type("Handler", (ChatCompletionsHandler,), {
+        'first_token_delay': first_token_ms / 1000,
+        'token_delay': token_ms / 1000,
+        'prefill_delay': prefill_ms_per_1k / 1000,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-ms", type=float, default=400)
+    parser.add_argument("--token-ms", type=float, default=25)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=0)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.first_token_ms, args.token_ms, args.prefill_ms_per_1k)
+    print(f"🧪 Mock OpenAI API on http://127.0.0.1:{server.server_port}/v1 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
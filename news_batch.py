@@ -0,0 +1,165 @@
+"""
+Concurrent scrape-and-analyze pipeline for many news URLs
+
+Each URL is scraped and then analyzed. Scrapes and LLM calls run on a
+shared thread pool driven by asyncio, with separate semaphores so a burst
+of downloads cannot starve (or flood) the LLM. Every stage has its own
+timeout, and results are yielded in completion order, so the total time
+for a batch is close to the slowest single article rather than the sum.
+"""
+
+import argparse
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openAI_news import scrape_webpage, summarize_and_assess_industries
+
+DEFAULT_FETCH_CONCURRENCY = 8
+DEFAULT_LLM_CONCURRENCY = 4
+DEFAULT_FETCH_TIMEOUT = 20
+DEFAULT_LLM_TIMEOUT = 90
+
+# Anything the scrapers return when they found no article
+NO_CONTENT = (None, "", "no news found")
+
+URL_PATTERN = re.compile(r"https?://[^\s,;\"'<>]+")
+
+
+def parse_url_list(text):
+    """
+    Extract unique http(s) URLs from pasted text or an uploaded file
+
+    Accepts one URL per line, CSV rows or free text; order is preserved.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        list: URLs in first-seen order
+    """
+    seen = {}
+    for url in URL_PATTERN.findall(text):
+        seen.setdefault(url.rstrip(".)]"), None)
+    return list(seen)
+
+
+async def _analyze_one(url, loop, executor, fetch_sem, llm_sem, fetch_timeout, llm_timeout, scraper, analyzer):
+    result = {'url': url, 'status': 'ok', 'text': None, 'analysis': None, 'error': None,
+              'fetch_seconds': None, 'analyze_seconds': None}
+    stage = 'fetch'
+    try:
+        async with fetch_sem:
+            start = time.perf_counter()
+            text = await asyncio.wait_for(loop.run_in_executor(executor, scraper, url), fetch_timeout)
+            result['fetch_seconds'] = time.perf_counter() - start
+        if text in NO_CONTENT:
+            result.update(status='no_content', error="No article content found")
+            return result
+        result['text'] = text
+
+        stage = 'analyze'
+        async with llm_sem:
+            start = time.perf_counter()
+            analysis = await asyncio.wait_for(loop.run_in_executor(executor, analyzer, text, url), llm_timeout)
+            result['analyze_seconds'] = time.perf_counter() - start
+        if analysis is None:
+            result.update(status='failed', error="Analysis failed")
+        result['analysis'] = analysis
+    except asyncio.TimeoutError:
+        limit = fetch_timeout if stage == 'fetch' else llm_timeout
+        result.update(status='timeout', error=f"{stage} timed out after {limit}s")
+    except Exception as e:
+        result.update(status='failed', error=f"{stage}: {e}")
+    return result
+
+
+async def analyze_urls(urls, fetch_concurrency=DEFAULT_FETCH_CONCURRENCY, llm_concurrency=DEFAULT_LLM_CONCURRENCY,
+                       fetch_timeout=DEFAULT_FETCH_TIMEOUT, llm_timeout=DEFAULT_LLM_TIMEOUT,
+                       scraper=scrape_webpage, analyzer=summarize_and_assess_industries):
+    """
+    Scrape and analyze ``urls`` concurrently
+
+    Args:
+        urls (list): Article URLs
+        fetch_concurrency (int): Maximum simultaneous scrapes
+        llm_concurrency (int): Maximum simultaneous LLM calls
+        fetch_timeout (float): Seconds allowed per scrape
+        llm_timeout (float): Seconds allowed per analysis
+        scraper (callable): ``scraper(url) -> text``
+        analyzer (callable): ``analyzer(text, url) -> dict or None``
+
+    Yields:
+        dict: One result per URL (url, status, text, analysis, error,
+        fetch_seconds, analyze_seconds) as soon as it completes
+    """
+    if not urls:
+        return
+    loop = asyncio.get_running_loop()
+    fetch_sem = asyncio.Semaphore(fetch_concurrency)
+    llm_sem = asyncio.Semaphore(llm_concurrency)
+    # Threads for both stages, so neither limit is capped by the default executor
+    executor = ThreadPoolExecutor(max_workers=fetch_concurrency + llm_concurrency, thread_name_prefix="news-batch")
+    tasks = [asyncio.ensure_future(_analyze_one(url, loop, executor, fetch_sem, llm_sem,
+                                                fetch_timeout, llm_timeout, scraper, analyzer))
+             for url in urls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Threads still running past their timeout are not waited for
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_batch(urls, on_result=None, **limits):
+    """
+    Blocking wrapper around ``analyze_urls`` for scripts and Streamlit
+
+    Args:
+        urls (list): Article URLs
+        on_result (callable, optional): Called with each result as it completes
+        **limits: Passed to ``analyze_urls``
+
+    Returns:
+        list: Results in completion order
+    """
+    async def collect():
+        results = []
+        async for result in analyze_urls(urls, **limits):
+            results.append(result)
+            if on_result:
+                on_result(result)
+        return results
+
+    return asyncio.run(collect())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape and analyze many news articles concurrently")
+    parser.add_argument("urls", nargs="*", help="Article URLs")
+    parser.add_argument("--file", help="Text or CSV file containing URLs")
+    parser.add_argument("--fetch-concurrency", type=int, default=DEFAULT_FETCH_CONCURRENCY)
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_LLM_CONCURRENCY)
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file) as file:
+            urls += parse_url_list(file.read())
+    if not urls:
+        parser.error("no URLs given")
+
+    def report(result):
+        mark = "✅" if result['status'] == 'ok' else "❌"
+        print(f"{mark} {result['url']} ({result['status']}) {result['error'] or ''}")
+
+    start = time.perf_counter()
+    run_batch(urls, on_result=report, fetch_concurrency=args.fetch_concurrency, llm_concurrency=args.llm_concurrency)
+    print(f"\n⏱️ {len(urls)} articles in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
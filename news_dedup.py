@@ -0,0 +1,275 @@
+"""
+Near-duplicate detection for news articles.
+
+The same wire story is republished by many outlets with small edits, so
+the exact-text analysis cache misses it. Each analyzed article is reduced
+to a MinHash signature of its word 3-shingles; signatures are split into
+LSH bands stored in SQLite, so a new article is compared only with the
+few earlier articles that share a band. Candidates whose estimated Jaccard
+similarity reaches ``SIMILARITY_THRESHOLD`` and whose length is within
+``MIN_LENGTH_RATIO`` are near-duplicates and their stored analysis is
+reused. The length check keeps a longer article that merely contains an
+earlier one (and so has mostly unanalyzed text) from matching it.
+
+Usage:
+    python news_dedup.py          # show index statistics
+    python news_dedup.py --clear  # remove every indexed article
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from analysis_cache import normalize_text
+from utils.cache import cached_resource
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.getenv("STOCKIE_NEWS_DEDUP", os.path.join(ROOT_DIR, "data", "news_dedup.sqlite"))
+MAX_AGE_DAYS = int(os.getenv("STOCKIE_NEWS_DEDUP_DAYS", "7"))
+MAX_ARTICLES = 50000
+
+SHINGLE_WORDS = 3
+NUM_PERMUTATIONS = 128
+BANDS = 32  # 32 bands of 4 rows: pairs with Jaccard 0.6 become candidates ~98% of the time
+SIMILARITY_THRESHOLD = 0.6
+# Shingle count of the shorter article over the longer one
+MIN_LENGTH_RATIO = 0.8
+# Shorter texts share too little to judge (teasers, error pages)
+MIN_WORDS = 50
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    shingles INTEGER,
+    result TEXT NOT NULL,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    hash INTEGER NOT NULL,
+    article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, hash);
+CREATE INDEX IF NOT EXISTS bands_article ON bands (article_id);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _permutations():
+    # Fixed seed: signatures stored on disk must stay comparable across runs
+    rng = np.random.default_rng(20240601)
+    a = rng.integers(1, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+    b = rng.integers(0, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+    return a, b
+
+
+_PERM_A, _PERM_B = _permutations()
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Set of lower-cased word ``size``-grams of the normalized text"""
+    words = _WORD.findall(normalize_text(text).lower())
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _signature(text):
+    # (MinHash signature, number of shingles), or (None, 0) for short texts
+    if len(_WORD.findall(text)) < MIN_WORDS:
+        return None, 0
+    grams = shingles(text)
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in grams),
+        dtype=np.uint64,
+    )
+    # h(x) = (a * x + b) mod p for every permutation; a, x < 2**32 so no overflow
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0).astype(np.uint32), len(grams)
+
+
+def minhash(text):
+    """
+    MinHash signature of an article
+
+    Args:
+        text (str): Article text
+
+    Returns:
+        numpy.ndarray: ``NUM_PERMUTATIONS`` uint32 values, or None if the
+        text has fewer than ``MIN_WORDS`` words
+    """
+    return _signature(text)[0]
+
+
+def band_hashes(signature):
+    """One signed 64-bit hash per LSH band (SQLite integers are signed)"""
+    rows = NUM_PERMUTATIONS // BANDS
+    return [
+        int.from_bytes(hashlib.blake2b(signature[i * rows:(i + 1) * rows].tobytes(), digest_size=8).digest(),
+                       "little", signed=True)
+        for i in range(BANDS)
+    ]
+
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(signature_a == signature_b))
+
+
+class DuplicateIndex:
+    """SQLite LSH index of analyzed articles and their analyses"""
+
+    def __init__(self, path=INDEX_PATH, max_age_days=MAX_AGE_DAYS, max_articles=MAX_ARTICLES,
+                 threshold=SIMILARITY_THRESHOLD):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self.max_articles = max_articles
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(articles)")}
+        if "shingles" not in columns:
+            # Indexes created before the length check; their articles never match
+            self._conn.execute("ALTER TABLE articles ADD COLUMN shingles INTEGER")
+
+    def _bump(self, name, amount=1):
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def find(self, text, prompt_version, model, now=None):
+        """
+        Look up an earlier analysis of a near-duplicate of ``text``
+
+        Args:
+            text (str): Article text
+            prompt_version (str): Version of the prompt template
+            model (str): Model name
+
+        Returns:
+            dict: ``{'analysis', 'url', 'similarity', 'analyzed_at'}`` of the
+            most similar earlier article, or None
+        """
+        signature, size = _signature(text)
+        if signature is None:
+            return None
+        now = now or time.time()
+        bands = band_hashes(signature)
+        placeholders = " OR ".join(["(band = ? AND hash = ?)"] * BANDS)
+        params = [value for pair in enumerate(bands) for value in pair]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, url, signature, result, tokens, created_at FROM articles "
+                f"WHERE id IN (SELECT article_id FROM bands WHERE {placeholders}) "
+                "AND model = ? AND prompt_version = ? AND created_at >= ? AND shingles BETWEEN ? AND ?",
+                params + [model, prompt_version, now - self.max_age,
+                          size * MIN_LENGTH_RATIO, size / MIN_LENGTH_RATIO],
+            ).fetchall()
+            best = None
+            for row in rows:
+                score = similarity(signature, np.frombuffer(row[2], dtype=np.uint32))
+                if score >= self.threshold and (best is None or score > best[0]):
+                    best = (score, row)
+            if best is None:
+                self._bump('misses')
+                return None
+            self._bump('hits')
+            self._bump('tokens_saved', best[1][4])
+        score, (_, url, _, result, _, created_at) = best
+        return {'analysis': json.loads(result), 'url': url, 'similarity': score, 'analyzed_at': created_at}
+
+    def add(self, text, prompt_version, model, result, url=None, tokens=0, now=None):
+        """Index an analyzed article; texts under ``MIN_WORDS`` words are skipped"""
+        signature, size = _signature(text)
+        if signature is None:
+            return
+        now = now or time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                article_id = self._conn.execute(
+                    "INSERT INTO articles (url, model, prompt_version, signature, shingles, result, tokens, "
+                    "created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, model, prompt_version, signature.tobytes(), size,
+                     json.dumps(result, separators=(",", ":")), tokens or 0, now),
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO bands (band, hash, article_id) VALUES (?, ?, ?)",
+                    [(band, value, article_id) for band, value in enumerate(band_hashes(signature))],
+                )
+                self._evict(now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM articles WHERE created_at < ?", (now - self.max_age,))
+        self._conn.execute(
+            "DELETE FROM articles WHERE id <= (SELECT id FROM articles ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (self.max_articles,),
+        )
+
+    def stats(self):
+        """Return hit/miss counters, tokens saved and the number of indexed articles"""
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'tokens_saved': counters.get('tokens_saved', 0),
+            'entries': entries,
+        }
+
+    def clear(self):
+        """Remove every indexed article and reset the counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM articles")
+            self._conn.execute("DELETE FROM counters")
+
+
+@cached_resource
+def get_duplicate_index():
+    """Return the process-wide near-duplicate index"""
+    return DuplicateIndex()
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = get_duplicate_index()
+    if "--clear" in sys.argv:
+        index.clear()
+        print("🧹 Cleared near-duplicate index")
+    stats = index.stats()
+    print(f"📰 {stats['entries']} indexed articles")
+    print(f"♻️ {stats['hits']} near-duplicates / {stats['misses']} new ({stats['hit_rate']:.0%}), "
+          f"{stats['tokens_saved']} tokens saved")
@@ -0,0 +1,369 @@
+"""
+Article text extraction for the news pipeline.
+
+Pages are downloaded as a stream and capped at ``MAX_HTML_BYTES``. The
+cheapest extractor parses the stream incrementally (no DOM tree), keeps
+paragraph and heading text outside boilerplate such as navigation and
+footers, and stops reading the response as soon as it has
+``MAX_CONTENT_LENGTH`` characters. Costlier extractors run only when the
+previous one found no article:
+
+1. ``paragraphs``    - streaming paragraph text (stdlib HTMLParser)
+2. ``readability``   - readability-lxml on the capped page, if installed
+3. ``newspaper``     - newspaper3k, if installed (downloads the page itself)
+4. ``visible_text``  - every visible text node, as a last resort
+
+Timings and success counts per extractor are kept for the Settings page
+and the benchmark in ``benchmarks/extract_bench.py``.
+"""
+
+import codecs
+import itertools
+import re
+import threading
+import time
+from html.parser import HTMLParser
+
+import requests
+
+MAX_CONTENT_LENGTH = 10000
+MAX_HTML_BYTES = 2 * 1024 * 1024
+MIN_ARTICLE_CHARS = 300
+CHUNK_BYTES = 64 * 1024
+FETCH_TIMEOUT = 10
+# Where a <meta charset> is looked for when the server sends no charset
+CHARSET_SNIFF_BYTES = 4096
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
+}
+
+# Content inside these tags is never article text
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'button', 'select', 'option', 'head'}
+# Page furniture that may contain paragraphs which are not part of the article
+BOILERPLATE_TAGS = {'nav', 'header', 'footer', 'aside', 'form', 'menu', 'figcaption'}
+TEXT_TAGS = {'p', 'h1', 'h2', 'h3', 'h4', 'li', 'blockquote', 'pre'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+# class/id values of comment threads, related links, share bars and ads
+BOILERPLATE_ATTRS = re.compile(r"comment|related|share|social|promo|newsletter|subscribe|sidebar|advert|cookie|footer|breadcrumb", re.I)
+
+_WHITESPACE = re.compile(r"\s+")
+# <meta charset="..."> and <meta http-equiv="Content-Type" content="text/html; charset=...">
+_META_CHARSET = re.compile(rb"""<meta[^>]*?charset\s*=\s*["']?\s*([a-z0-9_.:-]+)""", re.I)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class ExtractionError(Exception):
+    """Raised when no extractor found article text"""
+
+
+def normalize_text(text):
+    """Collapse all whitespace runs to single spaces in one pass"""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _is_boilerplate(attrs):
+    for name, value in attrs:
+        if name in ('class', 'id') and value and BOILERPLATE_ATTRS.search(value):
+            return True
+    return False
+
+
+class _TextCollector(HTMLParser):
+    """
+    Incremental HTML-to-text pass
+
+    Collects paragraph text (outside boilerplate) and all visible text at
+    the same time; ``done`` turns True once enough paragraph text is in.
+    """
+
+    def __init__(self, max_chars):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.paragraphs = []
+        self.paragraph_chars = 0
+        self.visible = []
+        self.visible_chars = 0
+        self._current = []
+        # Open elements as (tag, kind); end tags pop up to their match so
+        # unclosed <p>/<li> elements do not leak state
+        self._open = []
+        self._skip_depth = 0
+        self._boilerplate_depth = 0
+        self._text_depth = 0
+
+    @property
+    def done(self):
+        return self.paragraph_chars >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        if tag in SKIP_TAGS:
+            kind = 'skip'
+            self._skip_depth += 1
+        elif tag in BOILERPLATE_TAGS or _is_boilerplate(attrs):
+            kind = 'boilerplate'
+            self._boilerplate_depth += 1
+        elif tag in TEXT_TAGS:
+            kind = 'text'
+            if self._text_depth == 0:
+                self._current = []
+            self._text_depth += 1
+        else:
+            kind = None
+        self._open.append((tag, kind))
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _ in self._open):
+            return  # stray end tag
+        while self._open:
+            open_tag, kind = self._open.pop()
+            if kind == 'skip':
+                self._skip_depth -= 1
+            elif kind == 'boilerplate':
+                self._boilerplate_depth -= 1
+            elif kind == 'text':
+                self._text_depth -= 1
+                if self._text_depth == 0:
+                    self._flush_paragraph()
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self.visible_chars < self.max_chars:
+            self.visible.append(data)
+            self.visible_chars += len(data)
+        if self._text_depth and not self._boilerplate_depth:
+            self._current.append(data)
+
+    def _flush_paragraph(self):
+        text = normalize_text("".join(self._current))
+        self._current = []
+        # Very short fragments are bylines, buttons and share links
+        if len(text) >= 40 or (text and text[-1] in ".!?\"'”"):
+            self.paragraphs.append(text)
+            self.paragraph_chars += len(text) + 1
+
+    def paragraph_text(self):
+        return " ".join(self.paragraphs)[:self.max_chars]
+
+    def visible_text(self):
+        return normalize_text(" ".join(self.visible))[:self.max_chars]
+
+
+class _Download:
+    """A capped, lazily read HTTP response body"""
+
+    def __init__(self, url, max_bytes=MAX_HTML_BYTES, timeout=FETCH_TIMEOUT, html=None):
+        self.url = url
+        self.max_bytes = max_bytes
+        self.received = 0
+        self.exhausted = False
+        self._parts = []
+        self._chunks = iter(())
+        self._response = None
+        self.collector = None
+        encoding = None
+        if html is not None:
+            # Pre-fetched page (fixtures, tests); served in chunks like a download
+            if isinstance(html, str):
+                encoding = 'utf-8'
+            data = html.encode('utf-8') if isinstance(html, str) else html
+            data = data[:max_bytes]
+            self._chunks = (data[i:i + CHUNK_BYTES] for i in range(0, len(data), CHUNK_BYTES))
+        else:
+            self._response = requests.get(url, headers=HEADERS, timeout=timeout, stream=True)
+            self._response.raise_for_status()
+            # requests falls back to ISO-8859-1 without a charset, so only trust an explicit one
+            if 'charset' in self._response.headers.get('Content-Type', '').lower():
+                encoding = self._response.encoding
+            self._chunks = self._response.iter_content(CHUNK_BYTES)
+        if encoding is None:
+            first = next(self._chunks, b'')
+            self._chunks = itertools.chain([first], self._chunks)
+            encoding = sniff_encoding(first)
+        # Incremental so multi-byte characters split across chunks decode correctly
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    def chunks(self):
+        """Yield newly read decoded chunks until the cap or the end of the body"""
+        for chunk in self._chunks:
+            if self.received >= self.max_bytes:
+                break
+            chunk = chunk[:self.max_bytes - self.received]
+            self.received += len(chunk)
+            text = self._decoder.decode(chunk)
+            self._parts.append(text)
+            yield text
+        self.exhausted = True
+        self.close()
+
+    def read_all(self):
+        """Read the rest of the capped body and return everything read so far"""
+        for _ in self.chunks():
+            pass
+        return "".join(self._parts)
+
+    def close(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+
+def sniff_encoding(head):
+    """
+    Encoding declared by a ``<meta charset>`` in the first bytes of a page
+
+    Latin-1 and ASCII labels are read as Windows-1252, as browsers do.
+    Pages without a (known) declaration are taken as UTF-8.
+    """
+    match = _META_CHARSET.search(head[:CHARSET_SNIFF_BYTES])
+    if match is None:
+        return 'utf-8'
+    try:
+        name = codecs.lookup(match.group(1).decode('ascii')).name
+    except (LookupError, UnicodeDecodeError):
+        return 'utf-8'
+    return 'cp1252' if name in ('latin-1', 'iso8859-1', 'ascii') else name
+
+
+def _extract_paragraphs(download, max_chars):
+    collector = _TextCollector(max_chars)
+    for chunk in download.chunks():
+        collector.feed(chunk)
+        if collector.done:
+            break  # enough article text; stop reading the response
+    download.collector = collector
+    return collector.paragraph_text()
+
+
+def _extract_readability(download, max_chars):
+    from readability import Document
+    summary = Document(download.read_all()).summary(html_partial=True)
+    collector = _TextCollector(max_chars)
+    collector.feed(summary)
+    collector.close()
+    return collector.paragraph_text() or collector.visible_text()
+
+
+def _extract_newspaper(download, max_chars):
+    from newspaper import Article
+    article = Article(download.url)
+    if download.url.startswith(("http://", "https://")):
+        article.download()
+    else:
+        article.download(input_html=download.read_all())
+    article.parse()
+    return normalize_text(article.text)[:max_chars]
+
+
+def _extract_visible_text(download, max_chars):
+    collector = download.collector
+    # Reuse the paragraph pass if it already saw the whole page or enough text
+    if collector is None or not (download.exhausted or collector.visible_chars >= max_chars):
+        collector = _TextCollector(max_chars)
+        collector.feed(download.read_all())
+        collector.close()
+    return collector.visible_text()
+
+
+EXTRACTORS = [
+    ('paragraphs', _extract_paragraphs),
+    ('readability', _extract_readability),
+    ('newspaper', _extract_newspaper),
+    ('visible_text', _extract_visible_text),
+]
+
+
+def _record(name, seconds, success):
+    with _stats_lock:
+        stats = _stats.setdefault(name, {'attempts': 0, 'successes': 0, 'seconds': 0.0})
+        stats['attempts'] += 1
+        stats['successes'] += int(success)
+        stats['seconds'] += seconds
+
+
+def extraction_stats():
+    """
+    Per-extractor counters since start-up
+
+    Returns:
+        dict: ``{name: {attempts, successes, success_rate, avg_ms}}``
+    """
+    with _stats_lock:
+        return {
+            name: {
+                'attempts': s['attempts'],
+                'successes': s['successes'],
+                'success_rate': s['successes'] / s['attempts'] if s['attempts'] else 0.0,
+                'avg_ms': s['seconds'] / s['attempts'] * 1000 if s['attempts'] else 0.0,
+            }
+            for name, s in _stats.items()
+        }
+
+
+def extract_article(url, html=None, max_chars=MAX_CONTENT_LENGTH, min_chars=MIN_ARTICLE_CHARS, extractors=None):
+    """
+    Download a page and extract its article text
+
+    Args:
+        url (str): Page URL
+        html (str or bytes, optional): Already downloaded page; skips the request
+        max_chars (int): Maximum characters of text to return
+        min_chars (int): Fewer characters than this counts as a failed extraction
+        extractors (list, optional): Names from ``EXTRACTORS`` to try, in order
+
+    Returns:
+        dict: ``{'text', 'extractor', 'seconds', 'bytes_read'}``
+
+    Raises:
+        ExtractionError: If no extractor produced enough text
+        requests.RequestException: If the download fails
+    """
+    start = time.perf_counter()
+    download = _Download(url, html=html)
+    chain = [(name, fn) for name, fn in EXTRACTORS if extractors is None or name in extractors]
+    errors = []
+    try:
+        for name, extractor in chain:
+            step_start = time.perf_counter()
+            try:
+                text = extractor(download, max_chars)
+            except ImportError:
+                continue  # optional extractor not installed
+            except Exception as e:
+                _record(name, time.perf_counter() - step_start, False)
+                errors.append(f"{name}: {e}")
+                continue
+            success = len(text) >= min_chars
+            _record(name, time.perf_counter() - step_start, success)
+            if success:
+                return {'text': text, 'extractor': name, 'seconds': time.perf_counter() - start,
+                        'bytes_read': download.received}
+            errors.append(f"{name}: {len(text)} chars")
+    finally:
+        download.close()
+    raise ExtractionError(f"No article text found at {url} ({'; '.join(errors)})")
+
+
+if __name__ == "__main__":
+    import sys
+
+    for url in sys.argv[1:]:
+        try:
+            result = extract_article(url)
+            print(f"✅ {url}: {len(result['text'])} chars via {result['extractor']} "
+                  f"in {result['seconds'] * 1000:.0f} ms ({result['bytes_read'] / 1024:.0f} KiB read)")
+            print(result['text'][:500])
+        except Exception as e:
+            print(f"❌ {url}: {e}")
+    print(extraction_stats())
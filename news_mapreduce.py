@@ -0,0 +1,187 @@
+"""
+Map-reduce analysis of articles that do not fit in one prompt.
+
+Long articles are split on sentence boundaries into chunks of roughly
+``CHUNK_TOKENS`` tokens. Every chunk is summarized at the same time (the
+map step) and one final call merges the chunk notes into the usual
+``{summary, positive_industries, negative_industries}`` JSON (the reduce
+step). Because all chunks run in parallel, wall-clock time is about one
+chunk call plus the reduce call, whatever the article length; past
+``MAX_CHUNKS`` chunks they grow instead of multiplying.
+
+Token counts use tiktoken when it is installed and a 4-characters-per-token
+estimate otherwise.
+"""
+
+import json
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache import cached_resource
+
+CHARS_PER_TOKEN = 4
+# Articles up to this size are analyzed with a single prompt
+SINGLE_PROMPT_TOKENS = 3000
+CHUNK_TOKENS = 1500
+MAX_CHUNKS = 16
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+@cached_resource
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text):
+    """Number of model tokens in ``text`` (estimated without tiktoken)"""
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def needs_map_reduce(text):
+    """True if ``text`` is too long for a single analysis prompt"""
+    # Cheap length check first; tokenizing megabytes is not free
+    if len(text) <= SINGLE_PROMPT_TOKENS * 2:
+        return False
+    return count_tokens(text) > SINGLE_PROMPT_TOKENS
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS):
+    """
+    Split text into chunks of at most ``max_tokens`` tokens
+
+    Chunks end on sentence boundaries; a single sentence longer than the
+    budget is split between words (or characters if it has no spaces).
+
+    Args:
+        text (str): Article text
+        max_tokens (int): Token budget per chunk
+
+    Returns:
+        list: Chunk strings in article order
+    """
+    chunks, current, current_tokens = [], [], 0
+    for sentence in _SENTENCE_END.split(text.strip()):
+        tokens = count_tokens(sentence) + 1
+        if tokens > max_tokens:
+            # Oversized sentence: split between words into budget-sized pieces
+            words = sentence.split()
+            if len(words) > 1:
+                step = max(1, len(words) * max_tokens // tokens)
+                pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+            else:
+                # No spaces at all (URLs, tables); split by characters
+                step = max(1, len(sentence) * max_tokens // tokens)
+                pieces = [sentence[i:i + step] for i in range(0, len(sentence), step)]
+        else:
+            pieces = [sentence]
+        for piece in pieces:
+            piece_tokens = tokens if len(pieces) == 1 else count_tokens(piece) + 1
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def plan_chunks(text, max_chunks=MAX_CHUNKS):
+    """Chunks for the map step: ``CHUNK_TOKENS`` each, larger if that would exceed ``max_chunks``"""
+    budget = max(CHUNK_TOKENS, math.ceil(count_tokens(text) / max_chunks))
+    return chunk_text(text, budget)
+
+
+def build_map_prompt(chunk, index, total):
+    """Prompt for the notes on one chunk of a long article"""
+    return f"""
+You are a market analyst AI for US businesses.
+
+Below is part {index} of {total} of a long news article. Write notes on this
+part only:
+1. The key facts in 2–4 short bullet points.
+2. **US industries** this part suggests could be positively or negatively impacted.
+
+Format your answer as a JSON object with this structure:
+
+{{
+  "points": ["fact 1", "fact 2"],
+  "positive_industries": ["Industry A"],
+  "negative_industries": ["Industry X"]
+}}
+
+Article part {index}/{total}:
+\"\"\"
+{chunk}
+\"\"\"
+"""
+
+
+def build_reduce_prompt(notes):
+    """Prompt merging the chunk notes into the final analysis JSON"""
+    return f"""
+You are a market analyst AI for US businesses.
+
+A long news article was split into parts and each part was summarized. The
+notes for every part, in article order, are below. Your task is to:
+1. Summarize the whole article in 3–5 bullet points.
+2. Identify **US industries** that could be impacted by this news.
+3. Categorize them into:
+   - **Positively impacted industries**
+   - **Negatively impacted industries**
+Merge duplicates and drop industries the notes contradict.
+
+Format your answer as a JSON object with this structure:
+
+{{
+  "summary": ["point 1", "point 2", "..."],
+  "positive_industries": ["Industry A", "Industry B"],
+  "negative_industries": ["Industry X", "Industry Y"]
+}}
+
+Notes per part:
+{json.dumps(notes, indent=1, ensure_ascii=False)}
+"""
+
+
+def map_chunks(text, complete, max_chunks=MAX_CHUNKS):
+    """
+    Run the map step: summarize every chunk of ``text`` concurrently
+
+    Args:
+        text (str): Article text
+        complete (callable): ``complete(prompt) -> (dict, tokens)``, one JSON completion
+        max_chunks (int): Upper bound on parallel calls; chunks grow beyond it
+
+    Returns:
+        tuple: (list of chunk notes in article order, total tokens used)
+
+    Raises:
+        RuntimeError: If every chunk failed
+    """
+    chunks = plan_chunks(text, max_chunks)
+    prompts = [build_map_prompt(chunk, i + 1, len(chunks)) for i, chunk in enumerate(chunks)]
+
+    def run(prompt):
+        try:
+            return complete(prompt)
+        except Exception as e:
+            print(f"⚠️ Chunk analysis failed: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(prompts), thread_name_prefix="news-map") as executor:
+        results = list(executor.map(run, prompts))
+
+    notes = [result[0] for result in results if result is not None]
+    if not notes:
+        raise RuntimeError(f"All {len(chunks)} chunk analyses failed")
+    return notes, sum(result[1] for result in results if result is not None)
@@ -1,78 +1,77 @@
-from openai import OpenAI
 import os
 from dotenv import load_dotenv
-import requests
-from bs4 import BeautifulSoup
 import json
-from newspaper import Article
-from readability import Document
-import requests
+import time
+from utils.cache import cached_data, cached_resource
+from utils.metrics import increment, observe, span, timed
+from analysis_cache import content_key, get_analysis_cache
+from news_dedup import get_duplicate_index
+from utils.partial_json import parse_partial_json
+from news_extract import extract_article
+from news_mapreduce import build_reduce_prompt, map_chunks, needs_map_reduce
+
+# openai is imported inside get_client so that importing this module stays
+# cheap; article extraction lives in news_extract
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OpenAI_key"))
 model="gpt-4o-mini"
 
+# Bump whenever the analysis prompts change so cached analyses are not reused
+PROMPT_VERSION = "industries-v1"
+MAP_REDUCE_PROMPT_VERSION = "industries-mapreduce-v1"
+
+# Long articles are kept whole and analyzed with map-reduce (news_mapreduce)
+MAX_ARTICLE_CHARS = 100000
+
+@cached_resource
+def get_client():
+    """
+    OpenAI client, created on first use
+
+    Set ``OPENAI_BASE_URL`` to use another endpoint, e.g. the offline mock
+    in ``mock_servers/openai_server.py``.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OpenAI_key"), base_url=os.getenv("OPENAI_BASE_URL") or None)
+
 def get_news_analysis(news_text):
-    response = client.chat.completions.create(
+    response = get_client().chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": news_text}]
     )
     return response.choices[0].message.content
 
+@timed()
 def scrape_with_readability(url):
-    resp = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
-    doc = Document(resp.text)
-    return doc.summary() 
+    """Article text via the readability extractor only"""
+    try:
+        return extract_article(url, extractors=['readability'])['text']
+    except Exception as e:
+        print(f"❌ Error scraping article: {e}")
+        return None
 
+@timed()
 def scrape_webpage(url):
-    """Scrape full article text using newspaper3k"""
+    """Scrape article text, trying extractors from cheapest to costliest (see ``news_extract``)"""
     try:
-        article = Article(url)
-        article.download()
-        article.parse()
-        return article.text
+        return extract_article(url, max_chars=MAX_ARTICLE_CHARS)['text']
     except Exception as e:
         print(f"❌ Error scraping article: {e}")
         return None
 
+@timed()
 def scrape_webpage_bs4(url):
-    """Scrape content from a webpage"""
-    MAX_CONTENT_LENGTH = 10000
+    """Scrape all visible text from a webpage"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Get text content
-        text = soup.get_text()
-        
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        return text[:MAX_CONTENT_LENGTH]  # Limit content length for API efficiency
+        return extract_article(url, extractors=['visible_text'])['text']
     except Exception as e:
         return ("no news found")
 
 
-def summarize_and_assess_industries(article_text):
-    """
-    Send news article content to OpenAI and get:
-    - A concise summary
-    - A list of positively and negatively impacted US industries
-    """
-
-    prompt = f"""
+def build_analysis_prompt(article_text):
+    """Prompt asking for a summary and impacted industries as JSON (see ``PROMPT_VERSION``)"""
+    return f"""
 You are a market analyst AI for US businesses.
 
 A user has provided a news article. Your task is to:
@@ -96,30 +95,212 @@ News Article:
 \"\"\"
 """
 
+
+def _parse_json_output(output_text):
+    # Models sometimes wrap the JSON in a Markdown fence
+    start, end = output_text.find("{"), output_text.rfind("}")
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        return json.loads(output_text[start:end + 1])
+    except json.JSONDecodeError:
+        raise ValueError(f"Model returned invalid JSON: {output_text[:200]}")
+
+
+def _count_tokens(usage):
+    """Record the token usage of one completion; returns the total"""
+    if not usage:
+        return 0
+    increment("llm_tokens", usage.prompt_tokens, kind="prompt")
+    increment("llm_tokens", usage.completion_tokens, kind="completion")
+    return usage.total_tokens
+
+
+def _complete_json(prompt):
+    """One blocking completion parsed as JSON; returns (result, total tokens)"""
+    with span("llm_completion", mode="blocking"):
+        response = get_client().chat.completions.create(
+            model=model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
         )
-        output_text = response.choices[0].message.content
+    tokens = _count_tokens(response.usage)
+    return _parse_json_output(response.choices[0].message.content), tokens
+
+
+def _stream_json(prompt, usage):
+    """
+    Stream one completion, yielding the partially parsed JSON as it grows
+
+    The last value yielded is the complete result; ``usage['tokens']`` is
+    set once the stream ends.
+    """
+    start = time.perf_counter()
+    stream = get_client().chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.3,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    output_text = ""
+    last = None
+    for chunk in stream:
+        if chunk.usage:
+            usage['tokens'] = _count_tokens(chunk.usage)
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        if not output_text:
+            observe("llm_first_token", time.perf_counter() - start, mode="stream")
+        output_text += chunk.choices[0].delta.content
         try:
-            json_output = json.loads(output_text)
-        except json.JSONDecodeError:
-            print("⚠️ Failed to parse JSON. Raw output:\n", output_text)
-            return None
-        return json_output
+            partial = parse_partial_json(output_text)
+        except ValueError:
+            continue  # not JSON (yet); the final parse below reports it
+        if partial and partial != last:
+            last = partial
+            yield partial
+    observe("llm_completion", time.perf_counter() - start, mode="stream")
+    yield _parse_json_output(output_text)
+
 
+def _prior_analysis(article_text, version):
+    """
+    Earlier analysis of this article (exact cache) or of a near-duplicate
+
+    A near-duplicate's analysis is returned with a ``duplicate_of`` entry
+    citing the article it was made for.
+    """
+    cached = get_analysis_cache().get(article_text, version, model)
+    if cached is not None:
+        return cached
+    duplicate = get_duplicate_index().find(article_text, version, model)
+    if duplicate is None:
+        return None
+    return {**duplicate['analysis'], 'duplicate_of': {
+        'url': duplicate['url'],
+        'similarity': round(duplicate['similarity'], 2),
+        'analyzed_at': duplicate['analyzed_at'],
+    }}
+
+
+def _remember_analysis(article_text, version, analysis, tokens, source_url):
+    """
+    Save a finished analysis to the analysis cache and the near-duplicate index
+
+    A failed write (locked database, full disk) is only logged: the analysis
+    itself succeeded and is still returned to the caller.
+    """
+    try:
+        get_analysis_cache().put(article_text, version, model, analysis, tokens)
+        get_duplicate_index().add(article_text, version, model, analysis, url=source_url, tokens=tokens)
+    except Exception as e:
+        print(f"⚠️ Could not save the analysis: {e}")
+
+
+def _analysis_memo_key(article_text, source_url=None):
+    """In-memory cache key: the analysis cache's digest rather than the article itself"""
+    if not isinstance(article_text, str):
+        return (article_text,)
+    return content_key(article_text, PROMPT_VERSION, model)
+
+
+@timed()
+@cached_data("news_analysis", key=_analysis_memo_key)
+def summarize_and_assess_industries(article_text, source_url=None):
+    """
+    Send news article content to OpenAI and get:
+    - A concise summary
+    - A list of positively and negatively impacted US industries
+
+    Articles longer than one prompt budget are analyzed with map-reduce
+    (``news_mapreduce``): chunks are summarized in parallel, then merged.
+
+    Results are cached in memory and in the persistent analysis cache, keyed
+    by a SHA-256 of the normalized article text, the prompt version and the
+    model. Failed
+    analyses (None) are not cached. Near-duplicates of an analyzed article
+    (``news_dedup``) reuse its analysis, cited under ``duplicate_of``.
+
+    Args:
+        article_text (str): Article text
+        source_url (str, optional): Where the article came from, cited when
+            a later near-duplicate reuses this analysis
+    """
+    try:
+        long_article = needs_map_reduce(article_text)
+        version = MAP_REDUCE_PROMPT_VERSION if long_article else PROMPT_VERSION
+        prior = _prior_analysis(article_text, version)
+        if prior is not None:
+            return prior
+
+        map_tokens = 0
+        if long_article:
+            notes, map_tokens = map_chunks(article_text, _complete_json)
+            prompt = build_reduce_prompt(notes)
+        else:
+            prompt = build_analysis_prompt(article_text)
+        json_output, tokens = _complete_json(prompt)
+    except ValueError as e:
+        print(f"⚠️ Failed to parse JSON. {e}")
+        return None
     except Exception as e:
         print(f"❌ Error analyzing article: {e}")
         return None
 
+    _remember_analysis(article_text, version, json_output, tokens + map_tokens, source_url)
+    return json_output
+
+
+@timed()
+def stream_analysis(article_text, source_url=None):
+    """
+    Stream the analysis of an article as it is generated
+
+    The model output is requested with ``stream=True`` and re-parsed after
+    every chunk with ``parse_partial_json``, so summary bullets and industry
+    lists can be rendered while the rest is still being generated. A cached
+    analysis, or that of a near-duplicate, is yielded at once without
+    calling the model. For long articles the map step runs first and only
+    the reduce call is streamed.
+
+    Args:
+        article_text (str): Article text
+        source_url (str, optional): Where the article came from
+
+    Yields:
+        dict: Partial analyses, each at least as complete as the previous one;
+        the last one is the full analysis
+
+    Raises:
+        ValueError: If the final output is not valid JSON
+    """
+    long_article = needs_map_reduce(article_text)
+    version = MAP_REDUCE_PROMPT_VERSION if long_article else PROMPT_VERSION
+    prior = _prior_analysis(article_text, version)
+    if prior is not None:
+        yield prior
+        return
+
+    map_tokens = 0
+    if long_article:
+        # The chunk notes are needed before anything can be shown; only the
+        # reduce step is streamed
+        notes, map_tokens = map_chunks(article_text, _complete_json)
+        prompt = build_reduce_prompt(notes)
+    else:
+        prompt = build_analysis_prompt(article_text)
+
+    usage = {'tokens': 0}
+    analysis = None
+    for analysis in _stream_json(prompt, usage):
+        yield analysis
+    _remember_analysis(article_text, version, analysis, usage['tokens'] + map_tokens, source_url)
+
 
 if __name__ == "__main__":
     news_link = "https://www.cnbctv18.com/technology/apple-expands-iphone-production-in-india-for-us-bound-new-models-ws-l-19655874.htm"
     text=scrape_with_readability(news_link)
     print(text)
-    analysis=summarize_and_assess_industries(text)
+    analysis=summarize_and_assess_industries(text, news_link)
     print(analysis)
 
 
@@ -9,9 +9,9 @@ from get_ticker import get_ticker_fuzzy_streamlit
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from supabase_connect import supabase_anon
     from utils.config import setup_page_config
     from utils.auth import check_environment_variables
+    from job_queue import get_job_queue, submit_import
 except ImportError as e:
     st.error(f"Import error: {e}")
     st.stop()
@@ -26,6 +26,25 @@ if not env_check['all_set']:
     st.error("⚠️ Environment variables not configured. Please check your .env file.")
     st.stop()
 
+def show_import_jobs():
+    """Progress of the latest imports started in this session"""
+    jobs = get_job_queue().jobs(st.session_state.import_jobs[-5:])
+    if not jobs:
+        return
+    st.markdown("### 📥 Imports")
+    for job in jobs:
+        if job['status'] == "done":
+            st.success(f"✅ {job['ticker']}: {job['message']}")
+        elif job['status'] == "failed":
+            st.error(f"❌ {job['ticker']}: {job['message']}")
+        else:
+            stage = job['message'] or (job['stage'] or "queued").capitalize()
+            st.progress(job['progress'], text=f"{job['ticker']}: {stage}")
+    if st.session_state.get('imports_active') and not any(j['status'] in ("queued", "running") for j in jobs):
+        # Last import finished: rerun the page once so polling stops
+        st.session_state.imports_active = False
+        st.rerun()
+
 # Main page content
 def main():
     # Display banner if it exists
@@ -52,6 +71,8 @@ def main():
         st.session_state.search_results = []
     if 'selected_stock' not in st.session_state:
         st.session_state.selected_stock = None
+    if 'import_jobs' not in st.session_state:
+        st.session_state.import_jobs = []
     
     # Search input
     search_input = st.text_input(
@@ -127,8 +148,14 @@ def main():
                 st.success(f"Redirecting to analytics for {stock['ticker']}...")
         
         with col2:
+            full_history = st.checkbox("Full history", key="import_full_history",
+                                       help="Fetch every available day instead of only what is missing")
             if st.button("📥 Import Data"):
-                st.info(f"Starting data import for {stock['ticker']}...")
+                job_id = submit_import(stock['ticker'], stock['name'], stock['exchange'],
+                                       "full" if full_history else None)
+                if job_id not in st.session_state.import_jobs:
+                    st.session_state.import_jobs.append(job_id)
+                st.toast(f"Import of {stock['ticker']} queued")
         
         with col3:
             if st.button("📋 Add to Watchlist"):
@@ -145,6 +172,15 @@ def main():
     elif len(st.session_state.search_query) > 0 and len(st.session_state.search_query) < 3:
         st.info("💡 Enter at least 3 characters to start searching")
     
+    if st.session_state.import_jobs:
+        # Poll while imports are queued or running; the script thread never waits on them
+        recent_jobs = get_job_queue().jobs(st.session_state.import_jobs[-5:])
+        st.session_state.imports_active = any(job['status'] in ("queued", "running") for job in recent_jobs)
+        if st.session_state.imports_active:
+            st.fragment(run_every=2)(show_import_jobs)()
+        else:
+            show_import_jobs()
+    
     # Welcome content when no search
     if not st.session_state.search_query:
         st.markdown("---")
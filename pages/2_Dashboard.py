@@ -6,7 +6,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from plotly.subplots import make_subplots
+from datetime import date, datetime, timedelta
 import sys
 import os
 
@@ -15,6 +16,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.config import setup_page_config
 from utils.auth import check_environment_variables
+from stock_queries import choose_interval, fetch_price_history, list_stored_tickers, summarize_history
+from utils.downsample import DEFAULT_POINT_BUDGET, lttb, minmax_ohlc
+from indicators import latest_indicators, stored_indicators
+from refresh_scheduler import get_refresh_store, request_refresh
 
 # Configure page
 setup_page_config()
@@ -28,111 +33,170 @@ if not env_check['all_set']:
 st.title("📊 Stock Analytics Dashboard")
 st.markdown("---")
 
+try:
+    available_stocks = list_stored_tickers()
+except Exception as e:
+    st.error(f"❌ Could not load stocks from the database: {e}")
+    st.stop()
+
+if not available_stocks:
+    st.info("No stock data has been imported yet. Import a company from the Home page first.")
+    st.stop()
+
 # Sidebar filters
 st.sidebar.header("📋 Filters")
 selected_stocks = st.sidebar.multiselect(
     "Select Stocks",
-    options=["AAPL", "GOOGL", "MSFT", "TSLA", "AMZN"],
-    default=["AAPL", "GOOGL"]
+    options=available_stocks,
+    default=available_stocks[:2]
 )
 
 date_range = st.sidebar.date_input(
     "Date Range",
     value=(datetime.now() - timedelta(days=30), datetime.now()),
+    min_value=date(1990, 1, 1),
     max_value=datetime.now()
 )
 
+# The picker returns a single date while the user is still choosing the range
+if len(date_range) != 2:
+    st.info("👆 Please select an end date for the range.")
+    st.stop()
+
+bar_size = st.sidebar.selectbox(
+    "Bar size",
+    options=["Auto", "Daily", "Weekly", "Monthly"],
+    index=0,
+    help="Auto picks daily, weekly or monthly bars from the length of the range"
+)
+
+chart_type = st.sidebar.radio("Chart type", options=["Line", "Candlestick"], horizontal=True)
+
+start_date, end_date = date_range
+interval = {"Daily": "day", "Weekly": "week", "Monthly": "month"}.get(bar_size) or choose_interval(start_date, end_date)
+
 # Main content
 if selected_stocks:
+    try:
+        history = fetch_price_history(selected_stocks, start_date, end_date, interval)
+    except Exception as e:
+        st.error(f"❌ Could not load price history: {e}")
+        st.stop()
+
+    if history.empty:
+        st.warning("No prices found for the selected stocks in this date range.")
+        st.stop()
+
+    summary = summarize_history(history)
+    bar_label = {"day": "Daily", "week": "Weekly", "month": "Monthly"}[interval]
+
     # Create tabs for different views
     tab1, tab2, tab3 = st.tabs(["📈 Price Charts", "📊 Analytics", "📋 Data Table"])
-    
+
     with tab1:
         st.subheader("Stock Price Trends")
-        
-        # Sample data for demonstration
-        dates = pd.date_range(start=date_range[0], end=date_range[1], freq='D')
-        
-        fig = go.Figure()
-        
-        for stock in selected_stocks:
-            # Generate sample data (replace with actual data from your database)
-            import numpy as np
-            np.random.seed(42)
-            prices = 100 + np.cumsum(np.random.randn(len(dates)) * 2)
-            
-            fig.add_trace(go.Scatter(
-                x=dates,
-                y=prices,
-                mode='lines',
-                name=stock,
-                line=dict(width=2)
-            ))
-        
-        fig.update_layout(
-            title="Stock Price Comparison",
-            xaxis_title="Date",
-            yaxis_title="Price ($)",
-            hovermode='x unified',
-            height=500
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-    
+
+        if chart_type == "Line":
+            fig = go.Figure()
+            plotted = 0
+
+            for stock, bars in history.groupby('ticker', sort=False):
+                # Keep peaks and troughs within a pixel-sized point budget
+                bars = lttb(bars, 'date', 'close', DEFAULT_POINT_BUDGET)
+                plotted += len(bars)
+                fig.add_trace(go.Scatter(
+                    x=bars['date'],
+                    y=bars['close'],
+                    mode='lines',
+                    name=stock,
+                    line=dict(width=2)
+                ))
+
+            fig.update_layout(
+                title="Stock Price Comparison",
+                xaxis_title="Date",
+                yaxis_title="Price ($)",
+                hovermode='x unified',
+                height=500
+            )
+
+            st.caption(f"{bar_label} bars · {len(history)} points · {plotted} plotted")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            for stock, bars in history.groupby('ticker', sort=False):
+                # Merge bars so high/low extremes and volume totals stay exact
+                bars = minmax_ohlc(bars, DEFAULT_POINT_BUDGET)
+
+                fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.75, 0.25], vertical_spacing=0.03)
+                fig.add_trace(go.Candlestick(
+                    x=bars['date'],
+                    open=bars['open'],
+                    high=bars['high'],
+                    low=bars['low'],
+                    close=bars['close'],
+                    name=stock
+                ), row=1, col=1)
+                fig.add_trace(go.Bar(x=bars['date'], y=bars['volume'], name="Volume", marker_color="#9aa5b1"), row=2, col=1)
+
+                fig.update_layout(
+                    title=f"{stock} ({bar_label.lower()} bars)",
+                    yaxis_title="Price ($)",
+                    xaxis_rangeslider_visible=False,
+                    showlegend=False,
+                    height=550
+                )
+
+                st.caption(f"{stock}: {len(bars)} bars plotted")
+                st.plotly_chart(fig, use_container_width=True)
+
     with tab2:
         st.subheader("Stock Analytics")
-        
+
         col1, col2 = st.columns(2)
-        
+
         with col1:
             # Volume analysis
-            volume_data = pd.DataFrame({
-                'Stock': selected_stocks,
-                'Avg Volume': [1500000, 2000000, 1800000, 2200000, 1700000][:len(selected_stocks)]
-            })
-            
             fig_volume = px.bar(
-                volume_data, 
-                x='Stock', 
+                summary,
+                x='Stock',
                 y='Avg Volume',
-                title="Average Trading Volume",
+                title="Average Daily Trading Volume",
                 color='Stock'
             )
             st.plotly_chart(fig_volume, use_container_width=True)
-        
+
         with col2:
-            # Performance metrics
-            performance_data = pd.DataFrame({
-                'Stock': selected_stocks,
-                'Performance': [5.2, -2.1, 3.8, 8.5, 1.2][:len(selected_stocks)]
-            })
-            
+            # Performance over the selected range
             fig_perf = px.bar(
-                performance_data,
+                summary,
                 x='Stock',
-                y='Performance',
+                y='Change (%)',
                 title="Performance (%)",
-                color='Performance',
+                color='Change (%)',
                 color_continuous_scale='RdYlGn'
             )
             st.plotly_chart(fig_perf, use_container_width=True)
-    
+
+        # Latest daily indicators from the states kept up to date on import;
+        # stocks missing from the local price store are computed from daily bars
+        st.markdown("**📐 Technical Indicators**")
+        st.caption("Latest values computed on daily bars")
+        indicator_table = stored_indicators(selected_stocks)
+        missing = sorted(set(selected_stocks) - set(indicator_table['Stock']))
+        if missing:
+            daily = history if interval == "day" else fetch_price_history(missing, start_date, end_date, "day")
+            daily = daily[daily['ticker'].isin(missing)]
+            if not daily.empty:
+                indicator_table = pd.concat([indicator_table, latest_indicators(daily)], ignore_index=True)
+        st.dataframe(indicator_table, use_container_width=True, hide_index=True)
+
     with tab3:
         st.subheader("Stock Data Summary")
-        
-        # Sample data table
-        summary_data = pd.DataFrame({
-            'Stock': selected_stocks,
-            'Current Price': [150.25, 2800.50, 310.75, 245.80, 3200.25][:len(selected_stocks)],
-            'Change': ['+2.5%', '-1.2%', '+0.8%', '+3.2%', '-0.5%'][:len(selected_stocks)],
-            'Volume': ['1.5M', '2.0M', '1.8M', '2.2M', '1.7M'][:len(selected_stocks)],
-            'Market Cap': ['2.4T', '1.8T', '2.3T', '800B', '1.5T'][:len(selected_stocks)]
-        })
-        
-        st.dataframe(summary_data, use_container_width=True)
-        
+
+        st.dataframe(summary, use_container_width=True)
+
         # Download button
-        csv = summary_data.to_csv(index=False)
+        csv = history.to_csv(index=False)
         st.download_button(
             label="📥 Download Data as CSV",
             data=csv,
@@ -145,4 +209,18 @@ else:
 
 # Footer
 st.markdown("---")
-st.markdown("*Data is refreshed every 15 minutes during market hours*")
+refresh_store = get_refresh_store()
+refresh_settings = refresh_store.settings()
+last_refresh = refresh_store.stats()['last_success']
+col1, col2 = st.columns([3, 1])
+with col1:
+    if refresh_settings['auto_refresh']:
+        st.markdown("*Daily bars are refreshed shortly after each market close*")
+    else:
+        st.markdown("*Automatic refresh is turned off in Settings*")
+    if last_refresh:
+        st.caption(f"Last background refresh: {datetime.fromtimestamp(last_refresh):%Y-%m-%d %H:%M}")
+with col2:
+    if selected_stocks and st.button("🔄 Queue refresh", help="Refresh the selected stocks in the background"):
+        request_refresh(selected_stocks)
+        st.toast(f"Queued {', '.join(selected_stocks)} for the next scheduler pass")
@@ -2,7 +2,10 @@ import streamlit as st
 import sys
 import os
 import json
-from openAI_news import scrape_webpage, summarize_and_assess_industries
+import time
+from openAI_news import scrape_webpage, stream_analysis
+from news_batch import (DEFAULT_FETCH_CONCURRENCY, DEFAULT_FETCH_TIMEOUT, DEFAULT_LLM_CONCURRENCY,
+                        DEFAULT_LLM_TIMEOUT, NO_CONTENT, parse_url_list, run_batch)
 from utils.config import setup_page_config
 from utils.auth import check_environment_variables
 
@@ -18,83 +21,175 @@ if not env_check['all_set']:
     st.error("⚠️ Environment variables not configured. Please check your .env file.")
     st.stop()
 
+def show_analysis(results):
+    """Render the summary and impacted industries of one analysis"""
+    # Reused from a near-duplicate article analyzed earlier
+    duplicate_of = results.get('duplicate_of')
+    if duplicate_of:
+        source = f"[{duplicate_of['url']}]({duplicate_of['url']})" if duplicate_of.get('url') else "an earlier article"
+        analyzed_at = time.strftime('%Y-%m-%d %H:%M', time.localtime(duplicate_of['analyzed_at']))
+        st.info(f"♻️ Near-duplicate ({duplicate_of['similarity']:.0%} similar) of {source}, "
+                f"analyzed {analyzed_at}. Showing that analysis.")
+    
+    # Summary section
+    if 'summary' in results:
+        st.markdown("#### 📝 Summary")
+        for i, point in enumerate(results['summary'], 1):
+            st.markdown(f"• {point}")
+    
+    # Positive industries
+    if 'positive_industries' in results and results['positive_industries']:
+        st.markdown("#### 🟢 Positively Impacted Industries")
+        for industry in results['positive_industries']:
+            st.markdown(f"✅ {industry}")
+    
+    # Negative industries
+    if 'negative_industries' in results and results['negative_industries']:
+        st.markdown("#### 🔴 Negatively Impacted Industries")
+        for industry in results['negative_industries']:
+            st.markdown(f"❌ {industry}")
+
+def render_batch():
+    """Scrape and analyze many articles concurrently, showing each as it finishes"""
+    st.markdown("### 📚 Analyze Many Articles")
+    
+    if 'batch_results' not in st.session_state:
+        st.session_state.batch_results = []
+    
+    pasted = st.text_area(
+        "Paste news links (one per line):",
+        placeholder="https://...\nhttps://...",
+        height=150,
+        key="batch_input"
+    )
+    uploaded = st.file_uploader("...or upload a text/CSV file with links", type=["txt", "csv"])
+    
+    urls = parse_url_list(pasted)
+    if uploaded is not None:
+        urls += [url for url in parse_url_list(uploaded.getvalue().decode("utf-8", errors="ignore")) if url not in urls]
+    
+    with st.expander("⚙️ Concurrency"):
+        col1, col2 = st.columns(2)
+        with col1:
+            fetch_concurrency = st.slider("Parallel downloads", 1, 32, DEFAULT_FETCH_CONCURRENCY)
+            fetch_timeout = st.slider("Download timeout (seconds)", 5, 120, DEFAULT_FETCH_TIMEOUT)
+        with col2:
+            llm_concurrency = st.slider("Parallel AI analyses", 1, 16, DEFAULT_LLM_CONCURRENCY)
+            llm_timeout = st.slider("Analysis timeout (seconds)", 10, 300, DEFAULT_LLM_TIMEOUT)
+    
+    st.caption(f"{len(urls)} link(s) found")
+    
+    if st.button("🚀 Analyze All", type="primary", disabled=not urls):
+        progress = st.progress(0.0, text="Starting...")
+        results_area = st.container()
+        results = []
+        start = time.perf_counter()
+        
+        def on_result(result):
+            results.append(result)
+            progress.progress(len(results) / len(urls), text=f"{len(results)}/{len(urls)} done")
+            with results_area:
+                show_batch_result(result)
+        
+        run_batch(
+            urls,
+            on_result=on_result,
+            fetch_concurrency=fetch_concurrency,
+            llm_concurrency=llm_concurrency,
+            fetch_timeout=fetch_timeout,
+            llm_timeout=llm_timeout
+        )
+        st.session_state.batch_results = results
+        ok = sum(result['status'] == 'ok' for result in results)
+        st.success(f"✅ {ok}/{len(results)} articles analyzed in {time.perf_counter() - start:.1f}s")
+    elif st.session_state.batch_results:
+        for result in st.session_state.batch_results:
+            show_batch_result(result)
+
+def show_batch_result(result):
+    """Render one batch result as an expander"""
+    if result['status'] == 'ok':
+        with st.expander(f"✅ {result['url']}"):
+            show_analysis(result['analysis'])
+    else:
+        with st.expander(f"❌ {result['url']}"):
+            st.error(result['error'])
+
 def main():
     st.title("📰 News Analyzer")
     st.markdown("---")
     
-    st.markdown("### 🔍 Analyze News Content")
+    single_tab, batch_tab = st.tabs(["🔗 Single Article", "📚 Batch Analysis"])
     
-    # Initialize session state
-    if 'analysis_results' not in st.session_state:
-        st.session_state.analysis_results = None
-    if 'scraped_text' not in st.session_state:
-        st.session_state.scraped_text = None
+    with single_tab:
+        st.markdown("### 🔍 Analyze News Content")
+        
+        # Initialize session state
+        if 'analysis_results' not in st.session_state:
+            st.session_state.analysis_results = None
+        if 'scraped_text' not in st.session_state:
+            st.session_state.scraped_text = None
     
-    # News input
-    news_url = st.text_input(
-        "Enter news content link to analyze:",
-        placeholder="Paste news link that we want to analyze...",
-        key="news_input"
-    )
+        # News input
+        news_url = st.text_input(
+            "Enter news content link to analyze:",
+            placeholder="Paste news link that we want to analyze...",
+            key="news_input"
+        )
     
-    # Analysis button
-    if st.button("🚀 Analyze News", type="primary", disabled=not news_url.strip()):
-        if news_url.strip():
-            with st.spinner("🔍 Scraping webpage..."):
-                # Scrape the webpage
-                scraped_text = scrape_webpage(news_url)
-                st.session_state.scraped_text = scraped_text
-                
-                if scraped_text == "no news found":
+        # Analysis button
+        if st.button("🚀 Analyze News", type="primary", disabled=not news_url.strip()):
+            if news_url.strip():
+                with st.spinner("🔍 Scraping webpage..."):
+                    # Scrape the webpage
+                    scraped_text = scrape_webpage(news_url)
+                    st.session_state.scraped_text = scraped_text
+            
+                if scraped_text in NO_CONTENT:
                     st.error("❌ Could not scrape content from the provided URL. Please check the link and try again.")
                 else:
                     st.success("✅ Webpage scraped successfully!")
+                
+                    # Stream the analysis so bullets appear as they are generated
+                    live_results = st.empty()
+                    live_results.info("🤖 Analyzing content with AI...")
+                    analysis_results = None
+                    try:
+                        for analysis_results in stream_analysis(scraped_text, news_url.strip()):
+                            with live_results.container():
+                                show_analysis(analysis_results)
+                    except Exception as e:
+                        print(f"❌ Error analyzing article: {e}")
+                        analysis_results = None
+                    live_results.empty()
+                    st.session_state.analysis_results = analysis_results
                     
-                    with st.spinner("🤖 Analyzing content with AI..."):
-                        # Analyze the scraped text
-                        analysis_results = summarize_and_assess_industries(scraped_text)
-                        st.session_state.analysis_results = analysis_results
-                        
-                        if analysis_results:
-                            st.success("✅ Analysis completed!")
-                        else:
-                            st.error("❌ Analysis failed. Please try again.")
-        else:
-            st.warning("Please enter a URL to analyze.")
-    
-    # Display results
-    if st.session_state.analysis_results:
-        st.markdown("---")
-        st.markdown("### 📊 Analysis Results")
-        
-        results = st.session_state.analysis_results
-        
-        # Summary section
-        if 'summary' in results:
-            st.markdown("#### 📝 Summary")
-            for i, point in enumerate(results['summary'], 1):
-                st.markdown(f"• {point}")
-        
-        # Positive industries
-        if 'positive_industries' in results and results['positive_industries']:
-            st.markdown("#### 🟢 Positively Impacted Industries")
-            for industry in results['positive_industries']:
-                st.markdown(f"✅ {industry}")
+                    if analysis_results:
+                        st.success("✅ Analysis completed!")
+                    else:
+                        st.error("❌ Analysis failed. Please try again.")
+            else:
+                st.warning("Please enter a URL to analyze.")
+    
+        # Display results
+        if st.session_state.analysis_results:
+            st.markdown("---")
+            st.markdown("### 📊 Analysis Results")
         
-        # Negative industries
-        if 'negative_industries' in results and results['negative_industries']:
-            st.markdown("#### 🔴 Negatively Impacted Industries")
-            for industry in results['negative_industries']:
-                st.markdown(f"❌ {industry}")
+            results = st.session_state.analysis_results
+            show_analysis(results)
         
-        # Raw JSON view (expandable)
-        with st.expander("🔍 View Raw Analysis Data"):
-            st.json(results)
-    
-    # Display scraped text (expandable)
-    if st.session_state.scraped_text and st.session_state.scraped_text != "no news found":
-        with st.expander("📄 View Scraped Content"):
-            st.text(st.session_state.scraped_text[:1000] + "..." if len(st.session_state.scraped_text) > 1000 else st.session_state.scraped_text)
+            # Raw JSON view (expandable)
+            with st.expander("🔍 View Raw Analysis Data"):
+                st.json(results)
+    
+        # Display scraped text (expandable)
+        if st.session_state.scraped_text not in NO_CONTENT:
+            with st.expander("📄 View Scraped Content"):
+                st.text(st.session_state.scraped_text[:1000] + "..." if len(st.session_state.scraped_text) > 1000 else st.session_state.scraped_text)
+    
+    with batch_tab:
+        render_batch()
 
 if __name__ == "__main__":
     main()
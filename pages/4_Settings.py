@@ -5,16 +5,58 @@ Settings - Configure the application
 import streamlit as st
 import sys
 import os
+import time
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.config import setup_page_config
 from utils.auth import check_environment_variables
+from utils.rate_limiter import get_rate_limiter
+from utils.db import configure_pool, get_pool, get_pool_settings
+from utils.cache import configure_cache, get_cache_settings, get_data_cache
+from av_cache import get_response_cache
+from analysis_cache import get_analysis_cache
+from news_dedup import get_duplicate_index
+from news_extract import extraction_stats
+from refresh_scheduler import get_refresh_store
+from utils.metrics import configure_metrics, metrics_enabled, prometheus_text, reset as reset_metrics, snapshot
 
 # Configure page
 setup_page_config()
 
+def describe(name, labels):
+    """``name`` with its labels, e.g. ``llm_tokens (kind=prompt)``"""
+    return f"{name} ({', '.join(f'{k}={v}' for k, v in labels.items())})" if labels else name
+
+@st.fragment(run_every=5)
+def performance_panel():
+    """Live timings and counters of the instrumented hot paths (utils.metrics)"""
+    st.markdown("**⏱️ Performance (refreshes every 5s)**")
+    current = snapshot()
+    if not current['spans'] and not current['counters']:
+        st.caption("No calls recorded yet in this app process.")
+        return
+    st.dataframe([
+        {"Span": describe(s['span'], s['labels']), "Calls": s['count'], "Errors": s['errors'],
+         "p50 (ms)": round(s['p50_ms'], 1), "p95 (ms)": round(s['p95_ms'], 1),
+         "Max (ms)": round(s['max_ms'], 1), "Total (s)": round(s['total_s'], 2)}
+        for s in current['spans']
+    ], use_container_width=True, hide_index=True)
+    if current['counters']:
+        st.dataframe([
+            {"Counter": describe(c['name'], c['labels']), "Value": c['value']}
+            for c in current['counters']
+        ], use_container_width=True, hide_index=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("⬇️ Prometheus metrics", prometheus_text(), file_name="stockie_metrics.prom",
+                           mime="text/plain")
+    with col2:
+        if st.button("🧹 Reset metrics"):
+            reset_metrics()
+            st.rerun(scope="fragment")
+
 st.title("⚙️ Application Settings")
 st.markdown("---")
 
@@ -43,20 +85,38 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("**📊 Data Settings**")
     
-    auto_refresh = st.checkbox("🔄 Auto-refresh data", value=True)
+    refresh_store = get_refresh_store()
+    refresh_settings = refresh_store.settings()
+    interval_options = [5, 15, 30, 60]
+    auto_refresh = st.checkbox("🔄 Auto-refresh data", value=refresh_settings['auto_refresh'])
     refresh_interval = st.selectbox(
         "Refresh interval",
-        options=[5, 15, 30, 60],
-        index=1,
-        format_func=lambda x: f"{x} minutes"
+        options=interval_options,
+        index=interval_options.index(refresh_settings['refresh_interval'])
+        if refresh_settings['refresh_interval'] in interval_options else 1,
+        format_func=lambda x: f"{x} minutes",
+        help="Data is refreshed after each close; refreshes are spread over this window"
     )
+    if (auto_refresh, refresh_interval) != (refresh_settings['auto_refresh'], refresh_settings['refresh_interval']):
+        refresh_store.save_settings(auto_refresh=auto_refresh, refresh_interval=refresh_interval)
     
+    refresh_stats = refresh_store.stats()
+    if refresh_stats['heartbeat'] and time.time() - refresh_stats['heartbeat'] < 5 * 60:
+        st.caption(f"🟢 Scheduler running · {refresh_stats['tracked']} tickers tracked, "
+                   f"{refresh_stats['due']} due, {refresh_stats['failing']} failing")
+    else:
+        st.caption("⚪ Scheduler not running. Start it with `python refresh_scheduler.py`.")
+    
+    cache_settings = get_cache_settings()
+    duration_options = [1, 2, 4, 8, 24]
+    current_hours = cache_settings['ttl_seconds'] // 3600
     cache_duration = st.selectbox(
         "Cache duration",
-        options=[1, 2, 4, 8, 24],
-        index=2,
+        options=duration_options,
+        index=duration_options.index(current_hours) if current_hours in duration_options else 2,
         format_func=lambda x: f"{x} hours"
     )
+    configure_cache(ttl_seconds=cache_duration * 3600)
     
     st.markdown("**📈 Chart Settings**")
     
@@ -109,37 +169,56 @@ with st.expander("Alpha Vantage API Settings"):
     api_key_masked = "****" + (env_check['vars']['ALPHA_VANTAGE_API_KEY'] or "")[-4:] if env_check['vars']['ALPHA_VANTAGE_API_KEY'] else "Not set"
     st.text_input("API Key", value=api_key_masked, disabled=True)
     
+    limiter = get_rate_limiter()
+    rate_options = [5, 75, 300, 600]
     rate_limit = st.selectbox(
         "Rate limit (calls per minute)",
-        options=[5, 75, 300, 600],
-        index=0,
+        options=rate_options,
+        index=rate_options.index(limiter.calls_per_minute) if limiter.calls_per_minute in rate_options else 0,
         help="Free tier: 5 calls/min, Premium: up to 600 calls/min"
     )
+    if rate_limit != limiter.calls_per_minute:
+        limiter.set_rate(rate_limit)
+    st.caption(f"Requests in this app waiting for an API slot: {limiter.queue_depth()} (the limit is shared with the scheduler, import workers and bulk ingest)")
 
 with st.expander("Supabase Database Settings"):
     db_url_masked = (env_check['vars']['supabaseURL'] or "Not set")
     st.text_input("Supabase URL", value=db_url_masked, disabled=True)
     
+    pool_settings = get_pool_settings()
+    
     connection_pool = st.slider(
         "Connection pool size",
         min_value=1,
         max_value=20,
-        value=5
+        value=pool_settings['maxconn']
     )
     
     query_timeout = st.slider(
         "Query timeout (seconds)",
         min_value=10,
         max_value=120,
-        value=30
+        value=pool_settings['query_timeout']
     )
+    
+    configure_pool(maxconn=connection_pool, query_timeout=query_timeout)
+    
+    if st.button("🔌 Test connection"):
+        try:
+            if get_pool().health_check():
+                st.success("✅ Database connection healthy")
+            else:
+                st.error("❌ Health check failed")
+        except Exception as e:
+            st.error(f"❌ Connection failed: {e}")
 
 # Advanced settings
 st.markdown("---")
 st.subheader("🔧 Advanced Settings")
 
 with st.expander("Performance Settings"):
-    enable_caching = st.checkbox("💾 Enable data caching", value=True)
+    enable_caching = st.checkbox("💾 Enable data caching", value=get_cache_settings()['enabled'])
+    configure_cache(enabled=enable_caching)
     parallel_requests = st.checkbox("⚡ Parallel API requests", value=False)
     
     max_records = st.number_input(
@@ -149,6 +228,36 @@ with st.expander("Performance Settings"):
         value=1000,
         step=100
     )
+    
+    st.markdown("**📈 Cache hit rates**")
+    cache_rows = [
+        {"Cache": namespace, "Hits": c['hits'], "Misses": c['misses'],
+         "Hit rate": f"{c['hit_rate']:.0%}", "Entries": c['entries']}
+        for namespace, c in get_data_cache().stats().items()
+    ]
+    av_stats = get_response_cache().stats()
+    cache_rows.append({"Cache": "alpha_vantage (disk)", "Hits": av_stats['hits'], "Misses": av_stats['misses'],
+                       "Hit rate": f"{av_stats['hit_rate']:.0%}", "Entries": av_stats['entries']})
+    analysis_stats = get_analysis_cache().stats()
+    cache_rows.append({"Cache": "news_analysis (disk)", "Hits": analysis_stats['hits'],
+                       "Misses": analysis_stats['misses'], "Hit rate": f"{analysis_stats['hit_rate']:.0%}",
+                       "Entries": analysis_stats['entries']})
+    dedup_stats = get_duplicate_index().stats()
+    cache_rows.append({"Cache": "news_near_duplicates (disk)", "Hits": dedup_stats['hits'],
+                       "Misses": dedup_stats['misses'], "Hit rate": f"{dedup_stats['hit_rate']:.0%}",
+                       "Entries": dedup_stats['entries']})
+    st.dataframe(cache_rows, use_container_width=True, hide_index=True)
+    st.caption(f"LLM tokens saved by cached news analyses: {analysis_stats['tokens_saved']:,}, "
+               f"by near-duplicate reuse: {dedup_stats['tokens_saved']:,}")
+    
+    extractor_stats = extraction_stats()
+    if extractor_stats:
+        st.markdown("**📰 Article extractors**")
+        st.dataframe([
+            {"Extractor": name, "Attempts": s['attempts'], "Success rate": f"{s['success_rate']:.0%}",
+             "Avg time (ms)": round(s['avg_ms'], 1)}
+            for name, s in extractor_stats.items()
+        ], use_container_width=True, hide_index=True)
 
 with st.expander("Debugging"):
     debug_mode = st.checkbox("🐛 Debug mode", value=False)
@@ -158,8 +267,18 @@ with st.expander("Debugging"):
         index=1
     )
     
+    # Collection is process-wide: show its current state and only switch it
+    # when this checkbox is actually changed
+    st.session_state.collect_metrics = metrics_enabled()
+    st.checkbox("⏱️ Collect performance metrics", key="collect_metrics",
+                on_change=lambda: configure_metrics(enabled=st.session_state.collect_metrics),
+                help="Applies to every session of this app process")
+    
     if st.button("📋 View Logs"):
-        st.info("Logs would be displayed here")
+        st.session_state.show_metrics = not st.session_state.get('show_metrics', False)
+    
+    if st.session_state.get('show_metrics'):
+        performance_panel()
 
 # Save settings
 st.markdown("---")
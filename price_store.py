@@ -0,0 +1,275 @@
+"""
+Local columnar price store.
+
+Each ticker gets a directory holding one raw little-endian binary file per
+column (``date.bin``, ``open.bin``, ...) plus a small ``meta.json`` with the
+committed row count. Rows are kept in ascending date order, so reads
+memory-map just the requested columns and slice the date range with a
+binary search; nothing is parsed from text.
+
+Newer bars are appended in place. Bars older than the last stored date (a
+full fetch after a compact one) are merged by writing the ticker's columns
+to a new segment (``date.1.bin``, ...) that ``meta.json`` then points to.
+Writers lock the ticker directory, so the scheduler, import workers and
+bulk ingest can update the same ticker from separate processes.
+
+Usage:
+    python price_store.py            # import the bundled *_daily.csv files
+    python price_store.py AMD        # show what is stored for a ticker
+"""
+
+import glob
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.getenv("STOCKIE_PRICE_STORE", os.path.join(ROOT_DIR, "data", "prices"))
+
+COLUMN_DTYPES = {
+    'date': np.dtype('<M8[D]'),
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<i8'),
+}
+
+_RENAME_MAP = {
+    "1. open": "open",
+    "2. high": "high",
+    "3. low": "low",
+    "4. close": "close",
+    "5. volume": "volume",
+}
+
+
+class PriceStore:
+    """Per-ticker columnar store for daily OHLCV bars"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, ticker):
+        return os.path.join(self.root, ticker.upper())
+
+    def _path(self, ticker, column, segment=0):
+        name = f"{column}.{segment}.bin" if segment else f"{column}.bin"
+        return os.path.join(self._dir(ticker), name)
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            return self._locks.setdefault(ticker.upper(), threading.Lock())
+
+    @contextmanager
+    def _writing(self, ticker):
+        """Hold the ticker's write lock, within this process and across processes"""
+        directory = self._dir(ticker)
+        os.makedirs(directory, exist_ok=True)
+        with self._lock(ticker), open(os.path.join(directory, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Closing the file releases the lock
+            yield directory
+
+    def _meta(self, ticker):
+        try:
+            with open(os.path.join(self._dir(ticker), "meta.json")) as file:
+                meta = json.load(file)
+        except FileNotFoundError:
+            return {'rows': 0, 'last_date': None, 'segment': 0}
+        meta.setdefault('segment', 0)
+        return meta
+
+    def _commit(self, directory, meta):
+        tmp_path = os.path.join(directory, "meta.json.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, os.path.join(directory, "meta.json"))
+
+    def tickers(self):
+        """Return the tickers that have stored data"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(t for t in os.listdir(self.root) if os.path.exists(os.path.join(self.root, t, "meta.json")))
+
+    def row_count(self, ticker):
+        """Return the number of committed rows for ``ticker``"""
+        return self._meta(ticker)['rows']
+
+    def rows_through(self, ticker, date):
+        """Return the number of stored rows dated on or before ``date``"""
+        meta = self._meta(ticker)
+        dates = self._column(ticker, 'date', meta['rows'], meta['segment'])
+        return int(np.searchsorted(dates, np.datetime64(pd.Timestamp(date).date(), 'D'), 'right'))
+
+    def last_date(self, ticker):
+        """Return the latest stored date for ``ticker`` or None"""
+        last = self._meta(ticker)['last_date']
+        return pd.Timestamp(last).date() if last else None
+
+    def append(self, ticker, df):
+        """
+        Add the bars whose dates are not stored yet
+
+        Bars after the last stored date are appended in place; older ones
+        are merged by rewriting the ticker's columns. Dates already stored
+        are left unchanged.
+
+        Args:
+            ticker (str): Stock symbol
+            df (pandas.DataFrame): Daily bars with Alpha Vantage or plain column names
+
+        Returns:
+            int: Number of rows added
+        """
+        df = df.rename(columns=lambda c: _RENAME_MAP.get(c.strip().lower(), c.strip().lower()))
+        dates = pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]')
+        order = np.argsort(dates, kind="stable")
+        dates = dates[order]
+        keep = np.ones(len(dates), dtype=bool)
+        keep[1:] = dates[1:] != dates[:-1]
+
+        with self._writing(ticker) as directory:
+            meta = self._meta(ticker)
+            if meta['last_date']:
+                stored = self._column(ticker, 'date', meta['rows'], meta['segment'])
+                found = np.searchsorted(stored, dates).clip(max=len(stored) - 1)
+                keep &= stored[found] != dates
+                if (keep & (dates < np.datetime64(meta['last_date'], 'D'))).any():
+                    return self._rewrite(ticker, directory, meta, df, dates, order, keep)
+            rows = order[keep]
+            if not len(rows):
+                return 0
+
+            for column, dtype in COLUMN_DTYPES.items():
+                values = dates[keep] if column == 'date' else df[column].to_numpy()[rows]
+                with open(self._path(ticker, column, meta['segment']), "ab") as file:
+                    # Drop bytes from a write that never reached meta.json
+                    file.truncate(meta['rows'] * dtype.itemsize)
+                    file.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+            # Commit by updating the row count last
+            self._commit(directory, dict(meta, rows=meta['rows'] + len(rows), last_date=str(dates[keep][-1])))
+            return len(rows)
+
+    def _rewrite(self, ticker, directory, meta, df, dates, order, keep):
+        """Write the stored rows merged with the ``keep`` bars to a new segment and switch to it"""
+        segment = meta['segment'] + 1
+        stored_dates = np.asarray(self._column(ticker, 'date', meta['rows'], meta['segment']))
+        merged_dates = np.concatenate([stored_dates, dates[keep]])
+        merge = np.argsort(merged_dates, kind="stable")
+        for column, dtype in COLUMN_DTYPES.items():
+            if column == 'date':
+                values = merged_dates
+            else:
+                stored = np.asarray(self._column(ticker, column, meta['rows'], meta['segment']))
+                values = np.concatenate([stored.astype(dtype), df[column].to_numpy()[order[keep]].astype(dtype)])
+            with open(self._path(ticker, column, segment), "wb") as file:
+                file.write(np.ascontiguousarray(values[merge], dtype=dtype).tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+
+        merged_dates = merged_dates[merge]
+        self._commit(directory, dict(meta, rows=len(merged_dates), last_date=str(merged_dates[-1]), segment=segment))
+        # Readers that already mapped the old files keep their copy
+        for column in COLUMN_DTYPES:
+            try:
+                os.remove(self._path(ticker, column, meta['segment']))
+            except FileNotFoundError:
+                pass
+        return int(keep.sum())
+
+    def _column(self, ticker, column, rows, segment=0):
+        if rows == 0:
+            return np.empty(0, dtype=COLUMN_DTYPES[column])
+        return np.memmap(self._path(ticker, column, segment), dtype=COLUMN_DTYPES[column], mode="r", shape=(rows,))
+
+    def read(self, ticker, columns=None, start=None, end=None):
+        """
+        Read a date range for one ticker
+
+        Args:
+            ticker (str): Stock symbol
+            columns (list, optional): Subset of open/high/low/close/volume
+            start (date-like, optional): First date to include
+            end (date-like, optional): Last date to include
+
+        Returns:
+            pandas.DataFrame: ``date`` plus the requested columns, oldest first
+        """
+        columns = [c for c in (columns or COLUMN_DTYPES) if c != 'date']
+        unknown = set(columns) - set(COLUMN_DTYPES)
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+
+        for attempt in range(3):
+            meta = self._meta(ticker)
+            rows, segment = meta['rows'], meta['segment']
+            try:
+                dates = self._column(ticker, 'date', rows, segment)
+                lo = 0 if start is None else int(
+                    np.searchsorted(dates, np.datetime64(pd.Timestamp(start).date(), 'D'), 'left'))
+                hi = rows if end is None else int(
+                    np.searchsorted(dates, np.datetime64(pd.Timestamp(end).date(), 'D'), 'right'))
+
+                data = {'date': np.array(dates[lo:hi]).astype('datetime64[ns]')}
+                for column in columns:
+                    data[column] = np.array(self._column(ticker, column, rows, segment)[lo:hi])
+                return pd.DataFrame(data)
+            except FileNotFoundError:
+                # A backfill switched segments between reading meta.json and the columns
+                if attempt == 2:
+                    raise
+
+    def import_csv(self, csv_path, ticker=None):
+        """
+        Append a saved ``<ticker>_daily.csv`` file
+
+        Args:
+            csv_path (str): Path to the CSV file
+            ticker (str, optional): Defaults to the file name prefix
+
+        Returns:
+            int: Number of rows appended
+        """
+        ticker = ticker or os.path.basename(csv_path).split("_")[0]
+        return self.append(ticker, pd.read_csv(csv_path))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """Return the process-wide price store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PriceStore()
+        return _store
+
+
+if __name__ == "__main__":
+    import sys
+
+    store = get_price_store()
+    if len(sys.argv) > 1:
+        ticker = sys.argv[1]
+        print(f"📊 {ticker.upper()}: {store.row_count(ticker)} rows, last date {store.last_date(ticker)}")
+        print(store.read(ticker).tail())
+    else:
+        for csv_path in sorted(glob.glob(os.path.join(ROOT_DIR, "*_daily.csv"))):
+            added = store.import_csv(csv_path)
+            print(f"✅ {os.path.basename(csv_path)}: {added} new rows")
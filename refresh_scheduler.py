@@ -0,0 +1,566 @@
+"""
+Background refresh of the tracked tickers.
+
+Every ticker with rows in ``stock_data`` has one job row in a SQLite file
+shared by the scheduler process and the Streamlit pages. A job holds the
+time of its next refresh, so requests for the same ticker coalesce into a
+single row and a restarted scheduler picks up where it stopped instead of
+refreshing everything again.
+
+Refreshes follow the market calendar. Only daily bars are stored and a
+day's bar is final only after the close, so each ticker is refreshed once
+per trading day, shortly after the close, spread over ``refresh_interval``
+minutes by a random jitter so tickers do not all hit Alpha Vantage in the
+same second. Due tickers are loaded through the ``bulk_ingest`` pipeline;
+tickers that already hold the last completed session are skipped without
+an API call, and failed ones are retried with exponential backoff. A ticker
+whose bar is still missing (not published yet, or the stock was halted) is
+retried a few times and then left until the next session.
+
+The Settings page stores ``auto_refresh`` and ``refresh_interval`` here and
+the Dashboard queues refreshes of the selected tickers. The pages only read
+the refreshed rows from the database; cache invalidation after each write
+reaches them through the marker files in ``utils.cache``.
+
+Usage:
+    python refresh_scheduler.py                 # run until interrupted
+    python refresh_scheduler.py --once          # refresh the due tickers and exit
+    python refresh_scheduler.py --status        # show the job table
+    python refresh_scheduler.py --request AAPL  # queue an immediate refresh
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from av_cache import get_response_cache
+from bulk_ingest import ingest
+from update_stock_table import latest_stored_dates, plan_refresh
+from utils.cache import cached_resource
+from utils.db import connection
+from utils.market_calendar import (EASTERN, is_trading_day, last_completed_session, next_trading_day, now_eastern,
+                                   session_close)
+from utils.metrics import increment, serve_metrics, timed
+from utils.rate_limiter import get_rate_limiter
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEDULER_PATH = os.getenv("STOCKIE_SCHEDULER", os.path.join(ROOT_DIR, "data", "scheduler.sqlite"))
+
+DEFAULT_SETTINGS = {'auto_refresh': True, 'refresh_interval': 15}
+# Alpha Vantage publishes the final daily bar a little after the close
+SETTLE_MINUTES = 20
+# Tickers refreshed per pass
+BATCH_SIZE = 25
+# A claimed job whose scheduler died is handed out again after this long
+LEASE_SECONDS = 30 * 60
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+# A refresh that still lacks the last completed session (bar not published
+# yet) is retried this soon, backing off like a failure after that, and
+# given up for the session after this many attempts (halted or delisted)
+STALE_RETRY_SECONDS = 5 * 60
+MAX_STALE_ATTEMPTS = 5
+# Longest sleep between passes, so new settings and requests are noticed
+POLL_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    ticker TEXT PRIMARY KEY,
+    next_run REAL NOT NULL,
+    lease_until REAL NOT NULL DEFAULT 0,
+    last_run REAL,
+    last_success REAL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    stale_session TEXT,
+    stale_attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_next_run ON jobs (next_run);
+CREATE TABLE IF NOT EXISTS state (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def next_refresh(now, interval_minutes, rng=random):
+    """
+    Time of the next refresh after a run at ``now``
+
+    This is ``SETTLE_MINUTES`` after the close of today's session if that is
+    still ahead, otherwise after the close of the next trading day; runs
+    during the session would find the same bars as the last one. A random
+    jitter of up to ``interval_minutes`` is added.
+
+    Args:
+        now (datetime): Aware datetime of the run
+        interval_minutes (int): Window the post-close refreshes are spread over
+        rng (random.Random, optional): Source of the jitter
+
+    Returns:
+        datetime: Aware due time in the exchange time zone
+    """
+    now = now.astimezone(EASTERN)
+    settle = timedelta(minutes=SETTLE_MINUTES)
+    today = now.date()
+    if is_trading_day(today) and now < session_close(today) + settle:
+        due = session_close(today) + settle
+    else:
+        due = session_close(next_trading_day(today)) + settle
+    return due + timedelta(seconds=rng.uniform(0, interval_minutes * 60))
+
+
+def retry_delay(failures, base=RETRY_BASE_SECONDS):
+    """Seconds before retrying a job that has failed ``failures`` times in a row"""
+    return min(RETRY_MAX_SECONDS, base * 2 ** max(0, failures - 1))
+
+
+class RefreshStore:
+    """SQLite table of per-ticker refresh jobs plus the refresh settings"""
+
+    def __init__(self, path=SCHEDULER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "stale_session" not in columns:
+            # Job tables created before stale retries were capped
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN stale_session TEXT")
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN stale_attempts INTEGER NOT NULL DEFAULT 0")
+
+    def _bump(self, name, amount=1):
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def _set_state(self, name, value):
+        self._conn.execute(
+            "INSERT INTO state (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, json.dumps(value)),
+        )
+
+    def settings(self):
+        """Return ``auto_refresh`` and ``refresh_interval`` (minutes)"""
+        with self._lock:
+            rows = dict(self._conn.execute("SELECT name, value FROM state").fetchall())
+        return {name: json.loads(rows[name]) if name in rows else default
+                for name, default in DEFAULT_SETTINGS.items()}
+
+    def save_settings(self, auto_refresh=None, refresh_interval=None):
+        """Persist new refresh settings; the scheduler reads them on its next pass"""
+        with self._lock:
+            if auto_refresh is not None:
+                self._set_state('auto_refresh', bool(auto_refresh))
+            if refresh_interval is not None:
+                self._set_state('refresh_interval', int(refresh_interval))
+
+    def heartbeat(self, now=None):
+        """Record that a scheduler process is alive"""
+        with self._lock:
+            self._set_state('heartbeat', now or time.time())
+
+    def track(self, tickers, now=None, spread_seconds=0, rng=random):
+        """
+        Make the job table match the tracked tickers
+
+        New tickers become due within ``spread_seconds`` of ``now``; jobs of
+        tickers no longer tracked are dropped unless currently claimed.
+
+        Returns:
+            int: Number of tickers added
+        """
+        now = now or time.time()
+        tickers = {t.upper() for t in tickers}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                known = {row[0] for row in self._conn.execute("SELECT ticker FROM jobs")}
+                added = sorted(tickers - known)
+                self._conn.executemany(
+                    "INSERT INTO jobs (ticker, next_run) VALUES (?, ?)",
+                    [(t, now + rng.uniform(0, spread_seconds)) for t in added],
+                )
+                self._conn.executemany(
+                    "DELETE FROM jobs WHERE ticker = ? AND lease_until <= ?",
+                    [(t, now) for t in known - tickers],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(added)
+
+    def request(self, tickers, now=None):
+        """
+        Ask for an immediate refresh of ``tickers``
+
+        Requests coalesce: a ticker that is already due or being refreshed
+        keeps its single job, so it is fetched once however often it is asked for.
+        """
+        now = now or time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO jobs (ticker, next_run) VALUES (?, ?) "
+                "ON CONFLICT(ticker) DO UPDATE SET next_run = MIN(next_run, excluded.next_run)",
+                [(t.upper(), now) for t in tickers],
+            )
+            self._bump('requests', len(tickers))
+
+    def claim_due(self, now=None, limit=BATCH_SIZE):
+        """
+        Lease up to ``limit`` due jobs, most overdue first
+
+        A leased job is not handed out again until it is finished, released
+        or its lease expires, so several scheduler processes can share the table.
+
+        Returns:
+            list: Claimed tickers
+        """
+        now = now or time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                tickers = [row[0] for row in self._conn.execute(
+                    "SELECT ticker FROM jobs WHERE next_run <= ? AND lease_until <= ? ORDER BY next_run LIMIT ?",
+                    (now, now, limit),
+                )]
+                self._conn.executemany(
+                    "UPDATE jobs SET lease_until = ?, last_run = ? WHERE ticker = ?",
+                    [(now + LEASE_SECONDS, now, t) for t in tickers],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return tickers
+
+    def finish(self, ticker, next_run, error=None, now=None):
+        """
+        Release a claimed job and schedule its next run
+
+        On failure ``next_run`` is ignored and the job is retried after
+        ``retry_delay`` of its consecutive failure count.
+        """
+        now = now or time.time()
+        with self._lock:
+            if error is None:
+                # Requests that arrived during the refresh were served by it
+                self._conn.execute(
+                    "UPDATE jobs SET next_run = ?, lease_until = 0, last_success = ?, failures = 0, "
+                    "last_error = NULL WHERE ticker = ?",
+                    (next_run, now, ticker),
+                )
+            else:
+                failures = (self._conn.execute("SELECT failures FROM jobs WHERE ticker = ?",
+                                               (ticker,)).fetchone() or (0,))[0] + 1
+                self._conn.execute(
+                    "UPDATE jobs SET next_run = ?, lease_until = 0, failures = ?, last_error = ? WHERE ticker = ?",
+                    (now + retry_delay(failures), failures, str(error)[:500], ticker),
+                )
+
+    def finish_stale(self, ticker, session, next_run, now=None):
+        """
+        Release a claimed job whose refresh still lacks the bar for ``session``
+
+        It is retried like a failure, starting after ``STALE_RETRY_SECONDS``,
+        at most ``MAX_STALE_ATTEMPTS`` times per session: a halted or
+        delisted ticker never gets the bar, and every retry is an API call.
+        After that it waits for ``next_run``, the next post-close refresh.
+
+        Returns:
+            bool: True if the job gave up on the session
+        """
+        now = now or time.time()
+        session = str(session)
+        with self._lock:
+            failures, stale_session, attempts = self._conn.execute(
+                "SELECT failures, stale_session, stale_attempts FROM jobs WHERE ticker = ?", (ticker,)
+            ).fetchone() or (0, None, 0)
+            attempts = attempts + 1 if stale_session == session else 1
+            gave_up = attempts >= MAX_STALE_ATTEMPTS
+            if gave_up:
+                failures = 0
+                error = f"No bar for {session} after {attempts} attempts; waiting for the next session"
+            else:
+                failures += 1
+                next_run = now + retry_delay(failures, STALE_RETRY_SECONDS)
+                error = f"Bar for {session} not published yet"
+            self._conn.execute(
+                "UPDATE jobs SET next_run = ?, lease_until = 0, failures = ?, last_error = ?, stale_session = ?, "
+                "stale_attempts = ? WHERE ticker = ?",
+                (next_run, failures, error, session, attempts, ticker),
+            )
+        return gave_up
+
+    def release(self, tickers):
+        """Hand claimed jobs back unchanged, e.g. when the scheduler stops mid-pass"""
+        with self._lock:
+            self._conn.executemany("UPDATE jobs SET lease_until = 0 WHERE ticker = ?", [(t,) for t in tickers])
+
+    def next_due(self):
+        """Earliest ``next_run`` of an unclaimed job as a Unix time, or None"""
+        with self._lock:
+            return self._conn.execute("SELECT MIN(next_run) FROM jobs WHERE lease_until = 0").fetchone()[0]
+
+    def jobs(self):
+        """Every job as a dict, soonest first"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT ticker, next_run, lease_until, last_run, last_success, failures, last_error "
+                "FROM jobs ORDER BY next_run"
+            )
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def stats(self, now=None):
+        """Return job counts, the last refresh, the next due time and the scheduler heartbeat"""
+        now = now or time.time()
+        with self._lock:
+            tracked, due, running, failing, last_success, next_run = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(next_run <= ? AND lease_until <= ?), 0), "
+                "COALESCE(SUM(lease_until > ?), 0), COALESCE(SUM(failures > 0), 0), "
+                "MAX(last_success), MIN(next_run) FROM jobs",
+                (now, now, now),
+            ).fetchone()
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            heartbeat = self._conn.execute("SELECT value FROM state WHERE name = 'heartbeat'").fetchone()
+        return {
+            'tracked': tracked,
+            'due': due,
+            'running': running,
+            'failing': failing,
+            'last_success': last_success,
+            'next_run': next_run,
+            'heartbeat': json.loads(heartbeat[0]) if heartbeat else None,
+            'refreshed': counters.get('refreshed', 0),
+            'up_to_date': counters.get('up_to_date', 0),
+            'stale': counters.get('stale', 0),
+            'failed': counters.get('failed', 0),
+            'requests': counters.get('requests', 0),
+        }
+
+    def count(self, name, amount=1):
+        """Add to one of the persisted counters"""
+        with self._lock:
+            self._bump(name, amount)
+
+    def clear(self):
+        """Remove every job and reset the counters (settings are kept)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs")
+            self._conn.execute("DELETE FROM counters")
+
+
+@cached_resource
+def get_refresh_store():
+    """Return the process-wide refresh job store"""
+    return RefreshStore()
+
+
+def request_refresh(tickers):
+    """Queue an immediate background refresh of ``tickers`` without fetching anything"""
+    get_refresh_store().request(tickers)
+
+
+def tracked_companies():
+    """
+    Tickers with rows in ``stock_data`` and their stored name and exchange
+
+    Returns:
+        list: Dicts with ``ticker``, ``name`` and ``exchange``
+    """
+    with connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT ticker, MAX(name), MAX(exchange) FROM stock_data GROUP BY ticker ORDER BY ticker;")
+            return [{'ticker': t, 'name': name, 'exchange': exchange} for t, name, exchange in cur.fetchall()]
+
+
+def find_stale(tickers, now):
+    """
+    Refreshed tickers whose latest stored bar is still before the last completed session
+
+    Their cached API responses are dropped, so the retry asks Alpha Vantage
+    again instead of being served the same response until the next close.
+
+    Returns:
+        dict: Ticker -> the missing session date
+    """
+    if not tickers:
+        return {}
+    target = last_completed_session(now)
+    latest = latest_stored_dates(tickers)
+    stale = {t: target for t in tickers if latest.get(t) is None or latest[t] < target}
+    cache = get_response_cache()
+    for ticker in stale:
+        cache.discard("TIME_SERIES_DAILY", ticker)
+    return stale
+
+
+@timed("scheduled_refresh")
+def run_once(store=None, now=None, rng=random, fetch_workers=2, write_workers=1):
+    """
+    One scheduler pass: sync the tracked tickers and refresh the due ones
+
+    Args:
+        store (RefreshStore, optional): Job store; the shared one by default
+        now (datetime, optional): Aware datetime of the pass
+        rng (random.Random, optional): Source of the jitter
+        fetch_workers (int): Concurrent Alpha Vantage requests
+        write_workers (int): Concurrent database writers
+
+    Returns:
+        dict: Tickers ``claimed``, ``refreshed``, ``up_to_date``, ``stale``
+        (latest bar not published yet) and ``failed``
+    """
+    store = store or get_refresh_store()
+    now = (now or now_eastern()).astimezone(EASTERN)
+    interval = store.settings()['refresh_interval']
+    summary = {'claimed': 0, 'refreshed': 0, 'up_to_date': 0, 'stale': 0, 'failed': 0}
+
+    companies = {c['ticker'].upper(): c for c in tracked_companies()}
+    store.track(companies, now.timestamp(), spread_seconds=interval * 60, rng=rng)
+    claimed = store.claim_due(now.timestamp())
+    # Tickers deleted from stock_data by another process since the sync
+    store.release([t for t in claimed if t not in companies])
+    claimed = [t for t in claimed if t in companies]
+    if not claimed:
+        return summary
+    summary['claimed'] = len(claimed)
+
+    timestamp = now.timestamp()
+    pending = list(claimed)
+    try:
+        plan = plan_refresh(claimed, now)
+        current = [t for t in claimed if plan[t] is None]
+        for ticker in current:
+            store.finish(ticker, next_refresh(now, interval, rng).timestamp(), now=timestamp)
+            pending.remove(ticker)
+        summary['up_to_date'] = len(current)
+
+        batch = [dict(companies[t], output_size=plan[t]) for t in pending]
+        stats = ingest(batch, fetch_workers=fetch_workers, write_workers=write_workers) if batch else None
+        # A failed price store update still leaves the database refreshed
+        errors = {ticker: error for ticker, stage, error in (stats.failures if stats else ())
+                  if stage != "store" and ticker in pending}
+        stale = find_stale([t for t in pending if t not in errors], now)
+        for ticker in list(pending):
+            if ticker in stale:
+                if store.finish_stale(ticker, stale[ticker], next_refresh(now, interval, rng).timestamp(),
+                                      now=timestamp):
+                    print(f"⚠️ {ticker}: no bar for {stale[ticker]}, giving up until the next session")
+            else:
+                store.finish(ticker, next_refresh(now, interval, rng).timestamp(), errors.get(ticker),
+                             now=timestamp)
+            pending.remove(ticker)
+        summary['failed'] = len(errors)
+        summary['stale'] = len(stale)
+        summary['refreshed'] = len(batch) - len(errors) - len(stale)
+    except Exception as e:
+        # Database unreachable or similar: retry every remaining ticker with backoff
+        for ticker in pending:
+            store.finish(ticker, None, e, now=timestamp)
+        summary['failed'] += len(pending)
+        pending = []
+        print(f"❌ Refresh pass failed: {e}")
+    finally:
+        # Interrupted mid-pass: hand the rest back so the next start resumes them
+        store.release(pending)
+    for name in ('refreshed', 'up_to_date', 'stale', 'failed'):
+        store.count(name, summary[name])
+    increment("scheduled_refreshes", summary['refreshed'])
+    return summary
+
+
+def run_forever(store=None, fetch_workers=2, write_workers=1):
+    """Run scheduler passes until interrupted, sleeping until the next job is due"""
+    store = store or get_refresh_store()
+    rng = random.Random()
+    while True:
+        store.heartbeat()
+        if store.settings()['auto_refresh']:
+            summary = run_once(store, rng=rng, fetch_workers=fetch_workers, write_workers=write_workers)
+            if summary['claimed']:
+                print(f"🔄 {datetime.now(EASTERN):%Y-%m-%d %H:%M} refreshed {summary['refreshed']}, "
+                      f"up to date {summary['up_to_date']}, not published yet {summary['stale']}, "
+                      f"failed {summary['failed']}")
+                # More jobs may be due already
+                continue
+        next_due = store.next_due()
+        wait = POLL_SECONDS if next_due is None else max(1.0, min(POLL_SECONDS, next_due - time.time()))
+        time.sleep(wait)
+
+
+def print_status(store):
+    """Print the settings, counters and every job"""
+    stats = store.stats()
+    settings = store.settings()
+
+    def fmt(timestamp):
+        return datetime.fromtimestamp(timestamp, EASTERN).strftime("%Y-%m-%d %H:%M:%S") if timestamp else "-"
+
+    state = f"after each close, spread over {settings['refresh_interval']} min" if settings['auto_refresh'] else "off"
+    print(f"⏰ Auto-refresh: {state}; scheduler last seen {fmt(stats['heartbeat'])}")
+    print(f"📋 {stats['tracked']} tracked, {stats['due']} due, {stats['running']} running, {stats['failing']} failing")
+    print(f"   refreshed {stats['refreshed']}, up to date {stats['up_to_date']}, "
+          f"not published yet {stats['stale']}, failed {stats['failed']}, requests {stats['requests']}")
+    for job in store.jobs():
+        error = f"  ❌ {job['last_error']}" if job['last_error'] else ""
+        print(f"   {job['ticker']:<8} next {fmt(job['next_run'])}  last ok {fmt(job['last_success'])}{error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh tracked tickers on a market-hours schedule")
+    parser.add_argument("--once", action="store_true", help="Refresh the due tickers once and exit")
+    parser.add_argument("--status", action="store_true", help="Show the job table and exit")
+    parser.add_argument("--request", nargs="+", metavar="TICKER", help="Queue an immediate refresh and exit")
+    parser.add_argument("--fetch-workers", type=int, default=2)
+    parser.add_argument("--write-workers", type=int, default=1)
+    parser.add_argument("--calls-per-minute", type=int, help="Alpha Vantage tier limit (5, 75, 300 or 600), shared by every process")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while running")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Interface for --metrics-port (default: local only)")
+    args = parser.parse_args()
+
+    store = get_refresh_store()
+    if args.status:
+        print_status(store)
+        return
+    if args.request:
+        store.request(args.request)
+        print(f"📥 Queued {', '.join(t.upper() for t in args.request)}")
+        return
+
+    if args.calls_per_minute:
+        get_rate_limiter().set_rate(args.calls_per_minute)
+    if args.metrics_port:
+        serve_metrics(args.metrics_port, args.metrics_host)
+        print(f"📈 Metrics on http://{args.metrics_host}:{args.metrics_port}/metrics")
+
+    if args.once:
+        print(run_once(store, fetch_workers=args.fetch_workers, write_workers=args.write_workers))
+        return
+    print(f"⏰ Refresh scheduler started ({store.path})")
+    try:
+        run_forever(store, args.fetch_workers, args.write_workers)
+    except KeyboardInterrupt:
+        print("👋 Scheduler stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+Diff-only refresh of the ``Company_ticker_all`` master table.
+
+The SEC ticker file (``company_tickers_exchange.json``, a ``fields``/``data``
+document of about 10k rows) is parsed as a stream, one record at a time.
+Rows are keyed by ``(cik, ticker)`` (one CIK can list several tickers) and
+compared with the table through an MD5 of their name and exchange, which
+Postgres computes so only keys and hashes cross the wire. New, changed and
+delisted rows are staged with COPY and merged with one UPDATE, INSERT and
+DELETE in a single transaction, so a daily refresh touches only the rows
+that changed. Afterwards the ticker search index is rebuilt in every
+process.
+
+Usage:
+    python refresh_ticker_master.py                      # from company_tickers_exchange.json
+    python refresh_ticker_master.py --file other.json --dry-run   # diff another file
+    python refresh_ticker_master.py --url                # download from the SEC first
+    python refresh_ticker_master.py --dry-run            # show the diff, change nothing
+    python refresh_ticker_master.py --force              # apply even a suspiciously large delisting
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from json.scanner import make_scanner
+
+from utils.cache import TICKER_MASTER_TAG, invalidate_tag
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Also the file the ticker search index is built from (ticker_index.DEFAULT_JSON_PATH)
+JSON_PATH = os.path.join(ROOT_DIR, "company_tickers_exchange.json")
+CSV_PATH = os.path.join(ROOT_DIR, "company_tickers_exchange.csv")
+SEC_URL = "https://www.sec.gov/files/company_tickers_exchange.json"
+# The SEC rejects requests without a descriptive User-Agent
+SEC_USER_AGENT = os.getenv("SEC_USER_AGENT", "stockie ticker refresh (set SEC_USER_AGENT to a contact email)")
+
+TABLE = '"Company_ticker_all"'
+COLUMNS = ('cik', 'name', 'ticker', 'exchange')
+CHUNK_CHARS = 64 * 1024
+# A day's delistings are a handful of rows; more than this points to a
+# truncated or partial file, which is refused unless forced
+MAX_DELETE_FRACTION = 0.05
+MIN_ROW_RATIO = 0.9
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+# Same expression on both sides: Python in row_hash, Postgres in fetch_current_hashes
+_HASH_SQL = "md5(coalesce(name, '') || chr(31) || coalesce(exchange, ''))"
+
+
+class _JsonStream:
+    """Pull-style reader of JSON values from text chunks"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._scan = make_scanner(self._decoder)
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ('' at the end)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in ticker JSON, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array_items(self):
+        """Yield the elements of the array at the current position one by one"""
+        self.expect("[")
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos == len(self.buffer):
+                if not self._fill():
+                    raise ValueError("Ticker JSON ended inside an array")
+                continue
+            char = self.buffer[self.pos]
+            if char == "]":
+                self.pos += 1
+                return
+            if char == ",":
+                self.pos += 1
+                continue
+            try:
+                value, end = self._scan(self.buffer, self.pos)
+            except (StopIteration, json.JSONDecodeError):
+                # Value cut off at the end of the buffer
+                if self._fill():
+                    continue
+                raise ValueError(f"Invalid value in ticker JSON at {self.buffer[self.pos:self.pos + 40]!r}")
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            yield value
+
+
+def iter_ticker_records(chunks):
+    """
+    Stream ``(cik, name, ticker, exchange)`` rows from the SEC fields/data JSON
+
+    Args:
+        chunks (iterable): Text chunks of the document
+
+    Yields:
+        tuple: One row per ``data`` record, in file order
+    """
+    stream = _JsonStream(chunks)
+    fields, pending = None, None
+
+    def to_row(record):
+        return tuple(record[i] if i is not None and i < len(record) else None for i in positions)
+
+    stream.expect("{")
+    while stream.peek() != "}":
+        key = stream.value()
+        stream.expect(":")
+        if key == "data" and fields is not None:
+            yield from (to_row(record) for record in stream.array_items())
+        elif key == "fields":
+            fields = stream.value()
+            positions = [fields.index(col) if col in fields else None for col in COLUMNS]
+        elif key == "data":
+            # "data" before "fields": has to be held until the columns are known
+            pending = stream.value()
+        else:
+            stream.value()
+        if stream.peek() == ",":
+            stream.pos += 1
+    if pending is not None:
+        if fields is None:
+            raise ValueError("Ticker JSON has no 'fields'")
+        yield from (to_row(record) for record in pending)
+
+
+def read_file_chunks(path, chunk_chars=CHUNK_CHARS):
+    """Yield a text file in chunks"""
+    with open(path, "r", encoding="utf-8") as file:
+        while True:
+            chunk = file.read(chunk_chars)
+            if not chunk:
+                return
+            yield chunk
+
+
+def download_chunks(url, save_to):
+    """Yield the downloaded document in chunks while saving it to ``save_to``"""
+    import requests
+
+    with requests.get(url, headers={"User-Agent": SEC_USER_AGENT}, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        with open(save_to, "w", encoding="utf-8") as file:
+            for chunk in response.iter_content(chunk_size=CHUNK_CHARS, decode_unicode=True):
+                file.write(chunk)
+                yield chunk
+
+
+def row_hash(name, exchange):
+    """MD5 of the mutable columns, matching ``_HASH_SQL``"""
+    return hashlib.md5(f"{name or ''}\x1f{exchange or ''}".encode("utf-8")).hexdigest()
+
+
+def collect_rows(records):
+    """
+    Clean streamed records into ``{(cik, ticker): row}``
+
+    Records without a ticker or CIK are dropped; if a key repeats, the
+    first (largest company in SEC order) wins.
+    """
+    rows = {}
+    for cik, name, ticker, exchange in records:
+        if not ticker or cik is None:
+            continue
+        ticker = str(ticker).strip()
+        name = str(name).strip() if name is not None else None
+        rows.setdefault((int(cik), ticker), (int(cik), name, ticker, exchange or None))
+    return rows
+
+
+def diff_rows(current, incoming):
+    """
+    Row-level diff between the table and the new file
+
+    Args:
+        current (dict): ``{(cik, ticker): hash}`` of the table
+        incoming (dict): ``{(cik, ticker): row}`` from ``collect_rows``
+
+    Returns:
+        dict: ``insert`` and ``update`` row lists, ``delete`` key list and
+        the ``unchanged`` count
+    """
+    diff = {'insert': [], 'update': [], 'delete': [], 'unchanged': 0}
+    for key, row in incoming.items():
+        known = current.get(key)
+        if known is None:
+            diff['insert'].append(row)
+        elif known != row_hash(row[1], row[3]):
+            diff['update'].append(row)
+        else:
+            diff['unchanged'] += 1
+    diff['delete'] = [key for key in current if key not in incoming]
+    return diff
+
+
+def check_diff(current_rows, parsed_rows, diff):
+    """
+    Return why a diff looks like it came from a truncated file, or None
+
+    Args:
+        current_rows (int): Rows in the table
+        parsed_rows (int): Rows parsed from the file
+        diff (dict): Output of ``diff_rows``
+    """
+    if not current_rows:
+        return None
+    if len(diff['delete']) > MAX_DELETE_FRACTION * current_rows:
+        return (f"{len(diff['delete'])} of {current_rows} rows would be deleted "
+                f"(limit {MAX_DELETE_FRACTION:.0%})")
+    if parsed_rows < MIN_ROW_RATIO * current_rows:
+        return f"the file has {parsed_rows} rows but the table has {current_rows}"
+    return None
+
+
+def fetch_current_hashes(cur):
+    """``{(cik, ticker): hash}`` of every row in the table"""
+    cur.execute(f"SELECT cik, ticker, {_HASH_SQL} FROM {TABLE} WHERE cik IS NOT NULL AND ticker IS NOT NULL;")
+    return {(int(cik), ticker): digest for cik, ticker, digest in cur.fetchall()}
+
+
+def _copy_rows(cur, stage, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cur.execute(f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {', '.join(columns)} FROM {TABLE} WITH NO DATA;")
+    cur.copy_expert(f"COPY {stage} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def apply_diff(cur, diff):
+    """
+    Stage the changed rows with COPY and merge them into the table
+
+    Runs on the caller's cursor so the merge commits or rolls back with the
+    rest of its transaction.
+
+    Returns:
+        dict: Rows ``inserted``, ``updated`` and ``deleted``
+    """
+    counts = {'inserted': 0, 'updated': 0, 'deleted': 0}
+    changed = diff['insert'] + diff['update']
+    if changed:
+        _copy_rows(cur, "ticker_master_stage", COLUMNS, changed)
+        cur.execute(f"""
+            UPDATE {TABLE} AS t SET name = s.name, exchange = s.exchange
+            FROM ticker_master_stage AS s
+            WHERE t.cik = s.cik AND t.ticker = s.ticker;
+        """)
+        counts['updated'] = cur.rowcount
+        cur.execute(f"""
+            INSERT INTO {TABLE} (cik, name, ticker, exchange)
+            SELECT s.cik, s.name, s.ticker, s.exchange FROM ticker_master_stage AS s
+            WHERE NOT EXISTS (SELECT 1 FROM {TABLE} AS t WHERE t.cik = s.cik AND t.ticker = s.ticker);
+        """)
+        counts['inserted'] = cur.rowcount
+    if diff['delete']:
+        _copy_rows(cur, "ticker_master_delist", ('cik', 'ticker'), diff['delete'])
+        cur.execute(f"""
+            DELETE FROM {TABLE} AS t USING ticker_master_delist AS d
+            WHERE t.cik = d.cik AND t.ticker = d.ticker;
+        """)
+        counts['deleted'] = cur.rowcount
+    return counts
+
+
+def write_csv(rows, csv_file_path=CSV_PATH):
+    """Rewrite the ticker CSV used by bulk ingestion, atomically"""
+    directory = os.path.dirname(os.path.abspath(csv_file_path))
+    with tempfile.NamedTemporaryFile("w", newline="", encoding="utf-8", dir=directory,
+                                     suffix=".csv", delete=False) as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+    os.replace(file.name, csv_file_path)
+
+
+def refresh_ticker_master(json_file_path=JSON_PATH, url=None, dry_run=False, force=False):
+    """
+    Bring ``Company_ticker_all`` in line with the SEC ticker file
+
+    The table is locked against concurrent writers while its hashes are
+    read and the diff is applied, all in one transaction.
+
+    Only a dry run may read another file than ``JSON_PATH``: the search
+    index of every process is rebuilt from ``JSON_PATH``, so applying
+    another file would leave search out of step with the table.
+
+    Args:
+        json_file_path (str): Ticker JSON to read, or to replace when ``url`` is given
+        url (str, optional): Download the file from here first
+        dry_run (bool): Compute and return the diff without writing anything
+        force (bool): Apply the diff even if ``check_diff`` flags it
+
+    Returns:
+        dict: ``parsed``, ``inserted``, ``updated``, ``deleted``, ``unchanged``,
+        ``seconds``, ``warning`` (from ``check_diff``) and, for a dry run,
+        the ``diff`` itself
+
+    Raises:
+        ValueError: The diff would delist too much of the table and ``force``
+            is not set, or a file other than ``JSON_PATH`` would be applied
+    """
+    from utils.db import connection
+
+    if not dry_run and os.path.realpath(json_file_path) != os.path.realpath(JSON_PATH):
+        raise ValueError(f"Only {os.path.basename(JSON_PATH)} can be applied, because the ticker search index is "
+                         f"built from it; copy {json_file_path} there or use --dry-run to inspect its diff.")
+
+    start = time.perf_counter()
+    download_path = None
+    if url:
+        download_path = f"{json_file_path}.download"
+        incoming = collect_rows(iter_ticker_records(download_chunks(url, download_path)))
+    else:
+        incoming = collect_rows(iter_ticker_records(read_file_chunks(json_file_path)))
+
+    try:
+        with connection() as conn:
+            with conn.cursor() as cur:
+                if not dry_run:
+                    cur.execute(f"LOCK TABLE {TABLE} IN SHARE ROW EXCLUSIVE MODE;")
+                current = fetch_current_hashes(cur)
+                diff = diff_rows(current, incoming)
+                warning = check_diff(len(current), len(incoming), diff)
+                if warning and not (dry_run or force):
+                    raise ValueError(f"Refusing to refresh {TABLE}: {warning}. "
+                                     "Check the source file, or pass force=True (--force) to apply anyway.")
+                counts = {'inserted': 0, 'updated': 0, 'deleted': 0} if dry_run else apply_diff(cur, diff)
+    except Exception:
+        if download_path and os.path.exists(download_path):
+            os.remove(download_path)
+        raise
+
+    summary = {'parsed': len(incoming), **counts, 'unchanged': diff['unchanged'],
+               'seconds': time.perf_counter() - start, 'warning': warning}
+    if dry_run:
+        summary['diff'] = diff
+        if download_path:
+            os.remove(download_path)
+        return summary
+
+    if download_path:
+        os.replace(download_path, json_file_path)
+    if download_path or any(counts.values()):
+        write_csv(incoming.values())
+        # Rebuild the search index here and tell the other processes
+        import ticker_index
+        invalidate_tag(TICKER_MASTER_TAG)
+        ticker_index.invalidate()
+        ticker_index.get_index()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff-only refresh of the Company_ticker_all table")
+    parser.add_argument("--file", default=JSON_PATH,
+                        help="Ticker JSON to diff; only the default can be applied (default: %(default)s)")
+    parser.add_argument("--url", nargs="?", const=SEC_URL, help="Download the ticker JSON first (default: SEC)")
+    parser.add_argument("--dry-run", action="store_true", help="Show the diff without changing anything")
+    parser.add_argument("--force", action="store_true",
+                        help=f"Apply even if more than {MAX_DELETE_FRACTION:.0%} of the rows would be deleted")
+    args = parser.parse_args()
+
+    try:
+        summary = refresh_ticker_master(args.file, args.url, args.dry_run, args.force)
+    except ValueError as e:
+        parser.exit(1, f"❌ {e}\n")
+    if summary['warning']:
+        print(f"⚠️ {summary['warning']}")
+    if args.dry_run:
+        diff = summary['diff']
+        print(f"🔍 {summary['parsed']} rows in file: {len(diff['insert'])} new, {len(diff['update'])} changed, "
+              f"{len(diff['delete'])} delisted, {diff['unchanged']} unchanged")
+        for label, rows in (("➕", diff['insert']), ("✏️", diff['update']), ("➖", diff['delete'])):
+            for row in rows[:10]:
+                print(f"   {label} {row}")
+        return
+    print(f"✅ Company_ticker_all refreshed in {summary['seconds']:.2f}s: {summary['inserted']} inserted, "
+          f"{summary['updated']} updated, {summary['deleted']} deleted, {summary['unchanged']} unchanged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Read queries over ``stock_data`` for the Streamlit pages.
+
+Price history is aggregated inside Postgres so that the number of rows sent
+to the browser stays bounded: short ranges return daily bars, longer ones
+weekly or monthly OHLCV bars built with ``date_trunc``. All selected
+tickers are fetched in a single query. Results are kept in the shared data
+cache until ingestion invalidates the affected tickers.
+"""
+
+from datetime import date
+
+import pandas as pd
+
+from utils.cache import STORED_TICKERS_TAG, cached_data, ticker_tag
+from utils.db import connection
+
+# Longest ranges (in days) served at each resolution
+DAILY_MAX_DAYS = 183
+WEEKLY_MAX_DAYS = 3 * 365
+
+HISTORY_COLUMNS = ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume', 'sessions']
+
+
+def choose_interval(start, end):
+    """
+    Pick the bar size for a date range
+
+    Args:
+        start (datetime.date): First date in the range
+        end (datetime.date): Last date in the range
+
+    Returns:
+        str: 'day', 'week' or 'month'
+    """
+    days = (end - start).days
+    if days <= DAILY_MAX_DAYS:
+        return "day"
+    if days <= WEEKLY_MAX_DAYS:
+        return "week"
+    return "month"
+
+
+@cached_data("stored_tickers", tags=lambda: (STORED_TICKERS_TAG,))
+def list_stored_tickers():
+    """Return every ticker that has rows in ``stock_data``"""
+    with connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT ticker FROM stock_data GROUP BY ticker ORDER BY ticker;")
+            return [row[0] for row in cur.fetchall()]
+
+
+def fetch_price_history(tickers, start, end, interval=None):
+    """
+    Fetch OHLCV bars for several tickers in one query
+
+    Open is the first open and close the last close of each bar, high/low are
+    the extremes, volume is summed and ``sessions`` counts the trading days
+    in the bar.
+
+    Args:
+        tickers (list): Stock symbols
+        start (datetime.date): First date to include
+        end (datetime.date): Last date to include
+        interval (str, optional): 'day', 'week' or 'month'; chosen from the range if omitted
+
+    Returns:
+        pandas.DataFrame: ``HISTORY_COLUMNS`` ordered by ticker and date
+    """
+    if not tickers:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    interval = interval or choose_interval(start, end)
+    tickers = tuple(sorted({t.upper() for t in tickers}))
+    # Copy so callers cannot modify the cached frame
+    return _fetch_price_history(tickers, start, end, interval).copy()
+
+
+@cached_data("price_history", tags=lambda tickers, start, end, interval: [ticker_tag(t) for t in tickers])
+def _fetch_price_history(tickers, start, end, interval):
+    query = """
+        SELECT ticker,
+               date_trunc(%(interval)s, date)::date AS period,
+               (array_agg(open ORDER BY date))[1] AS open,
+               MAX(high) AS high,
+               MIN(low) AS low,
+               (array_agg(close ORDER BY date DESC))[1] AS close,
+               SUM(volume) AS volume,
+               COUNT(*) AS sessions
+        FROM stock_data
+        WHERE ticker = ANY(%(tickers)s) AND date BETWEEN %(start)s AND %(end)s
+        GROUP BY ticker, period
+        ORDER BY ticker, period;
+    """
+    params = {'interval': interval, 'tickers': list(tickers), 'start': start, 'end': end}
+    with connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+    df = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+    df['date'] = pd.to_datetime(df['date'])
+    df[['open', 'high', 'low', 'close']] = df[['open', 'high', 'low', 'close']].astype(float)
+    df[['volume', 'sessions']] = df[['volume', 'sessions']].astype('int64')
+    return df
+
+
+def summarize_history(history):
+    """
+    Per-ticker summary of a history frame
+
+    Args:
+        history (pandas.DataFrame): Output of ``fetch_price_history``
+
+    Returns:
+        pandas.DataFrame: Stock, Current Price, Change (%), Avg Volume, Last Date
+    """
+    rows = []
+    for ticker, bars in history.groupby('ticker', sort=True):
+        first_open = bars['open'].iloc[0]
+        last_close = bars['close'].iloc[-1]
+        rows.append({
+            'Stock': ticker,
+            'Current Price': round(last_close, 2),
+            'Change (%)': round((last_close / first_open - 1) * 100, 2) if first_open else None,
+            'Avg Volume': int(bars['volume'].sum() / bars['sessions'].sum()),
+            'Last Date': bars['date'].iloc[-1].date(),
+        })
+    return pd.DataFrame(rows, columns=['Stock', 'Current Price', 'Change (%)', 'Avg Volume', 'Last Date'])
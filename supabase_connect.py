@@ -1,6 +1,14 @@
-import supabase
+"""
+Supabase clients, created on first use
+
+Importing this module does no network I/O. ``supabase_anon`` and
+``supabase_admin`` are still importable as module attributes; they are
+resolved through the factories the first time they are accessed.
+"""
+
 from dotenv import load_dotenv
 import os
+from utils.cache import cached_resource
 
 load_dotenv()
 
@@ -8,12 +16,38 @@ url = os.getenv("supabaseURL")
 key = os.getenv("supabaseKey")
 service_key = os.getenv("supabaseServiceKey")
 
-supabase_anon = supabase.create_client(url, key)
-supabase_admin = supabase.create_client(url, service_key)
+@cached_resource
+def get_supabase_anon():
+    """Supabase client with the anon key, created once per process"""
+    import supabase
+    return supabase.create_client(url, key)
+
+@cached_resource
+def get_supabase_admin():
+    """Supabase client with the service key, created once per process"""
+    import supabase
+    return supabase.create_client(url, service_key)
+
+_LAZY_ATTRIBUTES = {
+    'supabase_anon': get_supabase_anon,
+    'supabase_admin': get_supabase_admin,
+}
+
+def __getattr__(name):
+    # Keeps `from supabase_connect import supabase_anon` working without
+    # creating the clients at import time
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    if name == "supabase":
+        import supabase
+        return supabase
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-print(supabase_anon )
-print(supabase_admin)
 
-res = supabase_anon.table("Company_ticker_all").select("*").limit(1).execute()
-print("Anon read result:", res.data)
+if __name__ == "__main__":
+    supabase_anon = get_supabase_anon()
+    print(supabase_anon)
+    print(get_supabase_admin())
 
+    res = supabase_anon.table("Company_ticker_all").select("*").limit(1).execute()
+    print("Anon read result:", res.data)
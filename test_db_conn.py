@@ -1,18 +1,12 @@
-import os
-import psycopg2
-from dotenv import load_dotenv
-
-load_dotenv()
-
-url = os.getenv("SUPABASE_DB_URL1")
-assert url, "SUPABASE_DB_URL missing"
+from utils.db import get_pool
 
 try:
-    conn = psycopg2.connect(url)
-    print("✅ Successfully connected to Supabase Postgres DB")
-    cur = conn.cursor()
-    cur.execute("SELECT NOW();")
-    print("Current time:", cur.fetchone()[0])
-    conn.close()
+    pool = get_pool()
+    with pool.connection() as conn:
+        print("✅ Successfully connected to Supabase Postgres DB")
+        cur = conn.cursor()
+        cur.execute("SELECT NOW();")
+        print("Current time:", cur.fetchone()[0])
+    print("Pool health check:", "✅ OK" if pool.health_check() else "❌ Failed")
 except Exception as e:
     print("❌ Connection failed:", e)
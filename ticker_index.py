@@ -0,0 +1,264 @@
+"""
+In-memory search index over the company ticker master list.
+
+The index is built once from ``company_tickers_exchange.json`` (or the
+``Company_ticker_all`` table when the file is not available) and answers
+type-ahead queries without a database round trip. Matching uses prefix
+indexes over ticker, CIK and name tokens, with a trigram index over names as
+a fallback for misspellings.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from heapq import nlargest
+
+from utils.cache import TICKER_MASTER_TAG, tag_invalidated_at
+
+DEFAULT_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "company_tickers_exchange.json")
+TABLE_RELOAD_SECONDS = 3600
+MAX_PREFIX = 12
+MAX_CANDIDATES = 200
+MAX_GRAM_POSTING = 1000
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """Lowercase ``text`` and collapse punctuation/whitespace to single spaces"""
+    return _NON_ALNUM.sub(" ", str(text).lower()).strip()
+
+
+def _trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TickerIndex:
+    """
+    Prefix and trigram index over ``(cik, name, ticker, exchange)`` rows
+
+    Rows are kept in source order, which for the SEC file is roughly by
+    market cap, so ties are broken in favour of larger companies.
+    """
+
+    def __init__(self, rows, source=None, source_mtime=None):
+        self.rows = []
+        self.source = source
+        self.source_mtime = source_mtime
+        self.loaded_at = time.time()
+
+        self._names = []
+        self._tokens = []
+        self._tickers = []
+        self._ticker_prefix = {}
+        self._cik_prefix = {}
+        self._token_prefix = {}
+        self._grams = {}
+
+        for cik, name, ticker, exchange in rows:
+            if not ticker or not name:
+                continue
+            row_id = len(self.rows)
+            self.rows.append({'cik': cik, 'ticker': ticker, 'exchange': exchange, 'name': name})
+
+            name_norm = normalize(name)
+            tokens = name_norm.split()
+            ticker_key = normalize(ticker).replace(" ", "")
+            self._names.append(name_norm)
+            self._tokens.append(tokens)
+            self._tickers.append(ticker_key)
+
+            for i in range(1, min(len(ticker_key), MAX_PREFIX) + 1):
+                self._ticker_prefix.setdefault(ticker_key[:i], []).append(row_id)
+            cik_key = str(cik)
+            for i in range(1, len(cik_key) + 1):
+                self._cik_prefix.setdefault(cik_key[:i], []).append(row_id)
+            seen = set()
+            for token in tokens:
+                for i in range(1, min(len(token), MAX_PREFIX) + 1):
+                    prefix = token[:i]
+                    if prefix not in seen:
+                        seen.add(prefix)
+                        self._token_prefix.setdefault(prefix, []).append(row_id)
+            for gram in _trigrams(name_norm):
+                self._grams.setdefault(gram, []).append(row_id)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @classmethod
+    def from_json(cls, json_file_path=DEFAULT_JSON_PATH):
+        """
+        Build an index from the SEC ``company_tickers_exchange.json`` file
+
+        Args:
+            json_file_path (str): Path to the fields/data JSON file
+
+        Returns:
+            TickerIndex: Index tagged with the file's modification time
+        """
+        mtime = os.path.getmtime(json_file_path)
+        with open(json_file_path, 'r') as file:
+            data = json.load(file)
+        fields = data.get('fields', [])
+        positions = [fields.index(col) for col in ('cik', 'name', 'ticker', 'exchange')]
+        rows = ([record[p] for p in positions] for record in data.get('data', []))
+        return cls(rows, source=json_file_path, source_mtime=mtime)
+
+    @classmethod
+    def from_supabase(cls, client):
+        """
+        Build an index from the ``Company_ticker_all`` table
+
+        Args:
+            client: Supabase client used to read the table
+
+        Returns:
+            TickerIndex: Index over every row of the table
+        """
+        rows = []
+        page_size = 1000
+        start = 0
+        while True:
+            value = client.table("Company_ticker_all").select("cik,name,ticker,exchange").range(start, start + page_size - 1).execute()
+            rows.extend((r['cik'], r['name'], r['ticker'], r['exchange']) for r in value.data)
+            if len(value.data) < page_size:
+                break
+            start += page_size
+        return cls(rows, source="Company_ticker_all")
+
+    def _score_candidates(self, query, ticker_key, tokens):
+        scores = {}
+
+        def add(row_id, points):
+            scores[row_id] = scores.get(row_id, 0) + points
+
+        # Ticker and CIK prefixes
+        for row_id in self._ticker_prefix.get(ticker_key, [])[:MAX_CANDIDATES]:
+            add(row_id, 100 if self._tickers[row_id] == ticker_key else 60)
+        if ticker_key.isdigit():
+            for row_id in self._cik_prefix.get(ticker_key, [])[:MAX_CANDIDATES]:
+                add(row_id, 100 if str(self.rows[row_id]['cik']) == ticker_key else 50)
+
+        # Every query token must prefix-match some name token
+        if tokens:
+            postings = sorted((self._token_prefix.get(t[:MAX_PREFIX], []) for t in tokens), key=len)
+            matched = 0
+            for row_id in postings[0]:
+                row_tokens = self._tokens[row_id]
+                if all(any(rt.startswith(t) for rt in row_tokens) for t in tokens):
+                    bonus = 20 if self._names[row_id].startswith(query) else 0
+                    add(row_id, 40 + bonus)
+                    matched += 1
+                    if matched >= MAX_CANDIDATES:
+                        break
+
+        # Substring match anywhere in the name, like ILIKE '%query%'
+        inner = [query[i:i + 3] for i in range(len(query) - 2)]
+        if inner:
+            rarest = min(inner, key=lambda g: len(self._grams.get(g, ())))
+            matched = 0
+            for row_id in self._grams.get(rarest, ()):
+                if query in self._names[row_id]:
+                    add(row_id, 30)
+                    matched += 1
+                    if matched >= MAX_CANDIDATES:
+                        break
+        return scores
+
+    def _score_trigrams(self, query):
+        # Only the rarest grams are counted; very common ones carry little signal
+        grams = sorted(_trigrams(query), key=lambda g: len(self._grams.get(g, ())))[:6]
+        counts = {}
+        for gram in grams:
+            for row_id in self._grams.get(gram, ())[:MAX_GRAM_POSTING]:
+                counts[row_id] = counts.get(row_id, 0) + 1
+        return {row_id: 20.0 * hits / len(grams) for row_id, hits in counts.items() if hits >= 2}
+
+    def search(self, query, k=5):
+        """
+        Return the top ``k`` rows matching ``query``
+
+        Args:
+            query (str): Company name, ticker or CIK fragment
+            k (int): Maximum number of matches to return
+
+        Returns:
+            list: Row dicts with ``cik``, ``ticker``, ``exchange`` and ``name``
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        ticker_key = query.replace(" ", "")
+        scores = self._score_candidates(query, ticker_key, query.split())
+        if len(scores) < k:
+            for row_id, points in self._score_trigrams(query).items():
+                scores.setdefault(row_id, points)
+
+        # Higher score first, then source order
+        best = nlargest(k, scores, key=lambda row_id: (scores[row_id], -row_id))
+        return [self.rows[row_id] for row_id in best]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _is_stale(index, json_file_path):
+    if index is None:
+        return True
+    # Set by refresh_ticker_master in whichever process applied a change
+    if tag_invalidated_at(TICKER_MASTER_TAG) > index.loaded_at:
+        return True
+    if index.source == json_file_path:
+        try:
+            return os.path.getmtime(json_file_path) != index.source_mtime
+        except OSError:
+            return False
+    return time.time() - index.loaded_at > TABLE_RELOAD_SECONDS
+
+
+def get_index(json_file_path=DEFAULT_JSON_PATH):
+    """
+    Return the shared index, rebuilding it when the source data has changed
+
+    The JSON file is preferred; the ``Company_ticker_all`` table is used when
+    the file is missing and is re-read every ``TABLE_RELOAD_SECONDS``. Any
+    process rebuilds after ``refresh_ticker_master`` applies a change.
+    """
+    global _index
+    index = _index
+    if not _is_stale(index, json_file_path):
+        return index
+    with _index_lock:
+        if _is_stale(_index, json_file_path):
+            if os.path.exists(json_file_path):
+                _index = TickerIndex.from_json(json_file_path)
+            else:
+                from supabase_connect import get_supabase_anon
+                _index = TickerIndex.from_supabase(get_supabase_anon())
+        return _index
+
+
+def invalidate():
+    """Drop the shared index so the next search rebuilds it"""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    index = get_index()
+    print(f"Built index over {len(index)} companies in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for q in ["soft", "NVDA", "apple inc", "tesla", "microsft", "320193"]:
+        runs = 1000
+        start = time.perf_counter()
+        for _ in range(runs):
+            results = index.search(q)
+        elapsed_us = (time.perf_counter() - start) / runs * 1e6
+        print(f"{q!r}: {elapsed_us:.0f} µs -> {[r['ticker'] for r in results]}")
@@ -1,19 +1,25 @@
-from supabase_connect import supabase, supabase_admin, supabase_anon
 from get_ticker import get_ticker
 from import_stock import fetch_stock_data, save_stock_data
-import json
+from price_store import get_price_store
+from indicators import refresh_indicator_state
+import io
 import pandas as pd
 import os
-import psycopg2
-from psycopg2 import connect
 from psycopg2.extras import execute_values
 from dotenv import load_dotenv
+from utils.db import connection
+from utils.cache import invalidate_ticker
+from utils.metrics import increment, timed
+from utils.market_calendar import last_completed_session, trading_days_between
 
 load_dotenv()
 
-DB_URL = os.getenv("SUPABASE_DB_URL1")
-assert DB_URL, "Missing SUPABASE_DB_URL in .env"
+STOCK_COLUMNS = ['ticker', 'date', 'exchange', 'name', 'open', 'high', 'low', 'close', 'volume']
 
+# Alpha Vantage 'compact' responses hold the latest 100 sessions
+COMPACT_SESSIONS = 100
+
+@timed()
 def insert_stock_data(ticker: str, name: str, exchange: str):
     ticker = ticker.upper()
     csv_path = f"{ticker.lower()}_daily.csv"
@@ -25,6 +31,29 @@ def insert_stock_data(ticker: str, name: str, exchange: str):
     print(f"\nLoading {csv_path} into Supabase...")
 
     df = pd.read_csv(csv_path)
+    rows = prepare_stock_rows(df, ticker, name, exchange)
+
+    # Insert into Supabase
+    try:
+        inserted = write_stock_rows(rows)
+        print(f"✅ Inserted {inserted} new rows for {ticker}")
+    except Exception as e:
+        print(f"❌ Failed to insert for {ticker}: {e}")
+
+def prepare_stock_frame(df, ticker: str, name: str, exchange: str):
+    """
+    Normalize a daily price DataFrame to the ``stock_data`` columns
+
+    Args:
+        df (pandas.DataFrame): Daily prices with Alpha Vantage or plain column names
+        ticker (str): Stock symbol
+        name (str): Company name
+        exchange (str): Listing exchange
+
+    Returns:
+        pandas.DataFrame: Frame in ``stock_data`` column order, undated rows dropped
+    """
+    df = df.copy()
 
     # Clean and prepare data
     df.columns = [c.strip().lower() for c in df.columns]
@@ -39,37 +68,180 @@ def insert_stock_data(ticker: str, name: str, exchange: str):
 
     required = ['date', 'open', 'high', 'low', 'close', 'volume']
     df = df[required]
-    df['ticker'] = ticker
+    df['ticker'] = ticker.upper()
     df['name'] = name
     df['exchange'] = exchange
     df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.date
 
     # Ensure correct column order for insertion
-    df = df[['ticker', 'date', 'exchange', 'name', 'open', 'high', 'low', 'close', 'volume']]
-    rows = df.dropna(subset=['date']).to_records(index=False).tolist()
+    df = df[STOCK_COLUMNS]
+    return df.dropna(subset=['date'])
 
-    # Insert into Supabase
-    inserted = 0
-    try:
-        with connect(DB_URL) as conn:
-            with conn.cursor() as cur:
-                insert_query = """
-                    INSERT INTO stock_data (ticker, date, exchange, name, open, high, low, close, volume)
-                    VALUES %s
-                    ON CONFLICT (ticker, date) DO NOTHING;
-                """
-                execute_values(cur, insert_query, rows, page_size=500)
-                inserted = cur.rowcount
-            conn.commit()
-        print(f"✅ Inserted {inserted} new rows for {ticker}")
-    except Exception as e:
-        print(f"❌ Failed to insert for {ticker}: {e}")
+def prepare_stock_rows(df, ticker: str, name: str, exchange: str):
+    """
+    Normalize a daily price DataFrame into ``stock_data`` row tuples
+
+    Args:
+        df (pandas.DataFrame): Daily prices with Alpha Vantage or plain column names
+        ticker (str): Stock symbol
+        name (str): Company name
+        exchange (str): Listing exchange
+
+    Returns:
+        list: Tuples in ``stock_data`` column order
+    """
+    return prepare_stock_frame(df, ticker, name, exchange).to_records(index=False).tolist()
+
+@timed()
+def write_stock_rows(rows):
+    """
+    Insert ``stock_data`` row tuples, skipping dates that already exist
+
+    Args:
+        rows (list): Tuples from ``prepare_stock_rows``
 
-def process_stock(company_name):
+    Returns:
+        int: Number of rows inserted
+    """
+    with connection() as conn:
+        with conn.cursor() as cur:
+            insert_query = """
+                INSERT INTO stock_data (ticker, date, exchange, name, open, high, low, close, volume)
+                VALUES %s
+                ON CONFLICT (ticker, date) DO NOTHING
+                RETURNING 1;
+            """
+            # cur.rowcount only covers the last page; count the returned rows instead
+            inserted = len(execute_values(cur, insert_query, rows, page_size=500, fetch=True))
+    increment("rows_inserted", inserted, method="execute_values")
+    if inserted:
+        for ticker in {row[0] for row in rows}:
+            invalidate_ticker(ticker)
+    return inserted
+
+@timed()
+def copy_stock_frame(frame):
+    """
+    Bulk load a prepared ``stock_data`` frame with COPY
+
+    Rows are streamed from an in-memory CSV buffer into a temporary staging
+    table and merged into ``stock_data`` in the same transaction, skipping
+    dates that already exist.
+
+    Args:
+        frame (pandas.DataFrame): Output of ``prepare_stock_frame``
+
+    Returns:
+        int: Number of rows inserted
+    """
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    columns = ", ".join(STOCK_COLUMNS)
+    with connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TEMP TABLE stock_data_stage (LIKE stock_data INCLUDING DEFAULTS) ON COMMIT DROP;")
+            cur.copy_expert(f"COPY stock_data_stage ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cur.execute(f"""
+                INSERT INTO stock_data ({columns})
+                SELECT {columns} FROM stock_data_stage
+                ON CONFLICT (ticker, date) DO NOTHING;
+            """)
+            inserted = cur.rowcount
+    increment("rows_inserted", inserted, method="copy")
+    if inserted:
+        for ticker in frame['ticker'].unique():
+            invalidate_ticker(ticker)
+    return inserted
+
+def copy_stock_data(df, ticker: str, name: str, exchange: str):
+    """
+    Load a fetched DataFrame straight into ``stock_data`` without a CSV file
+
+    Args:
+        df (pandas.DataFrame): Output of ``fetch_stock_data``
+        ticker (str): Stock symbol
+        name (str): Company name
+        exchange (str): Listing exchange
+
+    Returns:
+        int: Number of rows inserted
+    """
+    return copy_stock_frame(prepare_stock_frame(df, ticker, name, exchange))
+
+def latest_stored_dates(tickers):
+    """
+    Look up the most recent stored date for each ticker in one query
+
+    Args:
+        tickers (list): Stock symbols
+
+    Returns:
+        dict: Upper-case ticker -> latest ``datetime.date`` (absent if no rows)
+    """
+    tickers = [t.upper() for t in tickers]
+    if not tickers:
+        return {}
+    with connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT ticker, MAX(date) FROM stock_data WHERE ticker = ANY(%s) GROUP BY ticker;",
+                (tickers,),
+            )
+            return dict(cur.fetchall())
+
+def plan_refresh(tickers, now=None):
+    """
+    Decide how much history each ticker needs
+
+    Tickers already holding the last completed session are skipped, gaps
+    shorter than ``COMPACT_SESSIONS`` use 'compact', and new tickers or
+    longer gaps use 'full'.
+
+    Args:
+        tickers (list): Stock symbols
+        now (datetime, optional): Aware datetime used to find the last session
+
+    Returns:
+        dict: Upper-case ticker -> 'compact', 'full' or None (up to date)
+    """
+    latest = latest_stored_dates(tickers)
+    target = last_completed_session(now)
+    plan = {}
+    for ticker in (t.upper() for t in tickers):
+        last = latest.get(ticker)
+        if last is None:
+            plan[ticker] = "full"
+        elif last >= target:
+            plan[ticker] = None
+        elif trading_days_between(last, target) < COMPACT_SESSIONS:
+            plan[ticker] = "compact"
+        else:
+            plan[ticker] = "full"
+    return plan
+
+def process_stock(company_name, archive_csv=False, incremental=False):
     comp_details=get_ticker(company_name)
-    df =fetch_stock_data(comp_details[0][1],"compact")
-    save_stock_data(comp_details[0][1], df)
-    insert_stock_data(comp_details[0][1], comp_details[0][3], comp_details[0][2])
+    ticker, exchange, name = comp_details[0][1], comp_details[0][2], comp_details[0][3]
+    output_size = "compact"
+    if incremental:
+        output_size = plan_refresh([ticker])[ticker.upper()]
+        if output_size is None:
+            print(f"✅ {ticker.upper()} is already up to date")
+            return
+    df =fetch_stock_data(ticker,output_size)
+    if archive_csv:
+        save_stock_data(ticker, df)
+    try:
+        inserted = copy_stock_data(df, ticker, name, exchange)
+        print(f"✅ Inserted {inserted} new rows for {ticker.upper()}")
+    except Exception as e:
+        print(f"❌ Failed to insert for {ticker.upper()}: {e}")
+        return
+    # After the insert, so the local store never holds rows the database lacks
+    get_price_store().append(ticker, df)
+    refresh_indicator_state(ticker)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,12 @@ Authentication and environment validation utilities
 
 import os
 from dotenv import load_dotenv
+from utils.cache import cached_resource
+
+@cached_resource
+def _load_env():
+    """Read the .env file once per process"""
+    return load_dotenv()
 
 def check_environment_variables():
     """
@@ -12,7 +18,7 @@ def check_environment_variables():
     Returns:
         dict: Status of environment variables
     """
-    load_dotenv()
+    _load_env()
     
     required_vars = {
         'ALPHA_VANTAGE_API_KEY': os.getenv('ALPHA_VANTAGE_API_KEY'),
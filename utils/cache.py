@@ -0,0 +1,245 @@
+"""
+Shared in-process caching for the Streamlit pages and the ingestion code
+
+- ``cached_resource`` keeps one instance of an expensive object (clients,
+  connection pools) per process.
+- ``cached_data`` memoizes function results with the TTL and on/off switch
+  configured on the Settings page, and counts hits and misses per namespace.
+- ``invalidate_ticker`` drops every cached result tagged with a ticker. It
+  also touches a marker file so caches in other processes (e.g. the
+  Streamlit server while a bulk ingestion runs) notice on their next lookup.
+  ``invalidate_tag`` does the same for any tag, e.g. ``TICKER_MASTER_TAG``
+  after the company master list changes.
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER_DIR = os.getenv("STOCKIE_CACHE_MARKERS", os.path.join(ROOT_DIR, "data", "cache_markers"))
+
+DEFAULT_TTL_SECONDS = 4 * 3600
+MAX_ENTRIES = 2048
+# Marker files of other processes are re-read at most this often per tag
+MARKER_CHECK_SECONDS = 1.0
+
+_settings = {'enabled': True, 'ttl_seconds': DEFAULT_TTL_SECONDS}
+
+
+def get_cache_settings():
+    """Return the current cache switch and TTL"""
+    return dict(_settings)
+
+
+def configure_cache(enabled=None, ttl_seconds=None):
+    """Turn data caching on/off or change the default TTL"""
+    if enabled is not None:
+        _settings['enabled'] = enabled
+        if not enabled:
+            get_data_cache().clear()
+    if ttl_seconds is not None:
+        _settings['ttl_seconds'] = ttl_seconds
+
+
+def cached_resource(fn):
+    """Create the wrapped object once per process and argument set"""
+    instances = {}
+    lock = threading.Lock()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        with lock:
+            if key not in instances:
+                instances[key] = fn(*args, **kwargs)
+            return instances[key]
+
+    wrapper.clear = instances.clear
+    return wrapper
+
+
+def _marker_path(tag):
+    return os.path.join(MARKER_DIR, tag.replace("/", "_").replace(":", "_"))
+
+
+_marker_times = {}
+
+
+def _marker_time(tag, now):
+    """Modification time of ``tag``'s marker (0 if none), re-read at most every ``MARKER_CHECK_SECONDS``"""
+    checked = _marker_times.get(tag)
+    if checked is not None and now - checked[0] < MARKER_CHECK_SECONDS:
+        return checked[1]
+    try:
+        mtime = os.stat(_marker_path(tag)).st_mtime
+    except FileNotFoundError:
+        mtime = 0.0
+    _marker_times[tag] = (now, mtime)
+    return mtime
+
+
+class DataCache:
+    """LRU cache with per-entry TTL, tag invalidation and hit/miss counters"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, namespace, field):
+        counters = self._counters.setdefault(namespace, {'hits': 0, 'misses': 0})
+        counters[field] += 1
+
+    def _invalidated_since(self, tags, created, now):
+        return any(_marker_time(tag, now) > created for tag in tags)
+
+    def get_or_compute(self, namespace, key, compute, ttl=None, tags=()):
+        """
+        Return the cached value for ``(namespace, key)`` or compute and store it
+
+        Args:
+            namespace (str): Group used for statistics and bulk invalidation
+            key: Hashable key within the namespace
+            compute (callable): Produces the value on a miss
+            ttl (float, optional): Seconds to keep the value; defaults to the configured TTL
+            tags (iterable): Tags such as ``ticker:AAPL`` for targeted invalidation
+
+        Returns:
+            The cached or freshly computed value
+        """
+        if not _settings['enabled']:
+            return compute()
+
+        full_key = (namespace, key)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(full_key)
+        # Marker files are checked outside the lock so lookups never queue on disk I/O
+        fresh = entry is not None and now < entry[1] and not self._invalidated_since(entry[3], entry[2], now)
+        with self._lock:
+            if fresh:
+                if full_key in self._entries:
+                    self._entries.move_to_end(full_key)
+                self._count(namespace, 'hits')
+                return entry[0]
+            if entry is not None and self._entries.get(full_key) is entry:
+                del self._entries[full_key]
+            self._count(namespace, 'misses')
+
+        value = compute()
+        if value is None:
+            # Failures are retried rather than cached
+            return value
+        ttl = _settings['ttl_seconds'] if ttl is None else ttl
+        with self._lock:
+            self._entries[full_key] = (value, now + ttl, now, tuple(tags))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate_tag(self, tag):
+        """Drop every entry carrying ``tag`` in this process"""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if tag in entry[3]]:
+                del self._entries[key]
+
+    def invalidate_namespace(self, namespace):
+        """Drop every entry in ``namespace``"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return ``{namespace: {hits, misses, hit_rate, entries}}``"""
+        with self._lock:
+            sizes = {}
+            for namespace, _ in self._entries:
+                sizes[namespace] = sizes.get(namespace, 0) + 1
+            result = {}
+            for namespace, counters in sorted(self._counters.items()):
+                lookups = counters['hits'] + counters['misses']
+                result[namespace] = {
+                    'hits': counters['hits'],
+                    'misses': counters['misses'],
+                    'hit_rate': counters['hits'] / lookups if lookups else 0.0,
+                    'entries': sizes.get(namespace, 0),
+                }
+            return result
+
+
+@cached_resource
+def get_data_cache():
+    """Return the process-wide data cache"""
+    return DataCache()
+
+
+def cached_data(namespace, ttl=None, tags=None, key=None):
+    """
+    Memoize a function in the shared data cache
+
+    Args:
+        namespace (str): Statistics/invalidation group for the function
+        ttl (float, optional): Seconds to keep results; defaults to the configured TTL
+        tags (callable, optional): ``tags(*args, **kwargs)`` returning the tags of a call
+        key (callable, optional): ``key(*args, **kwargs)`` returning the cache key of a
+            call, e.g. a digest of large arguments; defaults to the arguments themselves
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            call_tags = tags(*args, **kwargs) if tags else ()
+            return get_data_cache().get_or_compute(namespace, call_key, lambda: fn(*args, **kwargs), ttl, call_tags)
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+
+def ticker_tag(ticker):
+    """Tag for cached results that depend on one ticker's prices"""
+    return f"ticker:{ticker.upper()}"
+
+
+STORED_TICKERS_TAG = "stored_tickers"
+TICKER_MASTER_TAG = "ticker_master"
+
+
+def invalidate_tag(tag):
+    """
+    Drop cached results carrying ``tag`` in this process and mark the tag
+    so other processes drop theirs on next lookup
+    """
+    get_data_cache().invalidate_tag(tag)
+    os.makedirs(MARKER_DIR, exist_ok=True)
+    with open(_marker_path(tag), "a"):
+        pass
+    os.utime(_marker_path(tag))
+    _marker_times.pop(tag, None)
+
+
+def tag_invalidated_at(tag):
+    """Time ``tag`` was last invalidated by any process (0 if never)"""
+    try:
+        return os.stat(_marker_path(tag)).st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def invalidate_ticker(ticker):
+    """
+    Called by ingestion when new rows land for ``ticker``
+
+    Drops cached results in this process and marks the tags so other
+    processes drop theirs on next lookup.
+    """
+    for tag in (ticker_tag(ticker), STORED_TICKERS_TAG):
+        invalidate_tag(tag)
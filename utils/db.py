@@ -0,0 +1,190 @@
+"""
+Shared Postgres connection pool for all database readers and writers
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+DEFAULT_MIN_CONNECTIONS = 1
+DEFAULT_MAX_CONNECTIONS = 5
+DEFAULT_QUERY_TIMEOUT = 30  # seconds
+HEALTH_CHECK_AFTER = 60  # seconds a connection may sit idle before it is pinged
+
+
+def get_db_url():
+    """Return the Postgres connection string from the environment"""
+    load_dotenv()
+    url = os.getenv("SUPABASE_DB_URL1")
+    if not url:
+        raise ValueError("Missing SUPABASE_DB_URL1 in .env")
+    return url
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of reusable psycopg2 connections
+
+    Checkouts block while ``maxconn`` connections are in use. Connections that
+    have been idle longer than ``HEALTH_CHECK_AFTER`` are pinged before reuse
+    and replaced if they have gone away. Every connection is opened with a
+    server-side ``statement_timeout`` of ``query_timeout`` seconds.
+    """
+
+    def __init__(self, dsn, minconn=DEFAULT_MIN_CONNECTIONS, maxconn=DEFAULT_MAX_CONNECTIONS,
+                 query_timeout=DEFAULT_QUERY_TIMEOUT):
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.query_timeout = query_timeout
+        self._pool = ThreadedConnectionPool(
+            minconn,
+            maxconn,
+            dsn,
+            connect_timeout=10,
+            options=f"-c statement_timeout={int(query_timeout * 1000)}",
+        )
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._retired = False
+
+    def _ping(self, conn):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self):
+        conn = self._pool.getconn()
+        idle = time.monotonic() - self._last_used.get(id(conn), time.monotonic())
+        if conn.closed or (idle > HEALTH_CHECK_AFTER and not self._ping(conn)):
+            self._last_used.pop(id(conn), None)
+            self._pool.putconn(conn, close=True)
+            conn = self._pool.getconn()
+        return conn
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Borrow a connection; commits on success and rolls back on error
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free connection
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for a database connection")
+        with self._lock:
+            retired = self._retired
+            if not retired:
+                self._in_use += 1
+        if retired:
+            # Fetched before configure_pool swapped pools; this one may already be closed
+            self._slots.release()
+            with get_pool().connection(timeout) as conn:
+                yield conn
+            return
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+            conn.commit()
+        except Exception:
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                if conn.closed:
+                    self._last_used.pop(id(conn), None)
+                else:
+                    self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn, close=bool(conn.closed))
+            self._slots.release()
+            with self._lock:
+                self._in_use -= 1
+                close_now = self._retired and self._in_use == 0
+            if close_now:
+                self._close()
+
+    def _close(self):
+        self._pool.closeall()
+        self._last_used.clear()
+
+    def health_check(self):
+        """Return True if a pooled connection can run a query"""
+        try:
+            with self.connection(timeout=5) as conn:
+                return self._ping(conn)
+        except Exception:
+            return False
+
+    def retire(self):
+        """Close the pool once every borrowed connection has been returned"""
+        with self._lock:
+            self._retired = True
+            close_now = self._in_use == 0
+        if close_now:
+            self._close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_settings = {
+    'minconn': DEFAULT_MIN_CONNECTIONS,
+    'maxconn': DEFAULT_MAX_CONNECTIONS,
+    'query_timeout': DEFAULT_QUERY_TIMEOUT,
+}
+
+
+def get_pool_settings():
+    """Return the current pool size and query timeout settings"""
+    return dict(_settings)
+
+
+def configure_pool(minconn=None, maxconn=None, query_timeout=None):
+    """
+    Change the pool size or query timeout
+
+    The existing pool is retired and a new one is created on next use.
+    Connections currently checked out finish their work and are closed when
+    they are returned.
+    """
+    global _pool
+    with _pool_lock:
+        updated = dict(_settings)
+        if minconn is not None:
+            updated['minconn'] = minconn
+        if maxconn is not None:
+            updated['maxconn'] = maxconn
+        if query_timeout is not None:
+            updated['query_timeout'] = query_timeout
+        updated['minconn'] = min(updated['minconn'], updated['maxconn'])
+        if updated == _settings:
+            return
+        _settings.update(updated)
+        if _pool is not None:
+            _pool.retire()
+            _pool = None
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(get_db_url(), **_settings)
+        return _pool
+
+
+def connection(timeout=None):
+    """Borrow a connection from the shared pool (context manager)"""
+    return get_pool().connection(timeout)
@@ -0,0 +1,95 @@
+"""
+Downsampling of long price series before they are sent to Plotly
+"""
+
+import numpy as np
+import pandas as pd
+
+# Points per trace; roughly one per horizontal pixel of a wide chart
+DEFAULT_POINT_BUDGET = 800
+
+
+def _as_numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets selection for a line series
+
+    Keeps the first and last points and, for each of ``n_out - 2`` buckets,
+    the point forming the largest triangle with the previously kept point
+    and the average of the next bucket. Peaks and troughs survive.
+
+    Args:
+        x: Ascending x values (numeric or datetime64)
+        y: y values
+        n_out (int): Number of points to keep
+
+    Returns:
+        numpy.ndarray: Sorted indices of the kept points
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_numeric(x)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def lttb(df, x, y, n_out=DEFAULT_POINT_BUDGET):
+    """Return the rows of ``df`` kept by LTTB on columns ``x``/``y``"""
+    if len(df) <= n_out:
+        return df
+    return df.iloc[lttb_indices(df[x].to_numpy(), df[y].to_numpy(), n_out)]
+
+
+def minmax_ohlc(df, n_buckets=DEFAULT_POINT_BUDGET, date='date'):
+    """
+    Merge consecutive bars into at most ``n_buckets`` OHLCV bars
+
+    Each bucket keeps its first open, highest high, lowest low, last close
+    and total volume, so candlestick extremes and volume totals are exact.
+
+    Args:
+        df (pandas.DataFrame): Bars in ascending date order
+        n_buckets (int): Maximum number of output bars
+        date (str): Name of the date column
+
+    Returns:
+        pandas.DataFrame: Bucketed bars dated at the start of each bucket
+    """
+    n = len(df)
+    if n <= n_buckets:
+        return df
+    starts = np.linspace(0, n, n_buckets, endpoint=False).astype(np.int64)
+    ends = np.append(starts[1:], n) - 1
+
+    out = {
+        date: df[date].to_numpy()[starts],
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[ends],
+    }
+    if 'volume' in df:
+        out['volume'] = np.add.reduceat(df['volume'].to_numpy(), starts)
+    return pd.DataFrame(out)
@@ -0,0 +1,166 @@
+"""
+US equity market calendar (NYSE regular sessions)
+
+Covers weekends, the standard NYSE full-day holidays and unscheduled
+closures since 2001. Early closes are treated as regular sessions.
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+EASTERN = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+
+# Unscheduled full-day closures (national days of mourning, weather, 9/11)
+SPECIAL_CLOSURES = frozenset({
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11), date(2007, 1, 2), date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5), date(2025, 1, 9),
+})
+
+
+def _easter(year):
+    # Anonymous Gregorian algorithm
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year, month, weekday):
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=64)
+def nyse_holidays(year):
+    """Return the set of NYSE full-day holidays in ``year``"""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _last_weekday(year, 5, 0),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day falling on a Saturday is not observed on the Friday before
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+    holidays.update(d for d in SPECIAL_CLOSURES if d.year == year)
+    return frozenset(holidays)
+
+
+def is_trading_day(day):
+    """Return True if the market holds a regular session on ``day``"""
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+
+def previous_trading_day(day):
+    """Return the last trading day strictly before ``day``"""
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def next_trading_day(day):
+    """Return the first trading day strictly after ``day``"""
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def now_eastern():
+    """Current time in the exchange time zone"""
+    return datetime.now(EASTERN)
+
+
+def session_open(day):
+    """Return the opening time of the session on ``day`` as an aware datetime"""
+    return datetime.combine(day, MARKET_OPEN, tzinfo=EASTERN)
+
+
+def session_close(day):
+    """Return the closing time of the session on ``day`` as an aware datetime"""
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=EASTERN)
+
+
+def last_completed_session(now=None):
+    """
+    Return the most recent trading day whose session has closed
+
+    Args:
+        now (datetime, optional): Aware datetime; defaults to the current time
+
+    Returns:
+        datetime.date: Date of the latest daily bar that should exist
+    """
+    now = (now or now_eastern()).astimezone(EASTERN)
+    today = now.date()
+    if is_trading_day(today) and now.time() >= MARKET_CLOSE:
+        return today
+    return previous_trading_day(today)
+
+
+def next_close(after):
+    """Return the first session close strictly after the aware datetime ``after``"""
+    after = after.astimezone(EASTERN)
+    day = after.date()
+    if is_trading_day(day) and after < session_close(day):
+        return session_close(day)
+    return session_close(next_trading_day(day))
+
+
+def next_open(after):
+    """Return the first session open strictly after the aware datetime ``after``"""
+    after = after.astimezone(EASTERN)
+    day = after.date()
+    if is_trading_day(day) and after < session_open(day):
+        return session_open(day)
+    return session_open(next_trading_day(day))
+
+
+def is_market_open(now=None):
+    """Return True during regular trading hours"""
+    now = (now or now_eastern()).astimezone(EASTERN)
+    return is_trading_day(now.date()) and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def trading_days_between(start, end):
+    """Count trading days in the half-open range (``start``, ``end``]"""
+    count = 0
+    day = start + timedelta(days=1)
+    while day <= end:
+        if is_trading_day(day):
+            count += 1
+        day += timedelta(days=1)
+    return count
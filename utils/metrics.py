@@ -0,0 +1,279 @@
+"""
+Lightweight timing spans and counters for the hot paths
+
+- ``timed`` wraps a function (or generator) and records how long each call
+  takes under a span name; ``span`` does the same for a ``with`` block.
+- ``increment`` adds to a counter, e.g. rows inserted or LLM tokens.
+- ``snapshot`` feeds the performance panel on the Settings page and
+  ``prometheus_text`` renders everything in the Prometheus text format;
+  ``serve_metrics`` exposes it on ``/metrics`` for long-running jobs.
+
+Metrics live in process memory. Collection is switched off with
+``STOCKIE_METRICS=0`` or ``configure_metrics(enabled=False)``; a disabled
+``timed`` wrapper costs one dictionary lookup per call.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+PREFIX = "stockie_"
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Durations kept per span for the panel's percentiles
+RECENT_SAMPLES = 512
+
+_settings = {'enabled': os.getenv("STOCKIE_METRICS", "1") != "0"}
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+
+
+class _SpanStats:
+    __slots__ = ('count', 'errors', 'total', 'max', 'buckets', 'recent')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, seconds, error):
+        self.count += 1
+        self.errors += int(error)
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        bucket = bisect_left(BUCKETS, seconds)
+        if bucket < len(BUCKETS):
+            self.buckets[bucket] += 1
+
+
+def metrics_enabled():
+    """Return True if metrics are being collected"""
+    return _settings['enabled']
+
+
+def configure_metrics(enabled=None):
+    """Turn metric collection on or off"""
+    if enabled is not None:
+        _settings['enabled'] = enabled
+
+
+def observe(name, seconds, error=False, **labels):
+    """Record one duration of span ``name``"""
+    if not _settings['enabled']:
+        return
+    key = (name, tuple(sorted(labels.items())) if labels else ())
+    with _lock:
+        stats = _spans.get(key)
+        if stats is None:
+            stats = _spans[key] = _SpanStats()
+        stats.add(seconds, error)
+
+
+def increment(name, amount=1, **labels):
+    """Add ``amount`` to counter ``name``"""
+    if not _settings['enabled'] or not amount:
+        return
+    key = (name, tuple(sorted(labels.items())) if labels else ())
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+class span:
+    """
+    Time a block of code
+
+    Example:
+        with span("alpha_vantage_http"):
+            response = requests.get(url)
+    """
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        if _settings['enabled']:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start is not None:
+            observe(self.name, time.perf_counter() - self.start, exc_type is not None, **self.labels)
+        return False
+
+
+def timed(name=None, **labels):
+    """
+    Record the duration of every call of the decorated function
+
+    Exceptions are counted as errors and re-raised. For generator functions
+    the span covers the whole iteration, up to exhaustion or ``close()``.
+
+    Args:
+        name (str, optional): Span name; defaults to the function name
+        **labels: Fixed labels for the span
+    """
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if not _settings['enabled']:
+                    return (yield from fn(*args, **kwargs))
+                start = time.perf_counter()
+                error = True
+                try:
+                    result = yield from fn(*args, **kwargs)
+                    error = False
+                    return result
+                except GeneratorExit:
+                    error = False
+                    raise
+                finally:
+                    observe(span_name, time.perf_counter() - start, error, **labels)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _settings['enabled']:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                observe(span_name, time.perf_counter() - start, True, **labels)
+                raise
+            observe(span_name, time.perf_counter() - start, False, **labels)
+            return result
+        return wrapper
+    return decorator
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+def snapshot():
+    """
+    Current values of every span and counter
+
+    Returns:
+        dict: ``spans`` as dicts with ``span``, ``labels``, ``count``,
+        ``errors``, ``p50_ms``, ``p95_ms``, ``max_ms`` and ``total_s`` (the
+        percentiles cover the latest ``RECENT_SAMPLES`` calls), and
+        ``counters`` as dicts with ``name``, ``labels`` and ``value``
+    """
+    with _lock:
+        spans = [(name, labels, stats.count, stats.errors, stats.total, stats.max, sorted(stats.recent))
+                 for (name, labels), stats in _spans.items()]
+        counters = list(_counters.items())
+    return {
+        'spans': [
+            {'span': name, 'labels': dict(labels), 'count': count, 'errors': errors,
+             'p50_ms': _percentile(recent, 0.5) * 1000, 'p95_ms': _percentile(recent, 0.95) * 1000,
+             'max_ms': longest * 1000, 'total_s': total}
+            for name, labels, count, errors, total, longest, recent in sorted(spans)
+        ],
+        'counters': [
+            {'name': name, 'labels': dict(labels), 'value': value}
+            for (name, labels), value in sorted(counters)
+        ],
+    }
+
+
+def _format_labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in items)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + "}"
+
+
+def prometheus_text():
+    """Render all spans and counters in the Prometheus text exposition format"""
+    with _lock:
+        spans = sorted((key, stats.count, stats.errors, stats.total, list(stats.buckets))
+                       for key, stats in _spans.items())
+        counters = sorted(_counters.items())
+
+    family = f"{PREFIX}span_seconds"
+    lines = [f"# HELP {family} Time spent in instrumented functions and blocks",
+             f"# TYPE {family} histogram"]
+    for (name, labels), count, _, total, buckets in spans:
+        labels = (('span', name),) + labels
+        cumulative = 0
+        for bound, hits in zip(BUCKETS, buckets):
+            cumulative += hits
+            lines.append(f"{family}_bucket{_format_labels(labels, le=repr(bound))} {cumulative}")
+        lines.append(f"{family}_bucket{_format_labels(labels, le='+Inf')} {count}")
+        lines.append(f"{family}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{family}_count{_format_labels(labels)} {count}")
+
+    errors = f"{PREFIX}span_errors_total"
+    lines += [f"# HELP {errors} Instrumented calls that raised",
+              f"# TYPE {errors} counter"]
+    for (name, labels), _, error_count, _, _ in spans:
+        lines.append(f"{errors}{_format_labels((('span', name),) + labels)} {error_count}")
+
+    declared = set()
+    for (name, labels), value in counters:
+        metric = f"{PREFIX}{name}_total"
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Forget every recorded span and counter"""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """
+    Expose ``prometheus_text()`` on ``http://<host>:<port>/metrics`` from a
+    background thread
+
+    Args:
+        port (int): Port to listen on
+        host (str): Interface to bind; only local scrapers by default, pass
+            "0.0.0.0" to expose the (ticker-level) metrics on every interface
+
+    Returns:
+        ThreadingHTTPServer: The running server
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,152 @@
+"""
+Incremental parsing of JSON that is still being streamed
+
+``parse_partial_json`` turns any prefix of a JSON document into the most
+complete Python value it can: open objects and arrays are closed, a string
+that is still arriving is returned as far as it goes, and keys whose value
+has not started yet are left out. Numbers and literals are only included
+once complete, so values never change type or shrink while streaming.
+"""
+
+import json
+import re
+
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+# A number that may still be growing at the end of the input
+_NUMBER_PREFIX = re.compile(r"-?(?:\d+(?:\.\d*)?(?:[eE][+-]?\d*)?)?")
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+
+class _EndOfInput(Exception):
+    """Raised when a value is cut off before anything usable was read"""
+
+
+class _PartialParser:
+
+    def __init__(self, text, pos=0):
+        self.text = text
+        self.pos = pos
+
+    def _skip_whitespace(self):
+        while self.pos < len(self.text) and self.text[self.pos] in " \t\r\n":
+            self.pos += 1
+
+    def _at_end(self):
+        self._skip_whitespace()
+        return self.pos >= len(self.text)
+
+    def value(self):
+        if self._at_end():
+            raise _EndOfInput
+        char = self.text[self.pos]
+        if char == '{':
+            return self._object()
+        if char == '[':
+            return self._array()
+        if char == '"':
+            return self._string()
+        return self._scalar()
+
+    def _object(self):
+        self.pos += 1
+        result = {}
+        while not self._at_end():
+            if self.text[self.pos] == '}':
+                self.pos += 1
+                return result
+            if self.text[self.pos] == ',':
+                self.pos += 1
+                continue
+            key = self._string()
+            if self._at_end() or self.text[self.pos] != ':':
+                return result  # key or colon still arriving
+            self.pos += 1
+            try:
+                result[key] = self.value()
+            except _EndOfInput:
+                return result
+        return result
+
+    def _array(self):
+        self.pos += 1
+        result = []
+        while not self._at_end():
+            if self.text[self.pos] == ']':
+                self.pos += 1
+                return result
+            if self.text[self.pos] == ',':
+                self.pos += 1
+                continue
+            try:
+                result.append(self.value())
+            except _EndOfInput:
+                return result
+        return result
+
+    def _string(self):
+        if self.text[self.pos] != '"':
+            raise ValueError(f"Expected string at position {self.pos}")
+        i = self.pos + 1
+        safe_end = i  # end of the longest prefix without a cut-off escape
+        while i < len(self.text):
+            char = self.text[i]
+            if char == '"':
+                raw = self.text[self.pos + 1:i]
+                self.pos = i + 1
+                return json.loads(f'"{raw}"')
+            if char == '\\':
+                i += 6 if self.text[i + 1:i + 2] == 'u' else 2
+                if i > len(self.text):
+                    break
+            else:
+                i += 1
+            safe_end = i
+        raw = self.text[self.pos + 1:safe_end]
+        self.pos = len(self.text)
+        return json.loads(f'"{raw}"')
+
+    def _cut_off(self):
+        # Nothing after a cut-off value can be parsed; unwind every container
+        self.pos = len(self.text)
+        return _EndOfInput()
+
+    def _scalar(self):
+        rest = self.text[self.pos:]
+        for literal, value in _LITERALS.items():
+            if rest.startswith(literal):
+                self.pos += len(literal)
+                return value
+            if literal.startswith(rest):
+                raise self._cut_off()
+        if _NUMBER_PREFIX.fullmatch(rest):
+            raise self._cut_off()  # more digits may follow
+        match = _NUMBER.match(self.text, self.pos)
+        if not match:
+            raise ValueError(f"Unexpected character {rest[:1]!r} at position {self.pos}")
+        self.pos = match.end()
+        return json.loads(match.group())
+
+
+def parse_partial_json(text):
+    """
+    Parse a possibly incomplete JSON document
+
+    Leading prose or a Markdown code fence before the first ``{`` or ``[``
+    is ignored.
+
+    Args:
+        text (str): JSON received so far
+
+    Returns:
+        The parsed prefix (usually a dict), or None if nothing usable has arrived
+
+    Raises:
+        ValueError: If the text cannot be the start of a JSON document
+    """
+    starts = [i for i in (text.find('{'), text.find('[')) if i >= 0]
+    if not starts:
+        return None
+    try:
+        return _PartialParser(text, min(starts)).value()
+    except _EndOfInput:
+        return None
@@ -0,0 +1,206 @@
+"""
+Token-bucket rate limiter shared by all Alpha Vantage calls
+
+The Streamlit app, the refresh scheduler, the import workers and bulk ingest
+run as separate processes against the same API key, so the bucket itself
+(tokens, rate and any throttle pause) lives in a small SQLite file that
+every process draws from. Priority lanes are per process.
+"""
+
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+DEFAULT_CALLS_PER_MINUTE = 5
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUCKET_PATH = os.getenv("STOCKIE_RATE_LIMIT", os.path.join(ROOT_DIR, "data", "rate_limit.sqlite"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    calls_per_minute REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    paused_until REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class RateLimiter:
+    """
+    Token bucket with priority lanes
+
+    Callers block in ``acquire`` until a token is available. Waiters are
+    served in priority order (then FIFO), so interactive UI fetches overtake
+    queued batch backfills. ``backoff`` pauses every lane after the API
+    reports throttling.
+
+    With a ``path`` the bucket is kept in that SQLite file and shared with
+    every other process using it; without one it lives in this process only.
+    """
+
+    def __init__(self, calls_per_minute=DEFAULT_CALLS_PER_MINUTE, burst=1, path=None):
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self.burst = burst
+        self._state = {
+            'calls_per_minute': float(calls_per_minute),
+            'tokens': float(burst),
+            'updated': time.time(),
+            'paused_until': 0.0,
+        }
+        self._conn = None
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO bucket (id, calls_per_minute, tokens, updated) VALUES (1, ?, ?, ?)",
+                (float(calls_per_minute), float(burst), time.time()),
+            )
+
+    def _update(self, change):
+        """
+        Refill the bucket, apply ``change`` to its state and save it
+
+        For a shared bucket the read-modify-write runs in one ``BEGIN
+        IMMEDIATE`` transaction, so processes never hand out the same token.
+        Called with ``self._cond`` held.
+        """
+        if self._conn is None:
+            state = self._state
+            self._refill(state)
+            return change(state)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT calls_per_minute, tokens, updated, paused_until FROM bucket WHERE id = 1"
+            ).fetchone()
+            state = dict(zip(('calls_per_minute', 'tokens', 'updated', 'paused_until'), row))
+            self._refill(state)
+            result = change(state)
+            self._conn.execute(
+                "UPDATE bucket SET calls_per_minute = ?, tokens = ?, updated = ?, paused_until = ? WHERE id = 1",
+                (state['calls_per_minute'], state['tokens'], state['updated'], state['paused_until']),
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _refill(self, state):
+        now = time.time()
+        elapsed = max(0.0, now - state['updated'])
+        state['tokens'] = min(self.burst, state['tokens'] + elapsed * state['calls_per_minute'] / 60.0)
+        state['updated'] = now
+
+    @property
+    def calls_per_minute(self):
+        """Sustained rate shared by every user of the bucket"""
+        with self._cond:
+            rate = self._update(lambda state: state['calls_per_minute'])
+        return int(rate) if rate == int(rate) else rate
+
+    @property
+    def interval(self):
+        """Seconds between calls at the configured rate"""
+        return 60.0 / self.calls_per_minute
+
+    def set_rate(self, calls_per_minute):
+        """Change the sustained rate, e.g. when the API tier changes"""
+        with self._cond:
+            self._update(lambda state: state.update(calls_per_minute=float(calls_per_minute)))
+            self._cond.notify_all()
+
+    def _take(self, state):
+        """Take a token if one is free; otherwise return seconds until one may be"""
+        now = time.time()
+        if state['tokens'] >= 1 and now >= state['paused_until']:
+            state['tokens'] -= 1
+            return 0.0
+        token_wait = (1 - state['tokens']) * 60.0 / state['calls_per_minute']
+        return max(token_wait, state['paused_until'] - now, 0.001)
+
+    def acquire(self, priority=PRIORITY_BATCH, timeout=None):
+        """
+        Block until a call may be made
+
+        Args:
+            priority (int): Lane; ``PRIORITY_INTERACTIVE`` is served before ``PRIORITY_BATCH``
+            timeout (float, optional): Give up after this many seconds
+
+        Returns:
+            bool: True if a token was taken, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    wait = None
+                    if self._waiters[0] == entry:
+                        wait = self._update(self._take)
+                        if wait == 0:
+                            return True
+
+                    now = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        return False
+                    if deadline is not None:
+                        wait = min(wait, deadline - now) if wait is not None else deadline - now
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def backoff(self, seconds):
+        """Pause all lanes (in every process) for ``seconds`` and drop any accumulated tokens"""
+        def pause(state):
+            state['paused_until'] = max(state['paused_until'], time.time() + seconds)
+            state['tokens'] = 0.0
+
+        with self._cond:
+            self._update(pause)
+            self._cond.notify_all()
+
+    def queue_depth(self):
+        """Number of callers in this process currently waiting"""
+        with self._cond:
+            return len(self._waiters)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Return the Alpha Vantage limiter, backed by the shared bucket file
+
+    The bucket's rate is shared by every process: ``set_rate`` in one (e.g.
+    the Settings page) applies to all. ``ALPHA_VANTAGE_CALLS_PER_MINUTE``
+    (default 5, the free tier) seeds a new bucket and, when set, resets the
+    rate as the process starts. ``STOCKIE_RATE_LIMIT`` moves the file.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            rate = os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE")
+            _limiter = RateLimiter(int(rate or DEFAULT_CALLS_PER_MINUTE), path=BUCKET_PATH)
+            if rate:
+                _limiter.set_rate(int(rate))
+        return _limiter